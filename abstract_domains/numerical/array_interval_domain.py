@@ -0,0 +1,253 @@
+"""
+Array Interval Domain
+=====================
+
+Interval domain storing the bounds of all program variables in two NumPy arrays.
+
+Lattice operations are single vectorised operations over all variables at once, rather than a loop over one
+:class:`IntervalLattice` element per variable.
+
+.. note::
+    This module requires NumPy, which is only needed by this domain.
+"""
+
+from copy import deepcopy
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from abstract_domains.lattice import Lattice
+from abstract_domains.numerical.interval_domain import IntervalLattice, IntervalDomain, compile_evaluator
+from abstract_domains.numerical.numerical import NumericalMixin
+from abstract_domains.numerical.octagon_domain import OctagonLattice
+from abstract_domains.state import State
+from core.expressions import Expression, VariableIdentifier
+from core.utils import copy_docstring
+
+
+def _number(bound):
+    """Convert a bound stored in a float array back into a Python number, an ``int`` if it is integral."""
+    bound = float(bound)
+    return int(bound) if bound.is_integer() else bound
+
+
+class ArrayIntervalDomain(NumericalMixin, State):
+    """Packed interval store mapping each program variable to an interval.
+
+    The lower and upper bounds of the variables are stored in two parallel float arrays, ``lower`` and ``upper``,
+    holding one entry per variable each. An interval is empty iff its lower bound is greater than its upper bound.
+    As for :class:`abstract_domains.store.Store`, the store is bottom iff `any` of its intervals is empty.
+
+    .. warning::
+        Lattice operations modify the current store.
+    """
+
+    def __init__(self, variables: List[VariableIdentifier]):
+        """Create an interval store for the given variables, mapping each variable to the top interval.
+
+        :param variables: list of program variables
+        """
+        super().__init__()
+        self._variables = variables
+        self._index = {var: i for i, var in enumerate(variables)}  # index of each variable in the bound arrays
+        self._lower = np.full(len(variables), -np.inf)
+        self._upper = np.full(len(variables), np.inf)
+
+    @property
+    def variables(self):
+        """Variables of the current store."""
+        return self._variables
+
+    @property
+    def lower(self) -> np.ndarray:
+        """Lower bounds of the variables, in the order of ``variables``."""
+        return self._lower
+
+    @property
+    def upper(self) -> np.ndarray:
+        """Upper bounds of the variables, in the order of ``variables``."""
+        return self._upper
+
+    def __repr__(self):
+        def interval(i):
+            if self._lower[i] > self._upper[i]:
+                return "⊥"
+            return f"[{_number(self._lower[i])},{_number(self._upper[i])}]"
+        return ", ".join("{} -> {}".format(var, interval(i)) for var, i in self._index.items())
+
+    def __deepcopy__(self, memo):
+        # variables and their indices are never modified and can be shared
+        result = self.__class__.__new__(self.__class__)
+        memo[id(self)] = result
+        result.__dict__.update(self.__dict__)
+        result._lower, result._upper = self._lower.copy(), self._upper.copy()
+        result._result = deepcopy(self._result, memo)
+        return result
+
+    @copy_docstring(Lattice.replace)
+    def replace(self, other: 'ArrayIntervalDomain') -> 'ArrayIntervalDomain':
+        super().replace(other)
+        self._lower, self._upper = other._lower.copy(), other._upper.copy()
+        return self
+
+    @copy_docstring(Lattice.bottom)
+    def bottom(self) -> 'ArrayIntervalDomain':
+        self._lower = np.full(len(self.variables), np.inf)
+        self._upper = np.full(len(self.variables), -np.inf)
+        return self
+
+    @copy_docstring(Lattice.top)
+    def top(self) -> 'ArrayIntervalDomain':
+        self._lower = np.full(len(self.variables), -np.inf)
+        self._upper = np.full(len(self.variables), np.inf)
+        return self
+
+    @copy_docstring(Lattice.is_bottom)
+    def is_bottom(self) -> bool:
+        return bool(np.any(self._lower > self._upper))
+
+    @copy_docstring(Lattice.is_top)
+    def is_top(self) -> bool:
+        return bool(np.all(self._lower == -np.inf) and np.all(self._upper == np.inf))
+
+    @copy_docstring(Lattice._less_equal)
+    def _less_equal(self, other: 'ArrayIntervalDomain') -> bool:
+        return bool(np.all(other._lower <= self._lower) and np.all(self._upper <= other._upper))
+
+    @copy_docstring(Lattice._meet)
+    def _meet(self, other: 'ArrayIntervalDomain'):
+        self._lower = np.maximum(self._lower, other._lower)
+        self._upper = np.minimum(self._upper, other._upper)
+        return self
+
+    @copy_docstring(Lattice._join)
+    def _join(self, other: 'ArrayIntervalDomain') -> 'ArrayIntervalDomain':
+        self._lower = np.minimum(self._lower, other._lower)
+        self._upper = np.maximum(self._upper, other._upper)
+        return self
+
+    @copy_docstring(Lattice._widening)
+    def _widening(self, other: 'ArrayIntervalDomain'):
+        """Unstable bounds are widened to infinity."""
+        self._lower = np.where(other._lower < self._lower, -np.inf, self._lower)
+        self._upper = np.where(other._upper > self._upper, np.inf, self._upper)
+        return self
+
+    def forget(self, var: VariableIdentifier):
+        i = self._index[var]
+        self._lower[i], self._upper[i] = -np.inf, np.inf
+
+    def set_bounds(self, var: VariableIdentifier, lower: int, upper: int):
+        i = self._index[var]
+        self._lower[i], self._upper[i] = lower, upper
+
+    def get_bounds(self, var: VariableIdentifier):
+        i = self._index[var]
+        return _number(self._lower[i]), _number(self._upper[i])
+
+    def set_interval(self, var: VariableIdentifier, interval: IntervalLattice):
+        self.set_bounds(var, interval.lower, interval.upper)
+
+    def set_lb(self, var: VariableIdentifier, constant):
+        self._lower[self._index[var]] = constant
+
+    def set_ub(self, var: VariableIdentifier, constant):
+        self._upper[self._index[var]] = constant
+
+    def bounds(self, var: VariableIdentifier) -> Optional[Tuple]:
+        """Bounds of a variable as a ``(lower, upper)`` pair, or ``None`` if its interval is empty."""
+        lower, upper = self.get_bounds(var)
+        return None if lower > upper else (lower, upper)
+
+    def evaluate(self, expr: Expression):
+        return IntervalLattice.from_bounds(compile_evaluator(expr)(self.bounds))
+
+    def to_interval_domain(self) -> IntervalDomain:
+        """Translate this packed interval store into an interval store."""
+        interval_domain = IntervalDomain(self.variables)
+        for var in self.variables:
+            bounds = self.bounds(var)
+            if bounds is None:
+                interval_domain.store[var].bottom()
+            else:
+                interval_domain.set_bounds(var, *bounds)
+        return interval_domain
+
+    def from_interval_domain(self, interval_domain: IntervalDomain) -> 'ArrayIntervalDomain':
+        """Translate an interval store into this packed interval store."""
+        assert interval_domain.variables == self.variables
+
+        for var in self.variables:
+            bounds = interval_domain.bounds(var)
+            if bounds is None:
+                self.set_bounds(var, np.inf, -np.inf)
+            else:
+                self.set_bounds(var, *bounds)
+        return self
+
+    def to_octagon(self, octagon: OctagonLattice) -> OctagonLattice:
+        """Translate the interval constraints of this store into the unary constraints of an octagon.
+
+        **NOTE**: This does not reset relational constraints in the octagon!
+
+        :param octagon: octagon over the same variables, modified in place
+        :return: the modified octagon
+        """
+        assert octagon.variables == self.variables
+
+        dbm = octagon.dbm
+        lower, upper = (-2 * self._lower).tolist(), (2 * self._upper).tolist()
+        for i in range(len(self.variables)):
+            dbm[2 * i, 2 * i + 1] = lower[i]  # encodes -2*var <= -2*lower
+            dbm[2 * i + 1, 2 * i] = upper[i]  # encodes 2*var <= 2*upper
+        return octagon
+
+    def from_octagon(self, octagon: OctagonLattice) -> 'ArrayIntervalDomain':
+        """Translate the unary constraints of an octagon into this store, gathering them in bulk from its DBM.
+
+        :param octagon: octagon over the same variables
+        :return: the current store updated with the bounds of the octagon
+        """
+        assert octagon.variables == self.variables
+
+        dbm = octagon.dbm
+        n = len(self.variables)
+        self._lower = np.fromiter((dbm[2 * i, 2 * i + 1] for i in range(n)), dtype=float, count=n) / -2
+        self._upper = np.fromiter((dbm[2 * i + 1, 2 * i] for i in range(n)), dtype=float, count=n) / 2
+        return self
+
+    def _access_variable(self, variable: VariableIdentifier) -> Set[Expression]:
+        return {variable}
+
+    def _assign_variable(self, left: Expression, right: Expression) -> 'ArrayIntervalDomain':
+        if isinstance(left, VariableIdentifier):
+            if left.typ == int:
+                bounds = compile_evaluator(right)(self.bounds)
+                self.set_bounds(left, *((np.inf, -np.inf) if bounds is None else bounds))
+        else:
+            raise NotImplementedError("Interval domain does only support assignments to variables so far.")
+        return self
+
+    def _assume(self, condition: Expression) -> 'ArrayIntervalDomain':
+        return IntervalDomain._propagator.refine(condition, self)
+
+    def _evaluate_literal(self, literal: Expression) -> Set[Expression]:
+        return {literal}
+
+    def enter_loop(self):
+        return self  # nothing to be done
+
+    def exit_loop(self):
+        return self  # nothing to be done
+
+    def enter_if(self):
+        return self  # nothing to be done
+
+    def exit_if(self):
+        return self  # nothing to be done
+
+    def _output(self, output: Expression) -> 'ArrayIntervalDomain':
+        return self  # nothing to be done
+
+    def _substitute_variable(self, left: Expression, right: Expression):
+        raise NotImplementedError("Interval domain does not yet support variable substitution.")
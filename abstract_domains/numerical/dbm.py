@@ -1,6 +1,6 @@
 from abc import ABCMeta, abstractmethod
 from math import inf, isinf, isnan
-from typing import Tuple
+from typing import Optional, Tuple
 
 
 def nan2inf(f):
@@ -40,11 +40,24 @@ class CDBM(metaclass=ABCMeta):
         for i in range(size):
             row = [inf] * min((i + 2) // 2 * 2, size)
             self._m.append(row)
+        self._finite = 0  # number of finite entries outside of the diagonal
+        self._closed = False  # whether the matrix is in closed canonical form
+        self._closure = None  # cached closed copy of the matrix, False if the matrix has no closed canonical form
 
     @property
     def size(self):
         return self._size
 
+    @property
+    def finite(self):
+        """Number of finite entries outside of the diagonal."""
+        return self._finite
+
+    @property
+    def closed(self):
+        """Whether the matrix is known to be in closed canonical form."""
+        return self._closed
+
     @property
     def strongly_closed(self):
         triang_eq = all([self[i, j] <= self[i, k] + self[k, j]
@@ -72,7 +85,20 @@ class CDBM(metaclass=ABCMeta):
 
     def __setitem__(self, index_tuple: Tuple[int, int], value):
         row, col = self._map_index(index_tuple)
+        old = self._m[row][col]
         self._m[row][col] = value
+        if row != col and isinf(old) != isinf(value):
+            self._finite += 1 if isinf(old) else -1
+        self._modified()
+
+    def _modified(self, closed: bool = False):
+        """Invalidate the closure information after a modification of the matrix."""
+        self._closed = closed
+        self._closure = None
+
+    def _count_finite(self):
+        self._finite = sum(1 for row, values in enumerate(self._m)
+                           for col, value in enumerate(values) if row != col and not isinf(value))
 
     @staticmethod
     def _map_index(index_tuple: Tuple[int, int]):
@@ -138,17 +164,54 @@ class CDBM(metaclass=ABCMeta):
         :return: `True`, iff closure successful, i.e. iff constraint system satisfiable and closed canonical form exists
         """
 
+    def closure(self) -> Optional['CDBM']:
+        """Closed copy of this matrix, or this matrix itself if it is already closed.
+
+        The closed copy is computed at most once per version of this matrix, this matrix is not modified.
+
+        :return: closed matrix, or ``None`` if no closed canonical form is existent
+        """
+        if self._closed:
+            return self
+        if self._closure is None:
+            closure = self.copy()
+            self._closure = closure if closure.close() else False
+        return self._closure or None
+
+    def forget_closure(self):
+        """Drop the cached closed copy of this matrix."""
+        self._closure = None
+
+    def copy(self) -> 'CDBM':
+        """Copy of this matrix, sharing no rows with this matrix."""
+        result = self.__class__.__new__(self.__class__)
+        result.__dict__.update(self.__dict__)
+        result._m = [row[:] for row in self._m]
+        result._closure = None
+        return result
+
+    def __deepcopy__(self, memo):
+        result = self.copy()
+        memo[id(self)] = result
+        return result
+
     def intersection(self, other: 'CDBM') -> 'CDBM':
         return self.zip(other, min)
 
     def union(self, other: 'CDBM') -> 'CDBM':
-        return self.zip(other, max)
+        """Point-wise maximum. The union of two closed matrices is closed."""
+        closed = self._closed and other.closed
+        self.zip(other, max)
+        self._modified(closed)
+        return self
 
     def zip(self, other: 'CDBM', f) -> 'CDBM':
+        """Combine this matrix point-wise with another matrix of the same size, row by row."""
         if self.size != other.size:
             raise ValueError("Can not zip DBMs with unequal sizes!")
-        for key in self.keys():
-            self[key] = f(self[key], other[key])
+        self._m = [list(map(f, row, other_row)) for row, other_row in zip(self._m, other._m)]
+        self._count_finite()
+        self._modified()
         return self
 
     def replace(self, other):
@@ -169,6 +232,9 @@ class IntegerCDBM(CDBM):
         Algorithm from paper: An Improved Tight Closure Algorithm for Integer Octagonal Constraints - Roberto 
         Bagnara, Patricia M. Hill, Enea Zaffanella 
         """
+        if self._closed:
+            return True
+
         self._shortest_path_closure()
 
         # check for Q-consistency
@@ -195,4 +261,5 @@ class IntegerCDBM(CDBM):
                 jj = (j ^ 1, j)
                 self[ij] = min(self[ij], (self[ii] + self[jj]) // 2)
 
+        self._modified(closed=True)
         return True
@@ -5,10 +5,11 @@ from abstract_domains.lattice import BottomMixin
 from abstract_domains.numerical.numerical import NumericalMixin
 from abstract_domains.state import State
 from core.expressions import *
-from typing import List, Set
+from typing import Callable, List, Optional, Set, Tuple
 from math import inf
 
-from core.expressions_tools import ExpressionVisitor
+from core.expressions_tools import ExpressionVisitor, PostOrderExpressionVisitor, make_condition_not_free
+from core.utils import memoize
 
 
 class Interval:
@@ -148,7 +149,7 @@ class IntervalLattice(Interval, BottomMixin):
         return self
 
     def is_top(self) -> bool:
-        return self._lower == -inf and self._upper == inf
+        return self._lower == -inf and self._upper == inf and not self.is_bottom()
 
     def is_bottom(self) -> bool:
         # we have to check if interval is empty, or got empty by an operation on this interval
@@ -173,67 +174,262 @@ class IntervalLattice(Interval, BottomMixin):
 
     def _widening(self, other: 'IntervalLattice'):
         if other.lower < self.lower:
-            self.lower = inf
+            self.lower = -inf
         if other.upper > self.upper:
             self.upper = inf
         return self
 
+    @classmethod
+    def from_bounds(cls, bounds: Optional[Tuple]) -> 'IntervalLattice':
+        """Create an interval lattice element from a pair of bounds.
+
+        :param bounds: pair ``(lower, upper)`` of bounds, or ``None`` for the empty interval
+        :return: the corresponding interval lattice element
+        """
+        return cls().set_empty().bottom() if bounds is None else cls(*bounds)
+
     @classmethod
     def evaluate(cls, expr: Expression):
         """Evaluates an expression without variables, interpreting constants in the interval domain.
         
         If this method encounters any variables, it raises a ``ValueError``."""
-        return cls._visitor.visit(expr)
+        return cls.from_bounds(compile_evaluator(expr)(_no_variables))
 
     # noinspection PyPep8Naming
-    class Visitor(ExpressionVisitor):
-        """A visitor to abstractly evaluate an expression (without variables) in the interval domain."""
+    class Compiler(PostOrderExpressionVisitor):
+        """A visitor to compile an expression into a closure abstractly evaluating it in the interval domain.
 
-        def generic_visit(self, expr, *args, **kwargs):
+        The closure is called with a function returning the bounds of a variable. Bounds are plain ``(lower, upper)``
+        pairs, ``None`` represents the empty interval.
+        """
+
+        def generic_visit(self, expr, results, *args, **kwargs):
             raise ValueError(
                 f"{type(self)} does not support generic visit of expressions! "
                 f"Define handling for expression {type(expr)} explicitly!")
 
         # noinspection PyMethodMayBeStatic, PyUnusedLocal
-        def visit_Input(self, _: Input, *args, **kwargs):
-            return IntervalLattice().top()
+        def visit_Input(self, _: Input, results):
+            top = (-inf, inf)
+            return lambda bounds: top
 
-        def visit_BinaryArithmeticOperation(self, expr: BinaryArithmeticOperation, *args, **kwargs):
-            l = self.visit(expr.left, *args, **kwargs)
-            r = self.visit(expr.right, *args, **kwargs)
+        # noinspection PyMethodMayBeStatic, PyUnusedLocal
+        def visit_Literal(self, expr: Literal, results):
+            if expr.typ == int:
+                c = int(expr.val)
+                constant = (c, c)
+                return lambda bounds: constant
+            else:
+                raise ValueError(f"Literal type {expr.typ} is not supported!")
+
+        # noinspection PyMethodMayBeStatic, PyUnusedLocal
+        def visit_VariableIdentifier(self, expr: VariableIdentifier, results):
+            if expr.typ == int:
+                return lambda bounds: bounds(expr)
+            else:
+                raise ValueError(f"Variable type {expr.typ} is not supported!")
+
+        # noinspection PyMethodMayBeStatic
+        def visit_BinaryArithmeticOperation(self, expr: BinaryArithmeticOperation, results):
+            left, right = results
             if expr.operator == BinaryArithmeticOperation.Operator.Add:
-                return l.add(r)
+                def add(bounds):
+                    l, r = left(bounds), right(bounds)
+                    if l is None or r is None:
+                        return None
+                    return l[0] + r[0], l[1] + r[1]
+                return add
             elif expr.operator == BinaryArithmeticOperation.Operator.Sub:
-                return l.sub(r)
+                def sub(bounds):
+                    l, r = left(bounds), right(bounds)
+                    if l is None or r is None:
+                        return None
+                    return l[0] - r[1], l[1] - r[0]
+                return sub
             elif expr.operator == BinaryArithmeticOperation.Operator.Mult:
-                return l.mult(r)
+                def mult(bounds):
+                    l, r = left(bounds), right(bounds)
+                    if l is None or r is None:
+                        return None
+                    comb = [l[0] * r[0], l[0] * r[1], l[1] * r[0], l[1] * r[1]]
+                    return min(comb), max(comb)
+                return mult
             else:
                 raise ValueError(f"Binary operator '{str(expr.operator)}' is not supported!")
 
-        def visit_UnaryArithmeticOperation(self, expr: UnaryArithmeticOperation, *args, **kwargs):
-            r = self.visit(expr.expression, *args, **kwargs)
+        # noinspection PyMethodMayBeStatic
+        def visit_UnaryArithmeticOperation(self, expr: UnaryArithmeticOperation, results):
+            operand, = results
             if expr.operator == UnaryArithmeticOperation.Operator.Add:
-                return r
+                return operand
             elif expr.operator == UnaryArithmeticOperation.Operator.Sub:
-                return r.negate()
+                def negate(bounds):
+                    b = operand(bounds)
+                    return None if b is None else (-b[1], -b[0])
+                return negate
             else:
                 raise ValueError(f"Unary Operator {expr.operator} is not supported!")
 
-        # noinspection PyMethodMayBeStatic, PyUnusedLocal
-        def visit_Literal(self, expr: Literal, *args, **kwargs):
-            if expr.typ == int:
-                c = int(expr.val)
-                return IntervalLattice(c, c)
-            else:
-                raise ValueError(f"Literal type {expr.typ} is not supported!")
+    _compiler = Compiler()  # static class member shared between all instances
+
+
+@memoize(maxsize=4096, exceptions=(ValueError,))
+def compile_evaluator(expr: Expression) -> Callable[[Callable], Optional[Tuple]]:
+    """Memoized compilation of an expression into a closure abstractly evaluating it in the interval domain.
+
+    :param expr: expression to compile
+    :return: closure taking a function returning the bounds of a variable, and returning the bounds of the expression
+    """
+    return IntervalLattice._compiler.visit(expr)
+
+
+def _no_variables(var: VariableIdentifier):
+    raise ValueError(f"Variable {var} is not supported in the evaluation of constant expressions!")
+
+
+def _meet_bounds(bounds: Optional[Tuple], other: Optional[Tuple]) -> Optional[Tuple]:
+    """Intersection of two pairs of bounds, ``None`` represents the empty interval."""
+    if bounds is None or other is None:
+        return None
+    lower, upper = max(bounds[0], other[0]), min(bounds[1], other[1])
+    return None if lower > upper else (lower, upper)
 
-    _visitor = Visitor()  # static class member shared between all instances
+
+# noinspection PyPep8Naming
+class ConstraintPropagator(ExpressionVisitor):
+    """A visitor to refine the bounds of the variables of a state such that a condition holds.
+
+    The refinement is an HC4-style constraint propagation: for each comparison, a forward sweep evaluates the bounds
+    of both sides, which are then intersected with the bounds allowed by the comparison, and a backward sweep
+    propagates the intersected bounds down the expression trees to the variables. Conjunctions refine the state in
+    sequence, disjunctions join the refinements of a copy of the state for each of their operands. The propagation
+    is repeated until the bounds are stable, but at most a bounded number of times.
+
+    The state must provide ``bounds``, ``set_bounds``, and ``bottom``. If a condition cannot hold, the state becomes
+    bottom. Conditions or expressions that cannot be handled are ignored, which is sound but less precise.
+    """
+
+    def __init__(self, sweeps: int = 3):
+        """Create a constraint propagator.
+
+        :param sweeps: maximal number of propagations per condition
+        """
+        self._sweeps = sweeps
+
+    def refine(self, condition: Expression, state):
+        """Refine a state such that a condition holds.
+
+        :param condition: condition to assume
+        :param state: state to refine, modified in place
+        :return: the refined state
+        """
+        condition = make_condition_not_free(condition)
+        for _ in range(self._sweeps):
+            before = [state.bounds(var) for var in state.variables]
+            state = self.visit(condition, state)
+            if state.is_bottom() or before == [state.bounds(var) for var in state.variables]:
+                break
+        return state
+
+    def visit_BinaryBooleanOperation(self, expr: BinaryBooleanOperation, state):
+        if expr.operator == BinaryBooleanOperation.Operator.And:
+            return self.visit(expr.right, self.visit(expr.left, state))
+        elif expr.operator == BinaryBooleanOperation.Operator.Or:
+            left = self.visit(expr.left, deepcopy(state))
+            right = self.visit(expr.right, deepcopy(state))
+            return state.replace(left.join(right))
+        else:
+            return state
+
+    def visit_BinaryComparisonOperation(self, expr: BinaryComparisonOperation, state):
+        try:
+            left = compile_evaluator(expr.left)(state.bounds)
+            right = compile_evaluator(expr.right)(state.bounds)
+        except ValueError:
+            return state  # comparison of unsupported expressions
+        if left is None or right is None:
+            return state.bottom()
+
+        # forward sweep: bounds of both sides allowed by the comparison (on integers)
+        operator = expr.operator
+        if operator == BinaryComparisonOperation.Operator.Lt:
+            left, right = _meet_bounds(left, (-inf, right[1] - 1)), _meet_bounds(right, (left[0] + 1, inf))
+        elif operator == BinaryComparisonOperation.Operator.LtE:
+            left, right = _meet_bounds(left, (-inf, right[1])), _meet_bounds(right, (left[0], inf))
+        elif operator == BinaryComparisonOperation.Operator.Gt:
+            left, right = _meet_bounds(left, (right[0] + 1, inf)), _meet_bounds(right, (-inf, left[1] - 1))
+        elif operator == BinaryComparisonOperation.Operator.GtE:
+            left, right = _meet_bounds(left, (right[0], inf)), _meet_bounds(right, (-inf, left[1]))
+        elif operator == BinaryComparisonOperation.Operator.Eq:
+            left = right = _meet_bounds(left, right)
+        elif operator == BinaryComparisonOperation.Operator.NotEq:
+            if left[0] == left[1] == right[0] == right[1]:
+                left = right = None
+            elif right[0] == right[1]:
+                left = self._exclude(left, right[0])
+            elif left[0] == left[1]:
+                right = self._exclude(right, left[0])
+        else:
+            return state  # non-numerical comparison
+
+        # backward sweep: propagate the bounds of both sides to their variables
+        if self._propagate(expr.left, left, state) and self._propagate(expr.right, right, state):
+            return state
+        return state.bottom()
+
+    # noinspection PyMethodOverriding
+    def generic_visit(self, expr, state):
+        return state  # no refinement
+
+    @staticmethod
+    def _exclude(bounds: Tuple, value) -> Optional[Tuple]:
+        """Exclude an integer value from the boundaries of a pair of bounds."""
+        lower, upper = bounds
+        if lower == value:
+            lower += 1
+        if upper == value:
+            upper -= 1
+        return None if lower > upper else (lower, upper)
+
+    def _propagate(self, expr: Expression, bounds: Optional[Tuple], state) -> bool:
+        """Refine the variables of an expression such that its value lies within the given bounds.
+
+        :return: whether the expression can evaluate to a value within the bounds
+        """
+        bounds = _meet_bounds(compile_evaluator(expr)(state.bounds), bounds)
+        if bounds is None:
+            return False
+        if isinstance(expr, VariableIdentifier):
+            state.set_bounds(expr, *bounds)
+        elif isinstance(expr, BinaryArithmeticOperation):
+            left = compile_evaluator(expr.left)(state.bounds)
+            right = compile_evaluator(expr.right)(state.bounds)
+            if expr.operator == BinaryArithmeticOperation.Operator.Add:
+                return self._propagate(expr.left, (bounds[0] - right[1], bounds[1] - right[0]), state) \
+                       and self._propagate(expr.right, (bounds[0] - left[1], bounds[1] - left[0]), state)
+            elif expr.operator == BinaryArithmeticOperation.Operator.Sub:
+                return self._propagate(expr.left, (bounds[0] + right[0], bounds[1] + right[1]), state) \
+                       and self._propagate(expr.right, (left[0] - bounds[1], left[1] - bounds[0]), state)
+        elif isinstance(expr, UnaryArithmeticOperation):
+            if expr.operator == UnaryArithmeticOperation.Operator.Add:
+                return self._propagate(expr.expression, bounds, state)
+            elif expr.operator == UnaryArithmeticOperation.Operator.Sub:
+                return self._propagate(expr.expression, (-bounds[1], -bounds[0]), state)
+        return True
 
 
 class IntervalDomain(Store, NumericalMixin, State):
+    _propagator = ConstraintPropagator()  # static class member shared between all instances
+
     def __init__(self, variables: List[VariableIdentifier]):
         super().__init__(variables, {int: IntervalLattice})
 
+    def _widening(self, other: 'IntervalDomain'):
+        """The widening is performed point-wise for each variable."""
+        for var in self.store:
+            self.store[var].widening(other.store[var])
+        return self
+
     def forget(self, var: VariableIdentifier):
         self.store[var].top()
 
@@ -254,9 +450,13 @@ class IntervalDomain(Store, NumericalMixin, State):
     def set_ub(self, var: VariableIdentifier, constant):
         self.store[var].upper = constant
 
+    def bounds(self, var: VariableIdentifier) -> Optional[Tuple]:
+        """Bounds of a variable as a ``(lower, upper)`` pair, or ``None`` if its interval is empty."""
+        element = self.store[var]
+        return None if element.is_bottom() else (element.lower, element.upper)
+
     def evaluate(self, expr: Expression):
-        interval = IntervalDomain._visitor.visit(expr, self)
-        return interval
+        return IntervalLattice.from_bounds(compile_evaluator(expr)(self.bounds))
 
     def _access_variable(self, variable: VariableIdentifier) -> Set[Expression]:
         return {variable}
@@ -264,14 +464,13 @@ class IntervalDomain(Store, NumericalMixin, State):
     def _assign_variable(self, left: Expression, right: Expression) -> 'IntervalDomain':
         if isinstance(left, VariableIdentifier):
             if left.typ == int:
-                self.store[left] = IntervalDomain._visitor.visit(right, self)
+                self.store[left] = self.evaluate(right)
         else:
             raise NotImplementedError("Interval domain does only support assignments to variables so far.")
         return self
 
     def _assume(self, condition: Expression) -> 'IntervalDomain':
-        # TODO implement this
-        return self
+        return IntervalDomain._propagator.refine(condition, self)
 
     def _evaluate_literal(self, literal: Expression) -> Set[Expression]:
         return {literal}
@@ -293,17 +492,3 @@ class IntervalDomain(Store, NumericalMixin, State):
 
     def _substitute_variable(self, left: Expression, right: Expression):
         raise NotImplementedError("Interval domain does not yet support variable substitution.")
-
-    # noinspection PyPep8Naming
-    class Visitor(IntervalLattice.Visitor):
-        """A visitor to abstractly evaluate an expression (with variables) in the interval domain."""
-
-        # noinspection PyMethodMayBeStatic, PyUnusedLocal
-        def visit_VariableIdentifier(self, expr: VariableIdentifier, interval_store, *args, **kwargs):
-            if expr.typ == int:
-                # copy the lattice element, since evaluation should not modify elements
-                return deepcopy(interval_store.store[expr])
-            else:
-                raise ValueError(f"Variable type {expr.typ} is not supported!")
-
-    _visitor = Visitor()  # static class member shared between all instances
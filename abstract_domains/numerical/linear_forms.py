@@ -3,6 +3,7 @@ from core.expressions import *
 
 from core.expressions_tools import ExpressionVisitor
 from core.special_expressions import VariadicArithmeticOperation
+from core.utils import memoize
 
 Sign = UnaryArithmeticOperation.Operator
 PLUS = Sign.Add
@@ -184,3 +185,29 @@ class SingleVarLinearForm(LinearForm):
     @property
     def var(self):
         return self._var
+
+
+@memoize(maxsize=4096, exceptions=(InvalidFormError,))
+def linear_form(expr: Expression) -> LinearForm:
+    """Memoized linear form of an expression.
+
+    .. warning::
+        The returned linear form is shared between all callers and must not be modified.
+
+    :param expr: expression to construct the linear form of
+    :return: linear form of the expression
+    """
+    return LinearForm(expr)
+
+
+@memoize(maxsize=4096, exceptions=(InvalidFormError,))
+def single_var_linear_form(expr: Expression) -> SingleVarLinearForm:
+    """Memoized single variable linear form of an expression.
+
+    .. warning::
+        The returned linear form is shared between all callers and must not be modified.
+
+    :param expr: expression to construct the single variable linear form of
+    :return: single variable linear form of the expression
+    """
+    return SingleVarLinearForm(expr)
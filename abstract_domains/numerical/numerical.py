@@ -25,6 +25,13 @@ class NumericalMixin(metaclass=ABCMeta):
         :param var: the variable of interest
         :return: A tuple (lower, upper) of the bounds of ``var``"""
 
+    @abstractmethod
+    def bounds(self, var: VariableIdentifier):
+        """Return the bounds of a variable, or ``None`` if the variable has no value.
+
+        :param var: the variable of interest
+        :return: A tuple (lower, upper) of the bounds of ``var``, or ``None`` if its interval is empty"""
+
     @abstractmethod
     def evaluate(self, expr: Expression):
         """Evaluate the expression within this numerical domain."""
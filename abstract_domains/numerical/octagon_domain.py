@@ -4,14 +4,14 @@ from functools import reduce
 
 from abstract_domains.lattice import BottomMixin
 from abstract_domains.numerical.dbm import IntegerCDBM
-from abstract_domains.numerical.interval_domain import IntervalLattice, IntervalDomain
+from abstract_domains.numerical.interval_domain import IntervalLattice, IntervalDomain, compile_evaluator
 from abstract_domains.numerical.numerical import NumericalMixin
 from abstract_domains.state import State
 from core.expressions import *
-from typing import List, Set, Tuple, Union
-from math import inf, isinf
+from typing import List, Optional, Set, Tuple, Union
+from math import inf
 
-from abstract_domains.numerical.linear_forms import SingleVarLinearForm, LinearForm, InvalidFormError
+from abstract_domains.numerical.linear_forms import InvalidFormError, linear_form, single_var_linear_form
 
 from core.expressions_tools import ExpressionVisitor, ExpressionTransformer, \
     make_condition_not_free, simplify
@@ -26,6 +26,10 @@ def _index_shift(sign: Sign):
     return 1 if sign == MINUS else 0
 
 
+def _widen(bound, other_bound):
+    return bound if bound >= other_bound else inf
+
+
 # TODO more documentation
 class OctagonLattice(BottomMixin, NumericalMixin):
     """Octagon lattice.
@@ -165,10 +169,14 @@ class OctagonLattice(BottomMixin, NumericalMixin):
         Closes the underlying CDBM, if possible, otherwise sets this octagon to bottom.
         :return: True, if this octagon is consistent <=> this octagon is not bottom.
         """
-        consistent = self.dbm.close()
-        if not consistent:
+        closed = self.dbm.closure()
+        if closed is None:
             self.bottom()
-        return consistent
+            return False
+        if closed is not self.dbm:
+            self.dbm.forget_closure()  # the cached closure becomes the matrix of this octagon
+            self._dbm = closed
+        return True
 
     def top(self):
         for key in self.dbm.keys():
@@ -176,7 +184,7 @@ class OctagonLattice(BottomMixin, NumericalMixin):
         return self
 
     def is_top(self) -> bool:
-        return all([isinf(b) for k, b in self.dbm.items() if k[0] != k[1]])  # check all inf, ignore diagonal for check
+        return self.dbm.finite == 0  # check all inf, ignore diagonal for check
 
     def _less_equal(self, other: 'OctagonLattice') -> bool:
         if self.dbm.size != other.dbm.size:
@@ -193,14 +201,20 @@ class OctagonLattice(BottomMixin, NumericalMixin):
     def _join(self, other: 'OctagonLattice') -> 'OctagonLattice':
         if self.dbm.size != other.dbm.size:
             raise ValueError("Cannot join octagons with unequal sizes!")
-        # closure is required to get best abstraction of join
-        self.close()
-        other.close()
-        self.dbm.union(other.dbm)
+        # closure is required to get best abstraction of join, the other octagon is not modified but its closure is
+        # cached, such that it is closed at most once even if it is joined repeatedly
+        closed = other.dbm.closure()
+        if closed is None:
+            return self  # other octagon is inconsistent
+        if not self.close():
+            self._kind = other.kind
+            self._dbm = closed.copy()
+            return self
+        self.dbm.union(closed)
         return self
 
     def _widening(self, other: 'OctagonLattice'):
-        self.dbm.zip(other.dbm, lambda a, b: a if a >= b else inf)
+        self.dbm.zip(other.dbm, _widen)
         return self
 
     def forget(self, var: VariableIdentifier):
@@ -237,7 +251,8 @@ class OctagonLattice(BottomMixin, NumericalMixin):
         self[PLUS, var, MINUS, var] = -2 * constant  # encodes -2*var <= -2*constant <=> var >= constant
 
     def raise_lb(self, var: VariableIdentifier, constant):
-        self.set_lb(var, max(self.get_lb(var), constant))
+        if constant > self.get_lb(var):  # keep the stored bound, reading it back divides it into a float
+            self.set_lb(var, constant)
 
     def get_lb(self, var: VariableIdentifier):
         return -self[PLUS, var, MINUS, var] / 2
@@ -246,7 +261,8 @@ class OctagonLattice(BottomMixin, NumericalMixin):
         self[MINUS, var, PLUS, var] = 2 * constant  # encodes 2*var <= 2*constant <=> var <= constant
 
     def lower_ub(self, var: VariableIdentifier, constant):
-        self.set_ub(var, min(self.get_ub(var), constant))
+        if constant < self.get_ub(var):
+            self.set_ub(var, constant)
 
     def get_ub(self, var: VariableIdentifier):
         return self[MINUS, var, PLUS, var] / 2
@@ -283,8 +299,13 @@ class OctagonLattice(BottomMixin, NumericalMixin):
         for var in self.variables:
             self.set_interval(var, interval_domain.store[var])
 
+    def bounds(self, var: VariableIdentifier) -> Optional[Tuple]:
+        """Bounds of a variable as a ``(lower, upper)`` pair, or ``None`` if its interval is empty."""
+        lower, upper = self.get_lb(var), self.get_ub(var)
+        return None if lower > upper else (lower, upper)
+
     def evaluate(self, expr: Expression):
-        return self.to_interval_domain().evaluate(expr)
+        return IntervalLattice.from_bounds(compile_evaluator(expr)(self.bounds))
 
 
 # TODO more documentation
@@ -406,65 +427,83 @@ class OctagonDomain(OctagonLattice, State):
 
         def visit_BinaryBooleanOperation(self, expr: BinaryBooleanOperation, state):
             if expr.operator == BinaryBooleanOperation.Operator.And:
-                return self.visit(expr.left, deepcopy(state)).meet(self.visit(expr.right, deepcopy(state)))
+                # conjunction, the constraints of both sides are added to the same octagon
+                return self.visit(expr.right, self.visit(expr.left, state))
             elif expr.operator == BinaryBooleanOperation.Operator.Or:
                 return self.visit(expr.left, deepcopy(state)).join(self.visit(expr.right, deepcopy(state)))
             else:
                 raise ValueError()
 
-        # noinspection PyMethodMayBeStatic
         def visit_BinaryComparisonOperation(self, expr: BinaryComparisonOperation, state):
             # we want the following format: e <= 0
             # if not in that format, bring it to this and use a correcting +/-1 and join/meet of multiple inequalities
             condition_set = OctagonDomain.SmallerEqualConditionTransformer().visit(expr)
+            if condition_set.operator == OctagonDomain.SmallerEqualConditionTransformer.ConditionSet.Operator.JOIN:
+                # disjunction, each inequality is added to its own copy of the octagon
+                for cond in condition_set.conditions:
+                    condition_set.condition_to_octagon[cond] = self.add_constraint(cond, expr, deepcopy(state))
+                return condition_set.combine_conditions()
+            # conjunction, the inequalities are added to the octagon as a batch and closed only once afterwards
             for cond in condition_set.conditions:
-                state_copy = deepcopy(state)
-                left_side = cond.left
-                try:
-                    form = LinearForm(simplify(left_side))
-
-                    # simplify implementation by always having a valid interval part
-                    interval = form.interval or IntervalLattice(0, 0)
-
-                    if not form.var_summands:  # IMPROVEMENT: this check is not handled in paper mine-HOSC06
-                        # [a,b] <= 0
-                        if interval.lower > 0:
-                            state_copy.bottom()
-                    elif len(form.var_summands) == 1:
-                        # +/- x + [a, b] <= 0
-                        var, sign = list(form.var_summands.items())[0]
-
-                        if sign == PLUS:
-                            # +x + [a, b] <= 0
-                            state_copy.lower_ub(var, -interval.lower)
-                        elif sign == MINUS:
-                            # -x + [a, b] <= 0
-                            state_copy.raise_lb(var, interval.lower)
-                        else:
-                            raise ValueError("unknown sign")
-                    elif len(form.var_summands) == 2:
-                        # +/- x +/- y + [a, b] <= 0
-                        items = list(form.var_summands.items())
-                        var1, sign1 = items[0]
-                        var2, sign2 = items[1]
-
-                        state_copy.lower_octagonal_constraint(sign1, var1, sign2, var2, -interval.lower)
-                    else:
-                        raise InvalidFormError(
-                            "Condition with more than two variables cannot be represented as octagonal constraints")
+                state = self.add_constraint(cond, expr, state)
+            return state
 
-                except InvalidFormError:
-                    # Non-octagonal constraint
-                    interval_domain = state.to_interval_domain()
-                    interval_domain.assume({expr})
+        # noinspection PyMethodMayBeStatic
+        def add_constraint(self, cond: BinaryComparisonOperation, expr: BinaryComparisonOperation, state):
+            """Add a single inequality ``e <= 0`` to an octagon, without closing it.
+
+            :param cond: inequality to add
+            :param expr: original condition, used to refine the interval bounds if the inequality is not octagonal
+            :param state: octagon to be modified
+            :return: modified octagon
+            """
+            try:
+                form = linear_form(simplify(cond.left))
+
+                # simplify implementation by always having a valid interval part
+                interval = form.interval or IntervalLattice(0, 0)
+
+                if not form.var_summands:  # IMPROVEMENT: this check is not handled in paper mine-HOSC06
+                    # [a,b] <= 0
+                    if interval.lower > 0:
+                        state.bottom()
+                elif len(form.var_summands) == 1:
+                    # +/- x + [a, b] <= 0
+                    var, sign = list(form.var_summands.items())[0]
+
+                    if sign == PLUS:
+                        # +x + [a, b] <= 0
+                        state.lower_ub(var, -interval.lower)
+                    elif sign == MINUS:
+                        # -x + [a, b] <= 0
+                        state.raise_lb(var, interval.lower)
+                    else:
+                        raise ValueError("unknown sign")
+                elif len(form.var_summands) == 2:
+                    # +/- x +/- y + [a, b] <= 0
+                    items = list(form.var_summands.items())
+                    var1, sign1 = items[0]
+                    var2, sign2 = items[1]
+
+                    state.lower_octagonal_constraint(sign1, var1, sign2, var2, -interval.lower)
+                else:
+                    raise InvalidFormError(
+                        "Condition with more than two variables cannot be represented as octagonal constraints")
+
+            except InvalidFormError:
+                # Non-octagonal constraint, refine the bounds of its variables in the interval domain
+                if not state.close():
+                    return state
+                interval_domain = state.to_interval_domain()
+                interval_domain.assume({expr})
+                if interval_domain.is_bottom():
+                    state.bottom()
+                else:
                     new_oct = OctagonDomain(state.variables)
                     new_oct.from_interval_domain(interval_domain)
                     state.meet(new_oct)
 
-                # finally store modified octagon copy for later combination
-                condition_set.condition_to_octagon[cond] = state_copy
-
-            return condition_set.combine_conditions()
+            return state
 
         # noinspection PyMethodOverriding
         def generic_visit(self, expr, state):
@@ -487,6 +526,7 @@ class OctagonDomain(OctagonLattice, State):
 
         res = OctagonDomain.AssumeVisitor().visit(not_free_condition, self)
         self.replace(res)
+        self.close()
 
         return self
 
@@ -579,7 +619,7 @@ class OctagonDomain(OctagonLattice, State):
         if isinstance(left, VariableIdentifier):
             if left.typ == int:
                 try:
-                    form = SingleVarLinearForm(right)
+                    form = single_var_linear_form(right)
                     if not form.var and form.interval:
                         # x = [a,b]
                         self._assign_constant(left, form.interval)
@@ -615,8 +655,7 @@ class OctagonDomain(OctagonLattice, State):
                         raise ValueError("Invalid case: Implementation bug!")
                 except InvalidFormError:
                     # right is not in single variable linear form, use interval abstraction fallback
-                    interval_domain = self.to_interval_domain()
-                    interval = interval_domain.evaluate(right)
+                    interval = self.evaluate(right)
                     self._assign_constant(left, interval)
 
         return self
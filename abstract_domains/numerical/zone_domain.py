@@ -0,0 +1,449 @@
+"""
+Zone Domain
+===========
+
+Relational numerical domain of difference constraints ``x - y <= c`` and bounds ``a <= x <= b``.
+
+Zones are a cheaper alternative to octagons: a zone over ``n`` variables is represented by an ``(n+1) x (n+1)``
+difference bound matrix (DBM), rather than by a ``2n x 2n`` coherent DBM, and its closure is a plain shortest-path
+closure without tightening.
+
+.. note::
+    This module requires NumPy, the DBM is a NumPy float matrix and its closure is vectorised.
+"""
+
+from copy import deepcopy
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from abstract_domains.lattice import BottomMixin, KindMixin
+from abstract_domains.numerical.interval_domain import IntervalLattice, IntervalDomain, compile_evaluator
+from abstract_domains.numerical.linear_forms import InvalidFormError, linear_form, single_var_linear_form
+from abstract_domains.numerical.numerical import NumericalMixin
+from abstract_domains.numerical.octagon_domain import OctagonDomain, PLUS, MINUS
+from abstract_domains.state import State
+from core.expressions import BinaryBooleanOperation, BinaryComparisonOperation, Expression, \
+    UnaryBooleanOperation, VariableIdentifier
+from core.expressions_tools import ExpressionVisitor, make_condition_not_free, simplify
+
+
+def _number(bound):
+    """Convert a bound stored in a float matrix back into a Python number, an ``int`` if it is integral."""
+    bound = float(bound)
+    return int(bound) if bound.is_integer() else bound
+
+
+def _closure(m: np.ndarray) -> Optional[np.ndarray]:
+    """Shortest-path closure of a difference bound matrix, using the Floyd-Warshall algorithm.
+
+    Each iteration relaxes all entries through an intermediate index at once.
+
+    :param m: difference bound matrix, not modified
+    :return: closed difference bound matrix, or ``None`` if the constraints are unsatisfiable
+    """
+    m = m.copy()
+    np.fill_diagonal(m, 0)
+    for k in range(m.shape[0]):
+        np.minimum(m, m[:, k, np.newaxis] + m[np.newaxis, k, :], out=m)
+    if np.any(np.diagonal(m) < 0):
+        return None
+    return m
+
+
+class ZoneLattice(BottomMixin, NumericalMixin):
+    """Zone lattice.
+
+    One lattice element is represented by a difference bound matrix ``m`` internally. The index ``0`` represents the
+    constant zero, the index ``i + 1`` represents the ``i``-th variable. We show an example for 2 variables ``x`` and
+    ``y``.
+
+    ::
+
+             0    x    y
+        0    0    .    .
+        x    .    0    .
+        y    .    .    0
+
+    The actual constraint at matrix entry (``i``, ``j``) is: ``vj - vi <= c``. Thus, the row and column of the
+    constant zero hold the lower and upper bounds of the variables, respectively.
+    """
+
+    def __init__(self, variables: List[VariableIdentifier]):
+        """Create a Zone Lattice for the given variables.
+
+        :param variables: list of program variables
+        """
+        super().__init__()
+        self._variables = variables
+        self._index = {var: i + 1 for i, var in enumerate(variables)}  # index of each variable in the matrix
+        self._m = np.full((len(variables) + 1, len(variables) + 1), np.inf)
+        np.fill_diagonal(self._m, 0)
+        self._closed = True  # whether the matrix is in closed form, cleared by every write of the matrix
+
+    @property
+    def variables(self):
+        return self._variables
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Difference bound matrix of the current zone."""
+        return self._m
+
+    def __repr__(self):
+        if self.is_bottom():
+            return "⊥"
+        elif self.is_top():
+            return "⊤"
+        else:
+            res = []
+            # represent unary constraints first
+            for var, i in self._index.items():
+                lower, upper = -self._m[i, 0], self._m[0, i]
+                if lower > -np.inf and upper < np.inf:
+                    res.append(f"{_number(lower)}≤{var.name}≤{_number(upper)}")
+                elif lower > -np.inf:
+                    res.append(f"{_number(lower)}≤{var.name}")
+                elif upper < np.inf:
+                    res.append(f"{var.name}≤{_number(upper)}")
+            # represent binary constraints second
+            for var1, i in self._index.items():
+                for var2, j in self._index.items():
+                    if i != j and self._m[j, i] < np.inf:
+                        res.append(f"{var1.name}-{var2.name}≤{_number(self._m[j, i])}")
+            return ", ".join(res)
+
+    def __deepcopy__(self, memo):
+        # variables and their indices are never modified and can be shared
+        result = self.__class__.__new__(self.__class__)
+        memo[id(self)] = result
+        result.__dict__.update(self.__dict__)
+        result._m = self._m.copy()
+        if '_result' in self.__dict__:
+            result._result = deepcopy(self._result, memo)
+        return result
+
+    def replace(self, other: 'ZoneLattice') -> 'ZoneLattice':
+        super().replace(other)
+        self._m = other._m.copy()
+        self._closed = other._closed
+        return self
+
+    def close(self):
+        """Closes this zone.
+
+        Closes the underlying DBM, if possible, otherwise sets this zone to bottom.
+        The DBM is only closed again after it is modified.
+        :return: True, if this zone is consistent <=> this zone is not bottom.
+        """
+        if self._closed:
+            return True
+        closed = _closure(self._m)
+        if closed is None:
+            self.bottom()
+            return False
+        self._m = closed
+        self._closed = True
+        return True
+
+    def top(self):
+        self._kind = KindMixin.Kind.DEFAULT
+        self._m = np.full(self._m.shape, np.inf)
+        np.fill_diagonal(self._m, 0)
+        self._closed = True
+        return self
+
+    def is_top(self) -> bool:
+        return bool(np.all(np.isinf(self._m[~np.eye(self._m.shape[0], dtype=bool)])))
+
+    def _less_equal(self, other: 'ZoneLattice') -> bool:
+        # closure is required to compare the implicit constraints of this zone, it is computed on a copy such that
+        # a widened zone is never closed (widening does not guarantee termination on closed zones)
+        closed = self._m if self._closed else _closure(self._m)
+        if closed is None:
+            self.bottom()
+            return True
+        return bool(np.all(closed <= other._m))
+
+    def _meet(self, other: 'ZoneLattice'):
+        # closure is not required for meet
+        np.minimum(self._m, other._m, out=self._m)
+        self._closed = False
+        return self
+
+    def _join(self, other: 'ZoneLattice') -> 'ZoneLattice':
+        # closure is required to get best abstraction of join, the other zone is closed on a copy
+        closed = _closure(other._m)
+        if closed is None:
+            return self
+        if not self.close():
+            return self.replace(other)
+        np.maximum(self._m, closed, out=self._m)
+        return self
+
+    def _widening(self, other: 'ZoneLattice'):
+        self._m = np.where(other._m <= self._m, self._m, np.inf)
+        self._closed = False
+        return self
+
+    def forget(self, var: VariableIdentifier):
+        # close first to not lose implicit constraints about other variables
+        self.close()
+        i = self._index[var]
+        self._m[i, :] = np.inf
+        self._m[:, i] = np.inf
+        self._m[i, i] = 0
+        self._closed = False
+
+    def set_bounds(self, var: VariableIdentifier, lower: int, upper: int):
+        self.set_lb(var, lower)
+        self.set_ub(var, upper)
+
+    def get_bounds(self, var: VariableIdentifier):
+        return self.get_lb(var), self.get_ub(var)
+
+    def set_interval(self, var: VariableIdentifier, interval: IntervalLattice):
+        self.set_lb(var, interval.lower)
+        self.set_ub(var, interval.upper)
+
+    def get_interval(self, var: VariableIdentifier):
+        return IntervalLattice(self.get_lb(var), self.get_ub(var))
+
+    def set_lb(self, var: VariableIdentifier, constant):
+        self._m[self._index[var], 0] = -constant  # encodes 0 - var <= -constant <=> var >= constant
+        self._closed = False
+
+    def raise_lb(self, var: VariableIdentifier, constant):
+        self.set_lb(var, max(self.get_lb(var), constant))
+
+    def get_lb(self, var: VariableIdentifier):
+        return _number(-self._m[self._index[var], 0])
+
+    def set_ub(self, var: VariableIdentifier, constant):
+        self._m[0, self._index[var]] = constant  # encodes var - 0 <= constant
+        self._closed = False
+
+    def lower_ub(self, var: VariableIdentifier, constant):
+        self.set_ub(var, min(self.get_ub(var), constant))
+
+    def get_ub(self, var: VariableIdentifier):
+        return _number(self._m[0, self._index[var]])
+
+    def set_difference_constraint(self, var1: VariableIdentifier, var2: VariableIdentifier, constant):
+        """Set the constraint ``var1 - var2 <= constant``."""
+        self._m[self._index[var2], self._index[var1]] = constant
+        self._closed = False
+
+    def lower_difference_constraint(self, var1: VariableIdentifier, var2: VariableIdentifier, constant):
+        """Tighten the constraint ``var1 - var2 <= constant``."""
+        i, j = self._index[var2], self._index[var1]
+        self._m[i, j] = min(self._m[i, j], constant)
+        self._closed = False
+
+    def to_interval_domain(self):
+        """Translate this zone into an interval store."""
+        interval_store = IntervalDomain(self.variables)
+        for var in self.variables:
+            interval_store.set_interval(var, self.get_interval(var))
+        return interval_store
+
+    def from_interval_domain(self, interval_domain: IntervalDomain):
+        """Translate the interval constraints from interval domain to this zone.
+
+        **NOTE**: This does not reset relational constraints in this zone!
+        """
+        assert interval_domain.variables == self.variables
+
+        for var in self.variables:
+            self.set_interval(var, interval_domain.store[var])
+
+    def bounds(self, var: VariableIdentifier) -> Optional[Tuple]:
+        """Bounds of a variable as a ``(lower, upper)`` pair, or ``None`` if its interval is empty.
+
+        The zone is closed first, to take the implicit bounds of the variable into account.
+        """
+        if self.is_bottom() or not self.close():
+            return None
+        lower, upper = self.get_lb(var), self.get_ub(var)
+        return None if lower > upper else (lower, upper)
+
+    def evaluate(self, expr: Expression):
+        return IntervalLattice.from_bounds(compile_evaluator(expr)(self.bounds))
+
+
+class ZoneDomain(ZoneLattice, State):
+    """Zone domain. Extends the zone lattice with state interface.
+    """
+
+    # noinspection PyPep8Naming
+    class AssumeVisitor(ExpressionVisitor):
+        """Visits an expression and recursively 'assumes' the condition tree."""
+
+        # noinspection PyMethodMayBeStatic
+        def visit_UnaryBooleanOperation(self, expr: UnaryBooleanOperation, state):
+            raise ValueError("The expression should not contain any unary boolean operations like negation (Neg)!")
+
+        def visit_BinaryBooleanOperation(self, expr: BinaryBooleanOperation, state):
+            if expr.operator == BinaryBooleanOperation.Operator.And:
+                # conjunction, the constraints of both sides are added to the same zone
+                return self.visit(expr.right, self.visit(expr.left, state))
+            elif expr.operator == BinaryBooleanOperation.Operator.Or:
+                return self.visit(expr.left, deepcopy(state)).join(self.visit(expr.right, deepcopy(state)))
+            else:
+                raise ValueError()
+
+        def visit_BinaryComparisonOperation(self, expr: BinaryComparisonOperation, state):
+            # we want the following format: e <= 0, as for octagons
+            condition_set = OctagonDomain.SmallerEqualConditionTransformer().visit(expr)
+            if condition_set.operator == OctagonDomain.SmallerEqualConditionTransformer.ConditionSet.Operator.JOIN:
+                # disjunction, each inequality is added to its own copy of the zone
+                for cond in condition_set.conditions:
+                    condition_set.condition_to_octagon[cond] = self.add_constraint(cond, expr, deepcopy(state))
+                return condition_set.combine_conditions()
+            # conjunction, the inequalities are added to the zone as a batch
+            for cond in condition_set.conditions:
+                state = self.add_constraint(cond, expr, state)
+            return state
+
+        # noinspection PyMethodMayBeStatic
+        def add_constraint(self, cond: BinaryComparisonOperation, expr: BinaryComparisonOperation, state):
+            """Add a single inequality ``e <= 0`` to a zone, without closing it.
+
+            :param cond: inequality to add
+            :param expr: original condition, used to refine the interval bounds if the inequality is not a zone
+            :param state: zone to be modified
+            :return: modified zone
+            """
+            try:
+                form = linear_form(simplify(cond.left))
+
+                # simplify implementation by always having a valid interval part
+                interval = form.interval or IntervalLattice(0, 0)
+
+                if not form.var_summands:
+                    # [a,b] <= 0
+                    if interval.lower > 0:
+                        state.bottom()
+                elif len(form.var_summands) == 1:
+                    # +/- x + [a, b] <= 0
+                    var, sign = list(form.var_summands.items())[0]
+                    if sign == PLUS:
+                        # +x + [a, b] <= 0
+                        state.lower_ub(var, -interval.lower)
+                    else:
+                        # -x + [a, b] <= 0
+                        state.raise_lb(var, interval.lower)
+                elif len(form.var_summands) == 2 and set(form.var_summands.values()) == {PLUS, MINUS}:
+                    # +x - y + [a, b] <= 0
+                    var1, var2 = sorted(form.var_summands, key=lambda var: form.var_summands[var] != PLUS)
+                    state.lower_difference_constraint(var1, var2, -interval.lower)
+                else:
+                    raise InvalidFormError("Condition cannot be represented as difference constraint")
+
+            except InvalidFormError:
+                # Non-zone constraint, refine the bounds of its variables in the interval domain
+                if not state.close():
+                    return state
+                interval_domain = state.to_interval_domain()
+                interval_domain.assume({expr})
+                if interval_domain.is_bottom():
+                    state.bottom()
+                else:
+                    state.from_interval_domain(interval_domain)
+
+            return state
+
+        # noinspection PyMethodOverriding
+        def generic_visit(self, expr, state):
+            raise ValueError(
+                f"{type(self)} does not support generic visit of expressions! "
+                f"Define handling for expression {type(expr)} explicitly!")
+
+    _assume_visitor = AssumeVisitor()  # static class member shared between all instances
+
+    def __init__(self, variables: List[VariableIdentifier]):
+        """Create a Zone Domain for given variables.
+
+        :param variables: list of program variables
+        """
+        super().__init__(variables)
+
+    def _substitute_variable(self, left: Expression, right: Expression) -> 'ZoneDomain':
+        raise NotImplementedError("Zone domain does not yet support variable substitution.")
+
+    def _assume(self, condition: Expression) -> 'ZoneDomain':
+        not_free_condition = make_condition_not_free(condition)
+
+        res = ZoneDomain._assume_visitor.visit(not_free_condition, self)
+        self.replace(res)
+
+        return self
+
+    def exit_if(self) -> 'ZoneDomain':
+        return self
+
+    def exit_loop(self) -> 'ZoneDomain':
+        return self
+
+    def _output(self, output: Expression) -> 'ZoneDomain':
+        return self
+
+    def _evaluate_literal(self, literal: Expression) -> Set[Expression]:
+        return {literal}
+
+    def enter_if(self) -> 'ZoneDomain':
+        return self
+
+    def enter_loop(self) -> 'ZoneDomain':
+        return self
+
+    def _access_variable(self, variable: VariableIdentifier) -> Set[Expression]:
+        return {variable}
+
+    def _assign_constant(self, x: VariableIdentifier, interval: IntervalLattice):
+        """x = [a,b]"""
+        if interval.is_bottom():
+            self.bottom()
+        else:
+            self.forget(x)
+            self.set_interval(x, interval)
+
+    def _assign_same_var_plus_constant(self, x: VariableIdentifier, interval: IntervalLattice):
+        """x = x + [a,b]"""
+        i = self._index[x]
+        self._m[i, :] -= interval.lower  # y - x' = y - x - [a,b] <= c - a
+        self._m[:, i] += interval.upper  # x' - y = x - y + [a,b] <= c + b
+        self._m[i, i] = 0
+        self._closed = False
+
+    def _assign_other_var_plus_constant(self, x: VariableIdentifier, y: VariableIdentifier, interval: IntervalLattice):
+        """x = y + [a,b]"""
+        self.forget(x)
+        self.set_difference_constraint(x, y, interval.upper)
+        self.set_difference_constraint(y, x, -interval.lower)
+
+    def _assign_variable(self, left: Expression, right: Expression) -> 'ZoneDomain':
+        # Zone Assignments
+        if isinstance(left, VariableIdentifier):
+            if left.typ == int:
+                try:
+                    form = single_var_linear_form(right)
+                    interval = form.interval or IntervalLattice(0, 0)
+                    if not form.var:
+                        # x = [a,b]
+                        self._assign_constant(left, interval)
+                    elif form.var_sign == PLUS:
+                        if form.var == left:
+                            # x = x + [a,b]
+                            self._assign_same_var_plus_constant(left, interval)
+                        else:
+                            # x = y + [a,b]
+                            self._assign_other_var_plus_constant(left, form.var, interval)
+                    else:
+                        # x = - x/y + [a,b] is not a difference constraint
+                        raise InvalidFormError("Negated variables cannot be represented in zones")
+                except InvalidFormError:
+                    # right is not in single variable linear form, use interval abstraction fallback
+                    self._assign_constant(left, self.evaluate(right))
+
+        return self
@@ -0,0 +1,207 @@
+"""
+Reduced Product
+===============
+
+Product of abstract domains, running several domains side by side.
+
+The information of the numerical components is exchanged by a reduction, which is applied lazily: statements mark
+the components they modify as dirty, and the bounds of the variables are only exchanged when a query or a comparison
+needs them, and only read from the components that changed since the last reduction.
+"""
+
+from copy import deepcopy
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
+
+from abstract_domains.lattice import Lattice
+from abstract_domains.numerical.interval_domain import IntervalLattice, compile_evaluator
+from abstract_domains.numerical.numerical import NumericalMixin
+from abstract_domains.state import State
+from core.expressions import Expression, VariableIdentifier
+from core.utils import copy_docstring
+
+
+class ReducedProduct(State):
+    """Mutable element of a product of abstract domains, with a lazy reduction of its numerical components.
+
+    Lattice operations and statements are performed component-wise. The reduction exchanges the bounds of the
+    variables between the components implementing :class:`NumericalMixin`.
+
+    .. warning::
+        Lattice operations and statements modify the current state.
+
+    .. document private methods
+    .. automethod:: ReducedProduct._less_equal
+    .. automethod:: ReducedProduct._meet
+    .. automethod:: ReducedProduct._join
+    """
+
+    def __init__(self, domains: List[Type[State]], arguments: Dict[str, Any]):
+        """Create a product of elements of abstract domains.
+
+        :param domains: types of the abstract domains
+        :param arguments: arguments of the abstract domains, the same for each domain
+        """
+        super().__init__()
+        self._components = [domain(**arguments) for domain in domains]
+        self._numerical = [i for i, component in enumerate(self._components) if isinstance(component, NumericalMixin)]
+        self._dirty = frozenset(self._numerical)  # components modified since the last reduction
+
+    @property
+    def components(self):
+        """Current elements of the abstract domains."""
+        return self._components
+
+    @property
+    def variables(self):
+        """Variables of the first numerical component."""
+        return self._components[self._numerical[0]].variables if self._numerical else []
+
+    @property
+    def dirty(self):
+        """Indices of the components modified since the last reduction."""
+        return self._dirty
+
+    def __repr__(self):
+        self.reduce()
+        return " ∧ ".join(map(repr, self.components))
+
+    def _modified(self) -> 'ReducedProduct':
+        self._dirty = frozenset(self._numerical)
+        return self
+
+    def reduce(self) -> 'ReducedProduct':
+        """Exchange the bounds of the variables between the numerical components.
+
+        The bounds of each variable are the intersection of its bounds in the dirty components and in one clean
+        component, since clean components already agree on the result of the previous reduction. Components with
+        looser bounds are then tightened.
+
+        :return: current state modified by the reduction
+        """
+        if not self._dirty:
+            return self
+        if len(self._numerical) > 1 and not self.is_bottom():
+            clean = [i for i in self._numerical if i not in self._dirty]
+            sources = [self._components[i] for i in sorted(self._dirty) + clean[:1]]
+            for var in self.variables:
+                lower, upper = -float('inf'), float('inf')
+                for component in sources:
+                    bounds = component.bounds(var)
+                    if bounds is None:
+                        self._dirty = frozenset()
+                        return self.bottom()
+                    lower, upper = max(lower, bounds[0]), min(upper, bounds[1])
+                if lower > upper:
+                    self._dirty = frozenset()
+                    return self.bottom()
+                for i in self._numerical:
+                    if self._components[i].bounds(var) != (lower, upper):
+                        self._components[i].set_bounds(var, lower, upper)
+        self._dirty = frozenset()
+        return self
+
+    def bounds(self, var: VariableIdentifier) -> Optional[Tuple]:
+        """Bounds of a variable as a ``(lower, upper)`` pair in the reduced product, or ``None`` if it has no value."""
+        self.reduce()
+        if self.is_bottom():
+            return None
+        return self._components[self._numerical[0]].bounds(var)
+
+    def evaluate(self, expr: Expression):
+        """Evaluate an expression in the interval domain, using the bounds of the reduced product."""
+        return IntervalLattice.from_bounds(compile_evaluator(expr)(self.bounds))
+
+    @copy_docstring(Lattice.bottom)
+    def bottom(self) -> 'ReducedProduct':
+        for component in self.components:
+            component.bottom()
+        self._dirty = frozenset()
+        return self
+
+    @copy_docstring(Lattice.top)
+    def top(self) -> 'ReducedProduct':
+        for component in self.components:
+            component.top()
+        self._dirty = frozenset()
+        return self
+
+    @copy_docstring(Lattice.is_bottom)
+    def is_bottom(self) -> bool:
+        """The current state is bottom if `any` of its components is bottom."""
+        return any(component.is_bottom() for component in self.components)
+
+    @copy_docstring(Lattice.is_top)
+    def is_top(self) -> bool:
+        """The current state is top if `all` of its components are top."""
+        return all(component.is_top() for component in self.components)
+
+    @copy_docstring(Lattice._less_equal)
+    def _less_equal(self, other: 'ReducedProduct') -> bool:
+        """The comparison is performed component-wise, on reduced copies of both states.
+
+        Neither state is reduced in place: in a fixpoint iteration, they are the widened iterate and the previous
+        one, which are widened again and must not be tightened to ensure termination.
+        """
+        left = deepcopy(self).reduce() if self.dirty else self
+        right = deepcopy(other).reduce() if other.dirty else other
+        return all(component.less_equal(other_component)
+                   for component, other_component in zip(left.components, right.components))
+
+    @copy_docstring(Lattice._meet)
+    def _meet(self, other: 'ReducedProduct'):
+        """The meet is performed component-wise."""
+        for component, other_component in zip(self.components, other.components):
+            component.meet(other_component)
+        return self._modified()
+
+    @copy_docstring(Lattice._join)
+    def _join(self, other: 'ReducedProduct') -> 'ReducedProduct':
+        """The join is performed component-wise."""
+        for component, other_component in zip(self.components, other.components):
+            component.join(other_component)
+        return self._modified()
+
+    @copy_docstring(Lattice._widening)
+    def _widening(self, other: 'ReducedProduct'):
+        """The widening is performed component-wise, without reduction to ensure termination."""
+        for component, other_component in zip(self.components, other.components):
+            component.widening(other_component)
+        return self._modified()
+
+    def _access_variable(self, variable: VariableIdentifier) -> Set[Expression]:
+        return self.components[0]._access_variable(variable)
+
+    def _assign_variable(self, left: Expression, right: Expression) -> 'ReducedProduct':
+        self._components = [component._assign_variable(left, right) for component in self.components]
+        return self._modified()
+
+    def _assume(self, condition: Expression) -> 'ReducedProduct':
+        self._components = [component._assume(condition) for component in self.components]
+        return self._modified()
+
+    def _evaluate_literal(self, literal: Expression) -> Set[Expression]:
+        return self.components[0]._evaluate_literal(literal)
+
+    def enter_loop(self):
+        self._components = [component.enter_loop() for component in self.components]
+        return self
+
+    def exit_loop(self):
+        self._components = [component.exit_loop() for component in self.components]
+        return self
+
+    def enter_if(self):
+        self._components = [component.enter_if() for component in self.components]
+        return self
+
+    def exit_if(self):
+        self._components = [component.exit_if() for component in self.components]
+        return self
+
+    def _output(self, output: Expression) -> 'ReducedProduct':
+        self._components = [component._output(output) for component in self.components]
+        return self
+
+    def _substitute_variable(self, left: Expression, right: Expression) -> 'ReducedProduct':
+        self._components = [component._substitute_variable(left, right) for component in self.components]
+        return self._modified()
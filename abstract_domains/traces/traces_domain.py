@@ -1,4 +1,8 @@
-from typing import List, Set, Tuple, FrozenSet
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from math import ceil
+from typing import List, Set, Tuple, FrozenSet, Dict
 from itertools import chain, combinations, product
 from copy import deepcopy
 
@@ -7,8 +11,107 @@ from abstract_domains.state import State
 from core.expressions import Expression, VariableIdentifier, UnaryBooleanOperation, Literal, BinaryBooleanOperation, \
     Input
 
+_executors = dict()  # process pools shared between all states, indexed by number of worker processes
 
-class BoolTracesState(BoundedLattice, State):
+
+def _executor(processes: int) -> ProcessPoolExecutor:
+    """Process pool with the given number of worker processes (created on first use).
+
+    :param processes: number of worker processes
+    :return: process pool shared between all states
+    """
+    if processes not in _executors:
+        _executors[processes] = ProcessPoolExecutor(max_workers=processes)
+    return _executors[processes]
+
+
+@atexit.register
+def _shutdown_executors():
+    """Shut down the process pools, waiting for their worker processes to exit."""
+    for executor in _executors.values():
+        executor.shutdown()
+    _executors.clear()
+
+
+def _encode(traces) -> Tuple[Tuple[str, ...], ...]:
+    """Compact picklable encoding of a set of traces: each trace becomes a tuple of strings, one per trace state.
+
+    :param traces: set of traces to encode
+    :return: encoded set of traces
+    """
+    return tuple(tuple("".join(state) for state in trace.trace) for trace in traces)
+
+
+def _transfer_shard(state_type, variables: List[VariableIdentifier], transfer: str, args: Tuple,
+                    shard: List[Tuple[int, Tuple]]) -> List[Tuple[int, Tuple]]:
+    """Apply a transfer function to a shard of encoded sets of traces. Executed in a worker process.
+
+    :param state_type: type of the state the sets of traces belong to
+    :param variables: list of program variables
+    :param transfer: name of the transfer function applied to each set of traces
+    :param args: further arguments of the transfer function
+    :param shard: list of pairs of keys and encoded sets of traces
+    :return: list of pairs of keys and encoded transformed sets of traces
+    """
+    state = state_type.__new__(state_type)  # avoid building the powerset of traces of a full state
+    state._variables = variables
+    state._in = set()
+    result = list()
+    for key, encoded in shard:
+        traces = frozenset(state.decode(trace) for trace in encoded)
+        result.append((key, _encode(getattr(state, transfer)(traces, *args))))
+    return result
+
+
+class ShardedSetsMixin:
+    """Mixin that applies a transfer function to each set of traces of a hyper state, optionally in parallel.
+
+    The sets of traces are sharded across a pool of worker processes. Shards are sized such that each worker
+    receives a few of them, but never fewer than ``MIN_SHARD`` sets of traces, below which the transfer function is
+    applied serially since the encoding and pickling overhead would dominate.
+    """
+
+    MIN_SHARD = 64
+
+    @property
+    def processes(self):
+        """Number of worker processes for transfer functions, or ``None`` to apply them serially."""
+        return self._processes
+
+    def decode(self, encoded: Tuple[str, ...]):
+        """Decode a trace encoded by ``_encode``.
+
+        :param encoded: encoded trace
+        :return: decoded trace
+        """
+        trace = self._trace_type(tuple(encoded[0]))
+        trace.trace = [tuple(state) for state in encoded]
+        return trace
+
+    def _map_sets(self, transfer: str, *args):
+        """Apply a transfer function to each set of traces of the current state.
+
+        :param transfer: name of the transfer function, mapping a set of traces (and arguments) to a set of traces
+        :param args: further arguments of the transfer function
+        :return: current state modified by the transfer function
+        """
+        sets: Dict[int, FrozenSet] = self.sets
+        if not self.processes or len(sets) <= self.MIN_SHARD:
+            aux = getattr(self, transfer)
+            for key in sets:
+                sets[key] = aux(sets[key], *args)
+            return self
+        size = max(self.MIN_SHARD, ceil(len(sets) / (4 * self.processes)))
+        items = [(key, _encode(traces)) for key, traces in sets.items()]
+        shards = [items[i:i + size] for i in range(0, len(items), size)]
+        worker = partial(_transfer_shard, type(self), self.variables, transfer, args)
+        for result in _executor(self.processes).map(worker, shards):
+            for key, encoded in result:
+                sets[key] = frozenset(self.decode(trace) for trace in encoded)
+        return self
+
+
+class BoolTracesState(ShardedSetsMixin, BoundedLattice, State):
     class BoolTrace:
         def __init__(self, values: Tuple):
             self._trace = [values]
@@ -84,12 +187,17 @@ class BoolTracesState(BoundedLattice, State):
                 value.append(self.trace[0][idx])
             return value
 
-    def __init__(self, variables: List[VariableIdentifier], hyper: bool = False):
+    _trace_type = BoolTrace
+
+    def __init__(self, variables: List[VariableIdentifier], hyper: bool = False, processes: int = None):
         """Live/Dead variable analysis state representation.
 
         :param variables: list of program variables
+        :param hyper: whether to track sets of sets of traces
+        :param processes: number of worker processes for hyper transfer functions, or ``None`` to apply them serially
         """
         super().__init__()
+        self._processes = processes
         self._variables = variables     # e.g., ['x', 'y']
         self._traces = frozenset(BoolTracesState.BoolTrace(t) for t in product(*[('T', 'F') for _ in variables]))
         # e.g., {[('T', 'T')], [('T', 'F')], [('F', 'T')], [('F', 'F')]}
@@ -229,8 +337,7 @@ class BoolTracesState(BoundedLattice, State):
 
     def _assume(self, condition: Expression) -> 'BoolTracesState':
         if self.hyper:
-            for key in self.sets:
-                self.sets[key] = self._assume_aux(self.sets[key], condition)
+            self._map_sets('_assume_aux', condition)
         else:
             self.traces = self._assume_aux(self.traces, condition)
         return self
@@ -250,14 +357,15 @@ class BoolTracesState(BoundedLattice, State):
     def exit_if(self):
         return self  # nothing to be done
 
+    def _output_aux(self, traces: FrozenSet[BoolTrace], output: Expression) -> FrozenSet[BoolTrace]:
+        unique = True
+        for identifier in output.ids():  # for each output...
+            unique = unique and self._variety(traces, identifier) == 1
+        return traces if unique else frozenset()
+
     def _output(self, output: Expression) -> 'BoolTracesState':
         if self.hyper:  # nothing to be done otherwise
-            for key in self.sets:  # for all sets of traces...
-                unique = True
-                for identifier in output.ids():  # for each output...
-                    unique = unique and self._variety(self.sets[key], identifier) == 1
-                if not unique:
-                    self.sets[key] = frozenset()
+            self._map_sets('_output_aux', output)  # for all sets of traces...
         return self
 
     def _substitute_variable_aux(self, traces: FrozenSet[BoolTrace], left, right) -> FrozenSet[BoolTrace]:
@@ -286,8 +394,9 @@ class BoolTracesState(BoundedLattice, State):
 
     def _substitute_variable(self, left: Expression, right: Expression) -> 'BoolTracesState':
         if self.hyper:
-            for key in self.sets:
-                self.sets[key] = self._substitute_variable_aux(self.sets[key], left, right)
+            if isinstance(left, VariableIdentifier) and isinstance(right, Input):
+                self._in.add(left)  # worker processes cannot record inputs in the current state
+            self._map_sets('_substitute_variable_aux', left, right)
         else:
             self.traces = self._substitute_variable_aux(self.traces, left, right)
         return self
@@ -299,7 +408,7 @@ class BoolTracesState(BoundedLattice, State):
         return len(values)
 
 
-class TvlTracesState(BoundedLattice, State):
+class TvlTracesState(ShardedSetsMixin, BoundedLattice, State):
     class TvlTrace:
         def __init__(self, values: Tuple):
             self._trace = [values]
@@ -383,12 +492,17 @@ class TvlTracesState(BoundedLattice, State):
                 value.append(self.trace[0][idx])
             return value
 
-    def __init__(self, variables: List[VariableIdentifier], hyper: bool = False):
+    _trace_type = TvlTrace
+
+    def __init__(self, variables: List[VariableIdentifier], hyper: bool = False, processes: int = None):
         """Live/Dead variable analysis state representation.
 
         :param variables: list of program variables
+        :param hyper: whether to track sets of sets of traces
+        :param processes: number of worker processes for hyper transfer functions, or ``None`` to apply them serially
         """
         super().__init__()
+        self._processes = processes
         self._variables = variables     # e.g., ['x', 'y']
         self._traces = frozenset(TvlTracesState.TvlTrace(t) for t in product(*[('T', '?', 'F') for _ in variables]))
         self._hyper = hyper
@@ -531,8 +645,7 @@ class TvlTracesState(BoundedLattice, State):
 
     def _assume(self, condition: Expression) -> 'TvlTracesState':
         if self.hyper:
-            for key in self.sets:
-                self.sets[key] = self._assume_aux(self.sets[key], condition)
+            self._map_sets('_assume_aux', condition)
         else:
             self.traces = self._assume_aux(self.traces, condition)
         return self
@@ -552,14 +665,15 @@ class TvlTracesState(BoundedLattice, State):
     def exit_if(self):
         return self  # nothing to be done
 
+    def _output_aux(self, traces: FrozenSet[TvlTrace], output: Expression) -> FrozenSet[TvlTrace]:
+        unique = True
+        for identifier in output.ids():  # for each output...
+            unique = unique and self._variety(traces, identifier) == 1
+        return traces if unique else frozenset()
+
     def _output(self, output: Expression) -> 'TvlTracesState':
         if self.hyper:  # nothing to be done otherwise
-            for key in self.sets:  # for all sets of traces...
-                unique = True
-                for identifier in output.ids():  # for each output...
-                    unique = unique and self._variety(self.sets[key], identifier) == 1
-                if not unique:
-                    self.sets[key] = frozenset()
+            self._map_sets('_output_aux', output)  # for all sets of traces...
         return self
 
     def _substitute_variable_aux(self, traces: FrozenSet[TvlTrace], left, right) -> FrozenSet[TvlTrace]:
@@ -591,8 +705,9 @@ class TvlTracesState(BoundedLattice, State):
 
     def _substitute_variable(self, left: Expression, right: Expression) -> 'TvlTracesState':
         if self.hyper:
-            for key in self.sets:
-                self.sets[key] = self._substitute_variable_aux(self.sets[key], left, right)
+            if isinstance(left, VariableIdentifier) and isinstance(right, Input):
+                self._in.add(left)  # worker processes cannot record inputs in the current state
+            self._map_sets('_substitute_variable_aux', left, right)
         else:
             self.traces = self._substitute_variable_aux(self.traces, left, right)
         return self
@@ -1,8 +1,9 @@
 from copy import deepcopy
+from functools import lru_cache
 from numbers import Number
-from typing import List, Set, Sequence
+from typing import List, Set, Sequence, Tuple
 from abstract_domains.state import State
-from abstract_domains.usage.used import UsedLattice, Used
+from abstract_domains.usage.used import UsedLattice, Used, U, S, O
 from abstract_domains.store import Store
 from abstract_domains.usage.used_liststart import UsedListStartLattice
 from core.expressions import Expression, VariableIdentifier, ListDisplay, Literal, Index
@@ -11,63 +12,253 @@ from math import inf
 from core.expressions_tools import walk
 
 
+@lru_cache(maxsize=4096)
+def _combine_liststarts(suo1: Tuple, suo2: Tuple) -> Tuple:
+    """Combine two packed list start lattice elements, given as ``(s, u, o)`` triples.
+
+    The list starts seen during an analysis are few, thus their combinations are cached.
+    """
+    combined = UsedListStartLattice(*suo1).combine(UsedListStartLattice(*suo2))
+    return combined.suo[S], combined.suo[U], combined.suo[O]
+
+
 class UsedStore(Store, State):
+    """Packed store mapping each program variable to its usage.
+
+    Scalar variables map to elements of the :class:`UsedLattice`. Their two-bit ``Used`` codes are packed into two
+    integer bit-planes, ``hi`` and ``lo``, holding one bit per variable each.
+    List variables map to elements of the :class:`UsedListStartLattice`. Their S-, U- and O-prefix ends are packed
+    into three parallel lists, holding one entry per variable each.
+
+    The parallel lists are never modified in place, such that they are shared between copies of the store, e.g.,
+    between the frames of a :class:`UsedStack`. Changes to list variables are recorded in a small owned mapping
+    from list indices to ``(s, u, o)`` triples overriding the shared lists, and ``descend()`` only marks the shared
+    lists as descended. Thus, pushing a frame costs time proportional to the number of changed list variables only,
+    and so does popping it: outside of the changes, the popped frame is the descent of the frame below, and
+    combining an element with its descent leaves it unchanged.
+
+    Lattice operations as well as ``descend()`` and ``combine()`` are bulk operations over all variables at once.
+
+    .. warning::
+        The lattice elements returned by ``store`` are an unpacked copy, modifying them does not affect the store.
+    """
+
     def __init__(self, variables: List[VariableIdentifier]):
         super().__init__(variables, {int: UsedLattice, list: UsedListStartLattice})
+        self._scalars = dict()  # bit of each scalar variable in the bit-planes
+        self._lists = dict()  # index of each list variable in the parallel lists
+        self._hi, self._lo = 0, 0
+        self._s, self._u, self._o = [], [], []  # shared, never modified in place
+        self._descended = False  # whether the shared lists are to be read descended
+        self._changes = dict()  # owned (s, u, o) triples overriding the shared lists, by list index
+        for var, element in self._store.items():
+            if isinstance(element, UsedLattice):
+                self._scalars[var] = 1 << len(self._scalars)
+                self._set_used(var, element.used)
+            else:
+                self._lists[var] = len(self._lists)
+                self._s.append(element.suo[S])
+                self._u.append(element.suo[U])
+                self._o.append(element.suo[O])
+        self._mask = (1 << len(self._scalars)) - 1
+        self._bottom = False
+        del self._store
+
+    @property
+    def store(self):
+        """Unpacked copy of the current mapping from variables to their corresponding lattice element."""
+        store = dict()
+        for var in self.variables:
+            if var in self._scalars:
+                store[var] = UsedLattice(self._used(var))
+            else:
+                store[var] = self._liststart(var)
+        return store
+
+    def __repr__(self):
+        return ", ".join("{} -> {}".format(variable, value) for variable, value in self.store.items())
+
+    def __deepcopy__(self, memo):
+        # variables, their packing layout and the parallel lists are never modified and can be shared
+        if len(self._changes) > len(self._lists) // 2:
+            self._materialize()  # share the changes as well, instead of copying most of the lists
+        result = self.__class__.__new__(self.__class__)
+        memo[id(self)] = result
+        result.__dict__.update(self.__dict__)
+        result._changes = dict(self._changes)
+        result._result = deepcopy(self._result, memo)
+        return result
+
+    def replace(self, other: 'UsedStore') -> 'UsedStore':
+        super().replace(other)
+        self._changes = dict(other._changes)
+        return self
+
+    def _suo(self, i: int) -> Tuple:
+        """The ``(s, u, o)`` triple of the list variable with index ``i``."""
+        if i in self._changes:
+            return self._changes[i]
+        if self._descended:
+            return max(self._s[i], self._u[i]), 0, 0
+        return self._s[i], self._u[i], self._o[i]
+
+    def _materialize(self):
+        """Apply the descent and the changes to new parallel lists, owned until the store is copied."""
+        if self._descended or self._changes:
+            suos = [self._suo(i) for i in range(len(self._lists))]
+            self._s, self._u, self._o = [s for s, _, _ in suos], [u for _, u, _ in suos], [o for _, _, o in suos]
+            self._descended = False
+            self._changes = dict()
+
+    def _used(self, var: VariableIdentifier) -> Used:
+        bit = self._scalars[var]
+        return Used((2 if self._hi & bit else 0) | (1 if self._lo & bit else 0))
+
+    def _set_used(self, var: VariableIdentifier, used: Used):
+        bit = self._scalars[var]
+        self._hi = self._hi | bit if used.value & 2 else self._hi & ~bit
+        self._lo = self._lo | bit if used.value & 1 else self._lo & ~bit
+
+    def _use_variable(self, var: VariableIdentifier):
+        if var in self._scalars:
+            self._set_used(var, U)
+
+    def _liststart(self, var: VariableIdentifier) -> UsedListStartLattice:
+        return UsedListStartLattice(*self._suo(self._lists[var]))
+
+    def _set_liststart(self, var: VariableIdentifier, liststart: UsedListStartLattice):
+        self._changes[self._lists[var]] = liststart.suo[S], liststart.suo[U], liststart.suo[O]
+
+    def bottom(self) -> 'UsedStore':
+        self._bottom = True
+        return self
+
+    def top(self) -> 'UsedStore':
+        self._hi, self._lo = self._mask, self._mask
+        n = len(self._lists)
+        self._s, self._u, self._o = [0] * n, [0] * n, [0] * n
+        self._descended = False
+        self._changes = dict()
+        return self
+
+    def is_bottom(self) -> bool:
+        return self._bottom
+
+    def is_top(self) -> bool:
+        self._materialize()
+        return self._hi == self._mask and self._lo == self._mask \
+               and all(upper == inf for upper in self._s + self._u + self._o)
+
+    def _less_equal(self, other: 'UsedStore') -> bool:
+        """The comparison is performed bit-wise on the packed scalar variables, and point-wise on the list variables.
+
+        ``N`` (``00``) is below ``S`` (``10``) and ``O`` (``01``), which are both below ``U`` (``11``), thus an element
+        is less than or equal to another iff all its set bits are also set in the other.
+        """
+        self._materialize()
+        other._materialize()
+        return ((self._hi & ~other._hi) | (self._lo & ~other._lo)) == 0 \
+            and all(a <= b for a, b in zip(self._s, other._s)) \
+            and all(a <= b for a, b in zip(self._u, other._u)) \
+            and all(a <= b for a, b in zip(self._o, other._o))
+
+    def _meet(self, other: 'UsedStore'):
+        self._materialize()
+        other._materialize()
+        self._hi &= other._hi
+        self._lo &= other._lo
+        self._s = list(map(min, self._s, other._s))
+        self._u = list(map(min, self._u, other._u))
+        self._o = list(map(min, self._o, other._o))
+        return self
+
+    def _join(self, other: 'UsedStore') -> 'UsedStore':
+        self._materialize()
+        other._materialize()
+        self._hi |= other._hi
+        self._lo |= other._lo
+        self._s = list(map(max, self._s, other._s))
+        self._u = list(map(max, self._u, other._u))
+        self._o = list(map(max, self._o, other._o))
+        return self
 
     def descend(self) -> 'UsedStore':
-        for var in self.store.values():
-            var.descend()
+        # U (11) becomes S (10) and O (01) becomes N (00), i.e., the lo bit-plane is cleared
+        self._lo = 0
+        # the descent of list starts is idempotent, thus it only has to be applied to the changes
+        self._descended = True
+        self._changes = {i: (max(s, u), 0, 0) for i, (s, u, o) in self._changes.items()}
         return self
 
     def combine(self, other: 'UsedStore') -> 'UsedStore':
-        for var, used in self.store.items():
-            used.combine(other.store[var])
+        # bit-wise implementation of UsedLattice.COMBINE: the result is O or U if other is O or U, respectively,
+        # U if other is S and self is U, S if other is S otherwise, and self if other is N
+        hi, lo = self._hi, self._lo
+        self._hi = other._hi | (hi & ~other._lo)
+        self._lo = other._lo | (lo & (hi | ~other._hi))
+        if other._descended and other._s is self._s and other._u is self._u and other._o is self._o:
+            # other shares the lists of self: outside of the changes of either store, the element of other is the
+            # descent of the element of self, and combining an element with its descent leaves it unchanged
+            indices = set(self._changes) | set(other._changes)
+        else:
+            indices = range(len(self._lists))
+        for i in indices:
+            suo1, suo2 = self._suo(i), other._suo(i)
+            if suo1 != suo2:  # combining an element with itself leaves it unchanged
+                self._changes[i] = _combine_liststarts(suo1, suo2)
         return self
 
     def _derive_list_display_usage_from_used_liststart(self, liststart, list_display):
         for index, e in enumerate(list_display.items):
             if liststart.used_at(index) in [Used.U, Used.S]:
                 for identifier in e.ids():
-                    self.store[identifier].used = Used.U
+                    self._use_variable(identifier)
+
+    def _set_used_at(self, var: VariableIdentifier, index):
+        liststart = self._liststart(var)
+        liststart.set_used_at(index)
+        self._set_liststart(var, liststart)
 
     def _use(self, left: VariableIdentifier, right: Expression):
         if issubclass(left.typ, Number):
-            if self.store[left].used in [Used.U, Used.S]:
+            if self._used(left) in [Used.U, Used.S]:
                 for e in walk(right):
                     if isinstance(e, VariableIdentifier):
-                        self.store[e].used = Used.U
+                        self._use_variable(e)
                     elif isinstance(e, Index):
                         if isinstance(e.index, Literal):
-                            self.store[e.target].set_used_at(e.index.val)
+                            self._set_used_at(e.target, e.index.val)
                         else:
                             raise NotImplementedError()
         elif issubclass(left.typ, Sequence):
             if isinstance(right, VariableIdentifier):
-                self.store[right].replace(deepcopy(self.store[left]))
-                self.store[right].change_S_to_U()
+                liststart = self._liststart(left)
+                liststart.change_S_to_U()
+                self._set_liststart(right, liststart)
             elif isinstance(right, ListDisplay):
-                self._derive_list_display_usage_from_used_liststart(self.store[left], right)
+                self._derive_list_display_usage_from_used_liststart(self._liststart(left), right)
         else:
-            raise NotImplementedError(f"Method _use not implemented for {self.store[left].typ}!")
+            raise NotImplementedError(f"Method _use not implemented for {left.typ}!")
         return self
 
     def _kill(self, left: VariableIdentifier, right: Expression):
         if issubclass(left.typ, Number):
-            if self.store[left].used in [Used.U, Used.S]:
-                if left in [v for v, u in self.store.items() if v in right.ids()]:
-                    self.store[left].used = Used.U  # x is still used since it is used in assigned expression
+            if self._used(left) in [Used.U, Used.S]:
+                if left in right.ids():
+                    self._set_used(left, Used.U)  # x is still used since it is used in assigned expression
                 else:
-                    self.store[left].used = Used.O  # x is overwritten
+                    self._set_used(left, Used.O)  # x is overwritten
         elif issubclass(left.typ, Sequence):
             # TODO this whole if is no longer correct when lists of lists are allowed, e.g. l = [a,2,l]
+            liststart = self._liststart(left)
             if isinstance(right, VariableIdentifier):
                 if right != left:  # if no self-assignemnt
-                    self.store[left].change_SU_to_O()
+                    liststart.change_SU_to_O()
             elif isinstance(right, ListDisplay):
-                self.store[left].change_SU_to_O()
+                liststart.change_SU_to_O()
+            self._set_liststart(left, liststart)
         else:
-            raise NotImplementedError(f"Method _kill not implemented for {self.store[left].typ}!")
+            raise NotImplementedError(f"Method _kill not implemented for {left.typ}!")
         return self
 
     def _access_variable(self, variable: VariableIdentifier) -> Set[Expression]:
@@ -77,14 +268,9 @@ class UsedStore(Store, State):
         raise NotImplementedError("Variable assignment is not implemented!")
 
     def _assume(self, condition: Expression) -> 'UsedStore':
-        used_vars = len(
-            set([lat.used for lat in self.store.values() if isinstance(lat, UsedLattice)]).intersection(
-                [Used.U, Used.O])
-        ) > 0
-        used_lists = any(
-            [lat.suo[Used.U] > 0 or lat.suo[Used.O] > 0 for lat in self.store.values() if
-             isinstance(lat, UsedListStartLattice)]
-        )
+        used_vars = self._lo != 0  # the lo bit is set for U and O
+        self._materialize()
+        used_lists = any(u > 0 or o > 0 for u, o in zip(self._u, self._o))
         store_has_effect = used_vars or used_lists
 
         for e in walk(condition):
@@ -92,11 +278,11 @@ class UsedStore(Store, State):
                 # update to U if exists a variable y in state that is either U or O (note that S is not enough)
                 # or is set intersection, if checks if resulting list is empty
                 if store_has_effect:
-                    self.store[e].used = Used.U
+                    self._use_variable(e)
             elif isinstance(e, Index):
                 if isinstance(e.index, Literal):
                     if store_has_effect:
-                        self.store[e.target].set_used_at(e.index.val)
+                        self._set_used_at(e.target, e.index.val)
                 else:
                     raise NotImplementedError()
 
@@ -120,10 +306,12 @@ class UsedStore(Store, State):
     def _output(self, output: Expression) -> 'UsedStore':
         for variable in output.ids():
             if issubclass(variable.typ, Number):
-                self.store[variable].used = Used.U
+                self._set_used(variable, Used.U)
             elif issubclass(variable.typ, Sequence):
-                self.store[variable].suo[Used.U] = inf
-                self.store[variable].closure()
+                liststart = self._liststart(variable)
+                liststart.suo[Used.U] = inf
+                liststart.closure()
+                self._set_liststart(variable, liststart)
             else:
                 raise NotImplementedError(f"Type {variable.typ} not yet supported!")
         return self  # nothing to be done
@@ -0,0 +1,104 @@
+from copy import deepcopy
+from itertools import product
+from math import inf
+from unittest import TestCase
+from abstract_domains.usage.store import UsedStore
+from abstract_domains.usage.used import UsedLattice, U, S, O, N
+from abstract_domains.usage.used_liststart import UsedListStartLattice
+from core.expressions import VariableIdentifier
+
+
+class TestUsedStore(TestCase):
+    def setUp(self):
+        # one variable for every pair of used values, such that packed operations cover the whole table at once
+        self.pairs = list(product([U, S, O, N], repeat=2))
+        self.variables = [VariableIdentifier(int, f"x{i}") for i in range(len(self.pairs))]
+        self.left = UsedStore(self.variables)
+        self.right = UsedStore(self.variables)
+        for var, (left, right) in zip(self.variables, self.pairs):
+            self.left._set_used(var, left)
+            self.right._set_used(var, right)
+
+    def assertPointwise(self, store, operation):
+        for var, (left, right) in zip(self.variables, self.pairs):
+            expected = operation(UsedLattice(left), UsedLattice(right))
+            self.assertEqual(store.store[var].used, expected.used, f"{left.name}, {right.name}")
+
+    def test_combine(self):
+        self.assertPointwise(deepcopy(self.left).combine(self.right), lambda l, r: l.combine(r))
+
+    def test_join(self):
+        self.assertPointwise(deepcopy(self.left).join(self.right), lambda l, r: l.join(r))
+
+    def test_meet(self):
+        self.assertPointwise(deepcopy(self.left).meet(self.right), lambda l, r: l.meet(r))
+
+    def test_descend(self):
+        self.assertPointwise(deepcopy(self.left).descend(), lambda l, r: l.descend())
+
+    def test_less_equal(self):
+        for var, (left, right) in zip(self.variables, self.pairs):
+            l, r = UsedStore([var]), UsedStore([var])
+            l._set_used(var, left)
+            r._set_used(var, right)
+            self.assertEqual(l.less_equal(r), UsedLattice(left).less_equal(UsedLattice(right)),
+                             f"{left.name}, {right.name}")
+
+
+class TestUsedStoreSharing(TestCase):
+    def setUp(self):
+        # one list variable for every closed list start of small bounds
+        self.liststarts = [(s, u, o) for s, u, o in product([0, 1, 2, inf], repeat=3)
+                           if UsedListStartLattice(s, u, o).closed]
+        self.variables = [VariableIdentifier(list, f"l{i}") for i in range(len(self.liststarts))]
+        self.store = UsedStore(self.variables)
+        for var, suo in zip(self.variables, self.liststarts):
+            self.store._set_liststart(var, UsedListStartLattice(*suo))
+
+    def assertLists(self, store, expected):
+        for var, suo in zip(self.variables, expected):
+            self.assertEqual(tuple(store.store[var].suo.values()), suo, str(var))
+
+    def test_copy_shares_lists(self):
+        self.store._materialize()
+        pushed = deepcopy(self.store).descend()
+        self.assertIs(pushed._s, self.store._s)
+        self.assertEqual(len(pushed._changes), 0)
+        self.assertLists(pushed, [tuple(UsedListStartLattice(*suo).descend().suo.values())
+                                  for suo in self.liststarts])
+
+    def test_combine_descent(self):
+        # popping an unchanged frame leaves the frame below unchanged
+        self.store._materialize()
+        self.store.combine(deepcopy(self.store).descend())
+        self.assertEqual(len(self.store._changes), 0)
+        self.assertLists(self.store, self.liststarts)
+
+    def test_combine_changes(self):
+        self.store._materialize()
+        pushed = deepcopy(self.store).descend()
+        pushed._set_liststart(self.variables[0], UsedListStartLattice(0, 2, 0))
+        expected = [tuple(UsedListStartLattice(*suo).combine(UsedListStartLattice(*suo).descend()).suo.values())
+                    for suo in self.liststarts]
+        expected[0] = tuple(UsedListStartLattice(*self.liststarts[0])
+                            .combine(UsedListStartLattice(0, 2, 0)).suo.values())
+        self.store.combine(pushed)
+        self.assertEqual(set(self.store._changes), {0})
+        self.assertLists(self.store, expected)
+
+    def test_unshared_combine(self):
+        pairs = []
+        for suo1, suo2 in product(self.liststarts, repeat=2):
+            try:
+                combined = UsedListStartLattice(*suo1).combine(UsedListStartLattice(*suo2))
+                pairs.append((suo1, suo2, tuple(combined.suo.values())))
+            except AssertionError:
+                pass  # combinations that cannot be closed are not supported by the lattice
+        variables = [VariableIdentifier(list, f"l{i}") for i in range(len(pairs))]
+        left, right = UsedStore(variables), UsedStore(variables)
+        for var, (suo1, suo2, _) in zip(variables, pairs):
+            left._set_liststart(var, UsedListStartLattice(*suo1))
+            right._set_liststart(var, UsedListStartLattice(*suo2))
+        left.combine(right)
+        for var, (_, _, expected) in zip(variables, pairs):
+            self.assertEqual(tuple(left.store[var].suo.values()), expected, str(var))
@@ -1,6 +1,9 @@
 from abc import ABCMeta, abstractmethod
 from enum import IntEnum
-from typing import Set, Sequence
+from functools import wraps
+from operator import attrgetter
+from typing import Set, Sequence, Tuple
+from weakref import WeakValueDictionary
 
 """
 Expressions.
@@ -8,7 +11,85 @@ https://docs.python.org/3.4/reference/expressions.html
 """
 
 
-class Expression(metaclass=ABCMeta):
+_interned = WeakValueDictionary()  # table of all live expressions, keyed by their structure
+
+
+class ExpressionMeta(ABCMeta):
+    """Metaclass of expressions hash-consing each newly constructed expression.
+
+    Structurally equal expressions are the same object: constructing an expression returns the live expression with
+    the same class, type, and fields, if there is one.
+    """
+
+    def __call__(cls, *args, **kwargs):
+        expr = super().__call__(*args, **kwargs)
+        key = (cls, expr.typ) + expr.args
+        interned = _interned.get(key)
+        if interned is None:
+            expr._hash = hash(key)
+            _interned[key] = expr
+            return expr
+        return interned
+
+
+def _child_accessor(children: Tuple[str, ...], sequences: Tuple[str, ...]):
+    """Generate the accessor of the child expressions stored in the given fields of an expression class.
+
+    :param children: names of the fields holding a child expression (or ``None``)
+    :param sequences: names of the fields holding a sequence of child expressions
+    :return: function returning the tuple of child expressions of an expression
+    """
+    if sequences:
+        get_children = attrgetter(*('_' + field for field in children)) if children else None
+        get_sequences = [attrgetter('_' + field) for field in sequences]
+
+        def accessor(expr):
+            result = ()
+            if get_children:
+                result = tuple(filter(None, get_children(expr) if len(children) > 1 else (get_children(expr),)))
+            for get_sequence in get_sequences:
+                result += tuple(get_sequence(expr))
+            return result
+    elif len(children) > 1:
+        get_children = attrgetter(*('_' + field for field in children))
+
+        def accessor(expr):
+            return tuple(filter(None, get_children(expr)))
+    elif children:
+        get_child = attrgetter('_' + children[0])
+
+        def accessor(expr):
+            child = get_child(expr)
+            return () if child is None else (child,)
+    else:
+        def accessor(_):
+            return ()
+    return accessor
+
+
+def _cache_str(to_str):
+    """Cache the string representation of an (immutable) expression."""
+
+    @wraps(to_str)
+    def __str__(self):
+        if self._str is None:
+            self._str = to_str(self)
+        return self._str
+
+    return __str__
+
+
+class Expression(metaclass=ExpressionMeta):
+    """Expression representation.
+
+    Expressions are immutable and hash-consed (cf. :class:`ExpressionMeta`). Thus, expression equality is identity.
+    The hash, the string representation, and the identifiers of each expression are computed only once.
+    """
+    __slots__ = ('_typ', '_hash', '_str', '_ids', '__weakref__')
+    _fields = ()  # names of the fields of the expression, in the order they are passed to the constructor
+    _children = ()  # names of the fields holding a child expression
+    _sequences = ()  # names of the fields holding a sequence of child expressions
+
     def __init__(self, typ):
         """Expression representation.
         https://docs.python.org/3.4/reference/expressions.html
@@ -16,28 +97,59 @@ class Expression(metaclass=ABCMeta):
         :param typ: type of the expression 
         """
         self._typ = typ
+        self._hash = None
+        self._str = None
+        self._ids = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if '__str__' in cls.__dict__:
+            cls.__str__ = _cache_str(cls.__dict__['__str__'])
+        cls.children = _child_accessor(cls._children, cls._sequences)
+        cls.children.__doc__ = Expression.children.__doc__
+
+    def children(self) -> Tuple['Expression', ...]:
+        """Direct child expressions of the expression, in the order of the fields holding them.
+
+        :return: tuple of the direct child expressions of the expression
+        """
+        return ()
 
     @property
     def typ(self):
         return self._typ
 
-    @abstractmethod
+    @property
+    def args(self) -> Tuple:
+        """Fields of the expression, in the order they are passed to the constructor (after the type)."""
+        return tuple(getattr(self, field) for field in self._fields)
+
     def __eq__(self, other: 'Expression'):
         """Expression equality.
         
         :param other: other expression to compare
         :return: whether the expression equality holds
         """
+        return self is other
 
-    @abstractmethod
     def __hash__(self):
         """Expression hash representation.
         
         :return: hash value representing the expression
         """
+        return self._hash
 
     def __ne__(self, other: 'Expression'):
-        return not (self == other)
+        return self is not other
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (self.typ,) + self.args
 
     @abstractmethod
     def __str__(self):
@@ -51,12 +163,10 @@ class Expression(metaclass=ABCMeta):
         
         :return: set of identifiers that appear in the expression
         """
-        from core.expressions_tools import walk
-        ids = set()
-        for e in walk(self):
-            if isinstance(e, VariableIdentifier):
-                ids.add(e)
-        return ids
+        if self._ids is None:
+            from core.expressions_tools import walk
+            self._ids = frozenset(e for e in walk(self) if isinstance(e, VariableIdentifier))
+        return self._ids
 
 
 """
@@ -66,6 +176,9 @@ https://docs.python.org/3.4/reference/expressions.html#atoms
 
 
 class Literal(Expression):
+    __slots__ = ('_val',)
+    _fields = ('val',)
+
     def __init__(self, typ, val: str):
         """Literal expression representation.
         https://docs.python.org/3.4/reference/expressions.html#literals
@@ -80,12 +193,6 @@ class Literal(Expression):
     def val(self):
         return self._val
 
-    def __eq__(self, other):
-        return (self.typ, self.val) == (other.typ, other.val)
-
-    def __hash__(self):
-        return hash((self.typ, self.val))
-
     def __str__(self):
         if issubclass(self.typ, str):
             return f'"{self.val}"'
@@ -94,6 +201,8 @@ class Literal(Expression):
 
 
 class Input(Expression):
+    __slots__ = ()
+
     def __init__(self, typ):
         """Input expression representation.
 
@@ -101,17 +210,14 @@ class Input(Expression):
         """
         super().__init__(typ)
 
-    def __eq__(self, other):
-        return self.typ == other.typ
-
-    def __hash__(self):
-        return hash(self.typ)
-
     def __str__(self):
         return "input()"
 
 
 class Identifier(Expression):
+    __slots__ = ('_name',)
+    _fields = ('name',)
+
     def __init__(self, typ, name: str):
         """Identifier expression representation.
         https://docs.python.org/3.4/reference/expressions.html#atom-identifiers
@@ -126,17 +232,13 @@ class Identifier(Expression):
     def name(self):
         return self._name
 
-    def __eq__(self, other):
-        return (self.typ, self.name) == (other.typ, other.name)
-
-    def __hash__(self):
-        return hash((self.typ, self.name))
-
     def __str__(self):
         return "{0.name}".format(self)
 
 
 class VariableIdentifier(Identifier):
+    __slots__ = ()
+
     def __init__(self, typ, name: str):
         """Variable identifier expression representation.
         
@@ -152,6 +254,10 @@ class ListDisplay(Expression):
     https://docs.python.org/3/reference/expressions.html#list-displays
     """
 
+    __slots__ = ('_items',)
+    _fields = ('items',)
+    _sequences = ('items',)
+
     def __init__(self, typ=type(list), items: Sequence = None):
         """List display representation
         
@@ -159,20 +265,14 @@ class ListDisplay(Expression):
         :param items: listed items
         """
         super().__init__(typ)
-        self._items = items or []
+        self._items = tuple(items or ())
 
     @property
     def items(self):
         return self._items
 
-    def __eq__(self, other):
-        return (self.typ, self.items) == (other.typ, other.items)
-
-    def __hash__(self):
-        return hash((self.typ, str(self.items)))
-
     def __str__(self):
-        return str(self.items)
+        return str(list(self.items))
 
 
 """
@@ -187,6 +287,10 @@ class AttributeReference(Expression):
     https://docs.python.org/3.4/reference/expressions.html#attribute-references
     """
 
+    __slots__ = ('_primary', '_attribute')
+    _fields = ('primary', 'attribute')
+    _children = ('primary', 'attribute')
+
     def __init__(self, typ, primary: Expression, attribute: Identifier):
         """Attribute reference expression representation.
         
@@ -206,12 +310,6 @@ class AttributeReference(Expression):
     def attribute(self):
         return self._attribute
 
-    def __eq__(self, other):
-        return (self.typ, self.primary, self.attribute) == (other.typ, other.primary, other.attribute)
-
-    def __hash__(self):
-        return hash((self.typ, self.primary, self.attribute))
-
     def __str__(self):
         return "{0.primary}.{0.attribute}".format(self)
 
@@ -220,6 +318,10 @@ class Slice(Expression):
     """Slice (list/dictionary access) representation.
     """
 
+    __slots__ = ('_target', '_lower', '_step', '_upper')
+    _fields = ('target', 'lower', 'step', 'upper')
+    _children = ('target', 'lower', 'step', 'upper')
+
     def __init__(self, typ, target: Expression, lower: Expression, step: Expression, upper: Expression):
         """Slice (list/dictionary access) representation.
 
@@ -257,18 +359,15 @@ class Slice(Expression):
         else:
             return "{}[{}:{}]".format(self.target, self.lower or "", self.upper or "")
 
-    def __eq__(self, other):
-        return (self.typ, self.target, self.lower, self.step, self.upper) == (
-            other.typ, other.target, other.lower, self.step, self.upper)
-
-    def __hash__(self):
-        return hash((self.typ, self.target, self.lower, self.step, self.upper))
-
 
 class Index(Expression):
     """Index (list/dictionary access) representation.
     """
 
+    __slots__ = ('_target', '_index')
+    _fields = ('target', 'index')
+    _children = ('target', 'index')
+
     def __init__(self, typ, target: Expression, index: Expression):
         """Index  (list/dictionary access) representation.
 
@@ -291,13 +390,6 @@ class Index(Expression):
     def __str__(self):
         return "{}[{}]".format(self.target, self.index)
 
-    def __eq__(self, other):
-        return (self.typ, self.target, self.index) == (
-            other.typ, other.target, other.index)
-
-    def __hash__(self):
-        return hash((self.typ, self.target, self.index))
-
 
 """
 Generic Operation Expressions
@@ -305,7 +397,7 @@ Generic Operation Expressions
 
 
 class Operation(Expression, metaclass=ABCMeta):
-    pass
+    __slots__ = ()
 
 
 """
@@ -324,6 +416,10 @@ class UnaryOperation(Operation):
             :return: string representing the operator
             """
 
+    __slots__ = ('_operator', '_expression')
+    _fields = ('operator', 'expression')
+    _children = ('expression',)
+
     def __init__(self, typ, operator: Operator, expression: Expression):
         """Unary operation expression representation.
         
@@ -343,12 +439,6 @@ class UnaryOperation(Operation):
     def expression(self):
         return self._expression
 
-    def __eq__(self, other):
-        return (self.typ, self.operator, self.expression) == (other.typ, other.operator, other.expression)
-
-    def __hash__(self):
-        return hash((self.typ, self.operator, self.expression))
-
     def __str__(self):
         expr_string = str(self.expression)
         if isinstance(self.expression, Operation):
@@ -373,6 +463,8 @@ class UnaryArithmeticOperation(UnaryOperation):
             elif self.value == -1:
                 return "-"
 
+    __slots__ = ()
+
     def __init__(self, typ, operator: Operator, expression: Expression):
         """Unary arithmetic operation expression representation.
         
@@ -397,6 +489,8 @@ class UnaryBooleanOperation(UnaryOperation):
             if self.value == 1:
                 return "not"
 
+    __slots__ = ()
+
     def __init__(self, typ, operator: Operator, expression: Expression):
         """Unary boolean operation expression representation.
         
@@ -423,6 +517,10 @@ class BinaryOperation(Operation):
             :return: string representing the operator
             """
 
+    __slots__ = ('_left', '_operator', '_right')
+    _fields = ('left', 'operator', 'right')
+    _children = ('left', 'right')
+
     def __init__(self, typ, left: Expression, operator: Operator, right: Expression):
         """Binary operation expression representation.
         
@@ -448,12 +546,6 @@ class BinaryOperation(Operation):
     def right(self):
         return self._right
 
-    def __eq__(self, other):
-        return (self.typ, self.left, self.operator, self.right) == (other.typ, other.left, other.operator, other.right)
-
-    def __hash__(self):
-        return hash((self.typ, self.left, self.operator, self.right))
-
     def __str__(self):
         left_string = str(self.left)
         right_string = str(self.right)
@@ -487,6 +579,8 @@ class BinaryArithmeticOperation(BinaryOperation):
             elif self.value == 4:
                 return "/"
 
+    __slots__ = ()
+
     def __init__(self, typ, left: Expression, operator: Operator, right: Expression):
         """Binary arithmetic operation expression representation.
         
@@ -513,6 +607,8 @@ class BinaryBooleanOperation(BinaryOperation):
         def __str__(self):
             return self.name.lower()
 
+    __slots__ = ()
+
     def __init__(self, typ, left: Expression, operator: Operator, right: Expression):
         """Binary boolean operation expression representation.
 
@@ -585,6 +681,8 @@ class BinaryComparisonOperation(BinaryOperation):
         Operator.NotIn: Operator.In
     }
 
+    __slots__ = ()
+
     def __init__(self, typ, left: Expression, operator: Operator, right: Expression):
         """Binary comparison operation expression representation.
 
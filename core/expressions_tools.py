@@ -1,9 +1,11 @@
+from collections import deque
 from copy import deepcopy
 from functools import reduce
 
 from core.expressions import Expression, UnaryBooleanOperation, BinaryBooleanOperation, BinaryComparisonOperation, \
     BinaryArithmeticOperation, Literal, UnaryArithmeticOperation
 from core.special_expressions import VariadicArithmeticOperation
+from core.utils import memoize
 
 
 def iter_fields(expr: Expression):
@@ -11,22 +13,16 @@ def iter_fields(expr: Expression):
     Yield a tuple of ``(fieldname, value)`` for each field in ``expr._fields``
     that is present on *expr*.
     """
-    for name, field in expr.__dict__.items():
-        yield name, field
+    for name in expr._fields:
+        yield name, getattr(expr, name)
 
 
 def iter_child_exprs(expr: Expression):
     """
     Yield all direct child expressions of *expr*, that is, all fields that are expressions
-    and all items of fields that are lists of expressions.
+    and all items of fields that are sequences of expressions.
     """
-    for _, field in iter_fields(expr):
-        if isinstance(field, Expression):
-            yield field
-        elif isinstance(field, list):
-            for item in field:
-                if isinstance(item, Expression):
-                    yield item
+    yield from expr.children()
 
 
 def walk(expr: Expression):
@@ -35,11 +31,10 @@ def walk(expr: Expression):
     (including *expr* itself), in no specified order.  This is useful if you
     only want to modify expressions in place and don't care about the context.
     """
-    from collections import deque
     todo = deque([expr])
     while todo:
         expr = todo.popleft()
-        todo.extend(iter_child_exprs(expr))
+        todo.extend(expr.children())
         yield expr
 
 
@@ -57,6 +52,8 @@ class ExpressionVisitor:
     be `visit_TryFinally`.  This behavior can be changed by overriding
     the `visit` method.  If no visitor function exists for a node
     (return value `None`) the `generic_visit` visitor is used instead.
+    The visitor function of each type of node is looked up only once
+    per class and then kept in a class-level dispatch table.
 
     Don't use the `NodeVisitor` if you want to apply changes to expression during
     traversing.  For this a special visitor exists (`ExpressionTransformer`) that
@@ -65,22 +62,27 @@ class ExpressionVisitor:
     Adopted from `ast.py`.
     """
 
+    _visitors = dict()  # dispatch table from expression type to visitor function, one per class
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visitors = dict()
+
     def visit(self, expr, *args, **kwargs):
         """Visit an expression."""
-        method = 'visit_' + expr.__class__.__name__
-        visitor = getattr(self, method, self.generic_visit)
-        return visitor(expr, *args, **kwargs)
+        try:
+            visitor = self._visitors[expr.__class__]
+        except KeyError:
+            method = 'visit_' + expr.__class__.__name__
+            visitor = getattr(self.__class__, method, self.__class__.generic_visit)
+            self._visitors[expr.__class__] = visitor
+        return visitor(self, expr, *args, **kwargs)
 
     def generic_visit(self, expr, *args, **kwargs):
         """Called if no explicit visitor function exists for an expression."""
         last_result = None
-        for name, field in iter_fields(expr):
-            if isinstance(field, Expression):
-                last_result = self.visit(field, *args, **kwargs)
-            elif isinstance(field, list):
-                for item in field:
-                    if isinstance(item, Expression):
-                        last_result = self.visit(item, *args, **kwargs)
+        for child in expr.children():
+            last_result = self.visit(child, *args, **kwargs)
         return last_result
 
     def run(self, expr, *args, **kwargs):
@@ -109,6 +111,9 @@ class ExpressionTransformer(ExpressionVisitor):
     otherwise it is replaced with the return value.  The return value may be the
     original node in which case no replacement takes place.
 
+    Since expressions are immutable, replacing a child of an expression yields a new expression
+    (which is returned by :meth:`generic_visit`), the original expression is left unchanged.
+
     Here is an example transformer that rewrites all occurrences of name lookups
     (``foo``) to ``data['foo']``::
 
@@ -136,28 +141,80 @@ class ExpressionTransformer(ExpressionVisitor):
     """
 
     def generic_visit(self, expr, *args, **kwargs):
+        changed = False
+        new_fields = []
         for field, old_value in iter_fields(expr):
-            if isinstance(old_value, list):
+            new_value = old_value
+            if field in expr._sequences:
                 new_values = []
                 for value in old_value:
-                    if isinstance(value, Expression):
-                        value = self.visit(value, *args, **kwargs)
-                        if value is None:
-                            continue
-                        elif not isinstance(value, Expression):
-                            new_values.extend(value)
-                            continue
+                    value = self.visit(value, *args, **kwargs)
+                    if value is None:
+                        continue
+                    elif not isinstance(value, Expression):
+                        new_values.extend(value)
+                        continue
                     new_values.append(value)
-                old_value[:] = new_values
-            elif isinstance(old_value, Expression):
-                new_node = self.visit(old_value, *args, **kwargs)
-                if new_node is None:
-                    delattr(expr, field)
-                else:
-                    setattr(expr, field, new_node)
+                if len(new_values) != len(old_value) or any(n is not o for n, o in zip(new_values, old_value)):
+                    new_value = new_values
+            elif field in expr._children and old_value is not None:
+                new_value = self.visit(old_value, *args, **kwargs)
+            changed = changed or new_value is not old_value
+            new_fields.append(new_value)
+        if changed:
+            return expr.__class__(expr.typ, *new_fields)
         return expr
 
 
+class PostOrderExpressionVisitor:
+    """
+    An expression visitor base class that visits the children of an expression before the
+    expression itself, without recursion.  Thus, arbitrarily deep expressions can be visited.
+
+    Per default the visitor functions for the nodes are ``'visit_'`` + class name of the node.
+    Each visitor function is called with the expression and the list of results of the visitor
+    functions called on its direct children (cf. :meth:`Expression.children`).  If no visitor
+    function exists for a node the `generic_visit` visitor is used instead.  The visitor function
+    of each type of node is looked up only once per class and then kept in a class-level
+    dispatch table.
+    """
+
+    _visitors = dict()  # dispatch table from expression type to visitor function, one per class
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visitors = dict()
+
+    def visit(self, expr, *args, **kwargs):
+        """Visit an expression."""
+        results = []
+        todo = [(expr, None)]
+        while todo:
+            expr, children = todo.pop()
+            if children is None:  # first encounter, visit the children first
+                children = expr.children()
+                todo.append((expr, children))
+                todo.extend((child, None) for child in reversed(children))
+            else:  # the children have been visited
+                try:
+                    visitor = self._visitors[expr.__class__]
+                except KeyError:
+                    method = 'visit_' + expr.__class__.__name__
+                    visitor = getattr(self.__class__, method, self.__class__.generic_visit)
+                    self._visitors[expr.__class__] = visitor
+                if children:
+                    child_results = results[-len(children):]
+                    del results[-len(children):]
+                else:
+                    child_results = []
+                results.append(visitor(self, expr, child_results, *args, **kwargs))
+        return results[0]
+
+    def generic_visit(self, expr, results, *args, **kwargs):
+        """Called if no explicit visitor function exists for an expression."""
+        return results[-1] if results else None
+
+
 Sign = UnaryArithmeticOperation.Operator
 PLUS = Sign.Add
 MINUS = Sign.Sub
@@ -258,6 +315,7 @@ class Simplifier(ExpressionVisitor):
         return self._ensure_expr(result)
 
 
+@memoize(maxsize=4096)
 def simplify(expr: Expression):
     expr = expand(expr)
     expr = Simplifier().run(expr)
@@ -323,6 +381,7 @@ class NotFreeConditionTransformer(ExpressionTransformer):
                                          self.visit(expr.right))
 
 
+@memoize(maxsize=4096)
 def make_condition_not_free(expr: Expression):
     return NotFreeConditionTransformer().visit(expr)
 
@@ -370,8 +429,7 @@ class Expander(ExpressionVisitor):
             l = self.visit(expr.left)
             r = self.visit(expr.right)
             if equal_operators(expr.operator, l, r):
-                l.operands += r.operands
-                return l
+                return VariadicArithmeticOperation(l.typ, l.operator, l.operands + r.operands)
             elif equal_operators(BinaryArithmeticOperation.Operator.Add, l, r):
                 # This is the case where we actually expand!
                 summands = []
@@ -383,8 +441,7 @@ class Expander(ExpressionVisitor):
                             combined = UnaryArithmeticOperation(expr.typ, MINUS,
                                                                 combined)
                         summands.append(combined)
-                l.operands = summands
-                return l
+                return VariadicArithmeticOperation(l.typ, l.operator, summands)
             else:
                 # we can not combine the two sides into single variadic operator
                 return VariadicArithmeticOperation(expr.typ, BinaryArithmeticOperation.Operator.Add, [expr])
@@ -404,7 +461,7 @@ class ExpanderCleanup(ExpressionTransformer):
     """
 
     def visit_VariadicArithmeticOperation(self, expr: VariadicArithmeticOperation, *args, **kwargs):
-        self.generic_visit(expr, *args, **kwargs)  # transform children first
+        expr = self.generic_visit(expr, *args, **kwargs)  # transform children first
         if len(expr.operands) == 1:
             return expr.operands[0]
         else:
@@ -415,9 +472,9 @@ class ExpanderCleanup(ExpressionTransformer):
                     operands += e.operands
                 else:
                     operands.append(e)
-            expr.operands = operands
-            return expr
+            return VariadicArithmeticOperation(expr.typ, expr.operator, operands)
 
 
+@memoize(maxsize=4096)
 def expand(expr: Expression):
     return ExpanderCleanup().visit(Expander().visit(expr))
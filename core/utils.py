@@ -1,3 +1,6 @@
+from functools import lru_cache, wraps
+from typing import Dict, Tuple, Type
+
 
 def copy_docstring(fromfunc):
     """Decorator to copy the docstring of ``fromfunc``.
@@ -12,3 +15,53 @@ def copy_docstring(fromfunc):
             func.__doc__ = sourcedoc
         return func
     return _decorator
+
+
+_memos = dict()  # all memoized functions, by qualified name
+
+
+def memoize(maxsize: int = 1024, exceptions: Tuple[Type[Exception], ...] = ()):
+    """Decorator to memoize a function in a bounded least-recently-used cache.
+
+    The arguments of the function must be hashable. Expressions are hash-consed and thus can be used as cache keys
+    directly (their hash is cached and their equality is identity). Exceptions of the given types raised by the
+    function are memoized as well.
+
+    The statistics of all memoized functions are available via :func:`memo_info`.
+
+    :param maxsize: maximum number of cached results
+    :param exceptions: types of exceptions to memoize
+    """
+    def _decorator(func):
+        @lru_cache(maxsize=maxsize)
+        def _cached(*args):
+            try:
+                return True, func(*args)
+            except exceptions as error:
+                return False, error
+
+        @wraps(func)
+        def _memoized(*args):
+            succeeded, result = _cached(*args)
+            if succeeded:
+                return result
+            raise result.with_traceback(None)
+
+        _memoized.cache_info = _cached.cache_info
+        _memoized.cache_clear = _cached.cache_clear
+        _memos[func.__module__ + '.' + func.__qualname__] = _memoized
+        return _memoized
+    return _decorator
+
+
+def memo_info() -> Dict[str, Tuple[int, int, int, float]]:
+    """Statistics of all memoized functions.
+
+    :return: dictionary mapping the name of each memoized function to its number of hits, number of misses,
+        number of cached results, and hit rate
+    """
+    info = dict()
+    for name, memoized in _memos.items():
+        hits, misses, _, size = memoized.cache_info()
+        info[name] = hits, misses, size, hits / (hits + misses) if hits + misses else 0.0
+    return info
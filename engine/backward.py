@@ -61,7 +61,9 @@ class BackwardInterpreter(Interpreter):
                         successor = successor.enter_loop()
                     # handle conditional edges
                     if isinstance(edge, Conditional):
-                        successor = self.semantics.semantics(edge.condition, successor).filter()
+                        successor = self.lowered(edge.condition).execute(successor).filter()
+                        if successor.is_bottom():
+                            continue  # infeasible edge, nothing flows along it
                     entry = entry.join(successor)
                 # widening
                 if isinstance(current, Loop) and self.widening < iteration:
@@ -73,7 +75,9 @@ class BackwardInterpreter(Interpreter):
                 if isinstance(current, Basic):
                     successor = entry
                     for stmt in reversed(current.stmts):
-                        successor = self.semantics.semantics(stmt, deepcopy(successor))
+                        successor = deepcopy(successor)
+                        if not successor.is_bottom():  # statements are unreachable from a bottom state
+                            successor = self.lowered(stmt).execute(successor)
                         states.appendleft(successor)
                 elif isinstance(current, Loop):
                     # nothing to be done
@@ -49,7 +49,9 @@ class ForwardInterpreter(Interpreter):
                     # handle conditional edges
                     if isinstance(edge, Conditional):
                         # TODO somewhere here call before(pp: ProgramPoint) after deepcopy, before semantics
-                        predecessor = self.semantics.semantics(edge.condition, predecessor).filter()
+                        predecessor = self.lowered(edge.condition).execute(predecessor).filter()
+                        if predecessor.is_bottom():
+                            continue  # infeasible edge, nothing flows along it
                     # handle non-default edges
                     if edge.kind == Edge.Kind.IF_IN:
                         predecessor = predecessor.enter_if()
@@ -71,7 +73,9 @@ class ForwardInterpreter(Interpreter):
                     successor = entry
                     for stmt in current.stmts:
                         # TODO somewhere here call before(pp: ProgramPoint) after deepcopy, before semantics
-                        successor = self.semantics.semantics(stmt, deepcopy(successor))
+                        successor = deepcopy(successor)
+                        if not successor.is_bottom():  # statements are unreachable from a bottom state
+                            successor = self.lowered(stmt).execute(successor)
                         states.append(successor)
                 elif isinstance(current, Loop):
                     # nothing to be done
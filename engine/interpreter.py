@@ -1,7 +1,9 @@
 from abc import ABCMeta, abstractmethod
 from abstract_domains.state import State
 from core.cfg import ControlFlowGraph
+from core.statements import Statement
 from engine.result import AnalysisResult
+from semantics.lowering import LoweredStatement, lower
 from semantics.semantics import Semantics
 
 
@@ -15,6 +17,7 @@ class Interpreter(metaclass=ABCMeta):
         self._result = AnalysisResult(cfg)
         self._semantics = semantics
         self._widening = widening
+        self._lowered = dict()
 
     @property
     def result(self):
@@ -32,6 +35,16 @@ class Interpreter(metaclass=ABCMeta):
     def widening(self):
         return self._widening
 
+    def lowered(self, stmt: Statement) -> LoweredStatement:
+        """Statement lowered into a list of instructions. Each statement is lowered only once per analysis.
+
+        :param stmt: statement to be lowered
+        :return: lowered statement
+        """
+        if stmt not in self._lowered:
+            self._lowered[stmt] = lower(self.semantics, stmt)
+        return self._lowered[stmt]
+
     @abstractmethod
     def analyze(self, initial: State) -> AnalysisResult:
         """Run the analysis.
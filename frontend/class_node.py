@@ -58,6 +58,18 @@ class ClassNode:
             args = self.quantified()
             return constr(*args)
 
+    def get_constructor_name(self):
+        """
+        Returns the name of the Z3 constructor of this type.
+        """
+        return self.name if isinstance(self.name, str) else self.name[0]
+
+    def get_recognizer(self):
+        """
+        Returns the Z3 recognizer of this type, which holds for all types built by its constructor.
+        """
+        return getattr(self.type_sort, "is_" + self.get_constructor_name())
+
     def get_literal_with_args(self, var):
         """
         Creates a Z3 expression representing this type. If this is a generic type, will
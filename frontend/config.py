@@ -1,3 +1,9 @@
+import os
+
+# Folder holding the caches shared between runs, only accessible by the current user
+cache_directory = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache")),
+                               "lyra")
+
 config = {
     # Whether to ignore the body of fully annotated functions and just take the provided types for args/return
     "ignore_fully_annotated_function": False,
@@ -11,4 +17,45 @@ config = {
     #       x = "string"
     #       x += "a"
     "enforce_same_type_in_branches": False,
+
+    # Whether to encode the subtype relation as a ground, quantifier-free formula over the finite class hierarchy,
+    # instead of quantified axioms instantiated by E-matching
+    "ground_subtyping": False,
+
+    # Folder holding the parsed stub files, shared between processes. `None` caches them only in memory.
+    "stubs_cache_directory": os.path.join(cache_directory, "stubs"),
+
+    # Whether to infer the top-level functions separately, and use their summaries in their callers
+    "modular_function_inference": False,
+
+    # Maximum number of candidate types in a function summary. Functions with more possible types are inlined.
+    "function_summary_candidates": 4,
+
+    # Folder holding the function summaries, shared between runs. `None` caches them only in memory.
+    "function_summaries_directory": os.path.join(cache_directory, "summaries"),
+
+    # Folder holding the stubs of the inferred modules, loaded by their importers. `None` caches them only in memory.
+    "module_stubs_directory": os.path.join(cache_directory, "module_stubs"),
+
+    # Whether the importers of a module load its cached stub, if any, instead of inferring it again. The stubs passed
+    # by the project inference (see `frontend.project_inference`) are always used.
+    "reuse_module_stubs": False,
+
+    # Number of solver configurations raced in parallel processes by `TypesSolver.solve`, see `frontend.portfolio`.
+    # With 1, the constraints are solved in the process of the inference.
+    "portfolio_size": 1,
+
+    # Limits of the check of the hard constraints, in milliseconds and in Z3 resource units. `None` means no limit.
+    # On timeout, the types resolved by the partial model are kept, and the others are reported as unknown.
+    "solver_timeout": None,
+    "solver_rlimit": None,
+
+    # Limits of the whole maximization of the soft constraints, shared by all its checks. On timeout, the best model
+    # found so far is kept, at least the model of the hard constraints.
+    "optimize_timeout": None,
+    "optimize_rlimit": None,
+
+    # Whether to minimize the unsat cores explaining type errors, by removing the groups of constraints which are
+    # not needed for the unsatisfiability. The cores are only extracted when requested, see `TypesSolver.unsat_core`.
+    "minimize_unsat_cores": True,
 }
@@ -98,3 +98,10 @@ class AnnotatedFunction:
         self.args_annotations = args_annotations
         self.return_annotation = return_annotation
         self.defaults_count = defaults_count
+
+
+class FunctionSummary:
+    """Summary of a function inferred separately: the function has one of the candidate annotated types"""
+    def __init__(self, candidates, annotations):
+        self.candidates = candidates
+        self.annotations = annotations  # sources of the (args annotations, return annotation) of the candidates
@@ -37,7 +37,7 @@ import sys
 import z3
 
 from z3 import Or, And
-from frontend.context import Context, AnnotatedFunction
+from frontend.context import Context, AnnotatedFunction, FunctionSummary
 
 
 def infer_numeric(node, solver):
@@ -64,7 +64,7 @@ def _get_elements_type(elts, context, lineno, solver):
         solver.add(solver.z3_types.subtype(cur_type, elts_type),
                    fail_message="List literal in line {}".format(lineno))
 
-    solver.optimize.add_soft(z3.Or([elts_type == elt for elt in all_types]))
+    solver.add_soft(z3.Or([elts_type == elt for elt in all_types]))
     return elts_type
 
 
@@ -133,7 +133,7 @@ def _infer_add(left_type, right_type, lineno, solver):
     solver.add(axioms.add(left_type, right_type, result_type, solver.z3_types),
                fail_message="Addition in line {}".format(lineno))
 
-    solver.optimize.add_soft(z3.Or(result_type == left_type, result_type == right_type))
+    solver.add_soft(z3.Or(result_type == left_type, result_type == right_type))
     return result_type
 
 
@@ -215,7 +215,7 @@ def infer_boolean_operation(node, context, solver):
                fail_message="Boolean operation in line {}".format(node.lineno))
 
     for value in values_types:
-        solver.optimize.add_soft(value == result_type)
+        solver.add_soft(value == result_type)
     return result_type
 
 
@@ -250,7 +250,7 @@ def infer_if_expression(node, context, solver):
     result_type = solver.new_z3_const("if_expr")
     solver.add(axioms.if_expr(a_type, b_type, result_type, solver.z3_types),
                fail_message="If expression in line {}".format(node.lineno))
-    solver.optimize.add_soft(z3.Or(result_type == a_type, result_type == b_type))
+    solver.add_soft(z3.Or(result_type == a_type, result_type == b_type))
     return result_type
 
 
@@ -380,7 +380,7 @@ def _get_args_types(args, context, instance, solver):
         # The call arguments should be subtype of the corresponding function arguments
         solver.add(solver.z3_types.subtype(call_type, arg_type),
                    fail_message="Call argument subtyping in line {}".format(arg.lineno))
-        solver.optimize.add_soft(call_type == arg_type)
+        solver.add_soft(call_type == arg_type)
         args_types += (arg_type,)
     return args_types
 
@@ -439,6 +439,13 @@ def infer_func_call(node, context, solver):
         func_axioms = solver.annotation_resolver.get_annotated_function_axioms(args_types, solver, called, result_type)
         if func_axioms is not None:
             call_axioms.append(func_axioms)
+    elif isinstance(called, FunctionSummary):
+        # The function has the type of one of the candidates of its summary
+        for candidate in called.candidates:
+            func_axioms = solver.annotation_resolver.get_annotated_function_axioms(args_types, solver, candidate,
+                                                                                   result_type)
+            if func_axioms is not None:
+                call_axioms.append(func_axioms)
     else:
         call_axioms += axioms.call(called, args_types, result_type, solver.z3_types)
 
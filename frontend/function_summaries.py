@@ -0,0 +1,182 @@
+"""Modular type inference of functions, with cached function summaries.
+
+In the modular mode, every top-level function which can be inferred separately (see
+`PreAnalyzer.add_function_summary_keys`) is solved alone, in its own solver, after the functions it calls. The types
+of the function which satisfy the constraints of its body are enumerated, and if there are only a few of them, they
+become the summary of the function: the callers use them like annotated functions instead of inlining the
+constraints of the body.
+
+The summaries are cached on disk by the `summary_key` of the function, which changes with the source of the function,
+of the functions it calls and of the stubs.
+"""
+import ast
+import json
+import os
+from collections import OrderedDict
+from frontend.config import config as inference_config
+from frontend.context import AnnotatedFunction, Context, FunctionSummary
+from frontend.stubs.stubs_cache import private_directory
+from z3 import sat
+
+PRIMITIVES = {
+    "object": "object",
+    "none": "None",
+    "number": "number",
+    "complex": "complex",
+    "float": "float",
+    "int": "int",
+    "bool": "bool",
+    "sequence": "sequence",
+    "str": "str",
+    "bytes": "bytes",
+}
+
+GENERICS = {
+    "list": "List",
+    "set": "Set",
+    "dict": "Dict",
+    "type": "Type",
+}
+
+
+class SummariesCache:
+    """Cache of function summaries, shared by all the type inferences"""
+
+    def __init__(self, directory=None):
+        """
+        :param directory: the folder holding the summaries, or `None` to cache only in memory
+        """
+        self.directory = directory
+        self._summaries = {}  # summary key -> candidates
+
+    def _cache_file(self, key):
+        return os.path.join(self.directory, "{}.json".format(key))
+
+    def get(self, key):
+        """Return whether the summary with the given key is known, and its candidates"""
+        if key in self._summaries:
+            return True, self._summaries[key]
+        if self.directory is None or not private_directory(self.directory):
+            return False, None
+        try:
+            with open(self._cache_file(key)) as f:
+                candidates = json.load(f)
+        except (OSError, ValueError):
+            return False, None
+        self._summaries[key] = candidates
+        return True, candidates
+
+    def put(self, key, candidates):
+        """Store the candidates of a summary, `None` if the function has to be inlined"""
+        self._summaries[key] = candidates
+        if self.directory is None or not private_directory(self.directory):
+            return
+        try:
+            temp_file = "{}.{}".format(self._cache_file(key), os.getpid())
+            with open(temp_file, "w") as f:
+                json.dump(candidates, f)
+            os.replace(temp_file, self._cache_file(key))
+        except OSError:
+            pass  # the cache is only an optimization
+
+
+summaries_cache = SummariesCache(inference_config["function_summaries_directory"])
+
+
+def type_to_annotation(z3_type):
+    """Translate a type of a model into a type annotation, or `None` if it cannot be annotated
+
+    The annotation uses the grammar of `AnnotationResolver.resolve`. User-defined classes
+    and functions with default arguments cannot be annotated.
+    """
+    name = z3_type.decl().name()
+    if name in PRIMITIVES:
+        return PRIMITIVES[name]
+
+    args = [z3_type.arg(i) for i in range(z3_type.num_args())]
+    if name.startswith("func_"):
+        # The first argument of a function type is its number of default arguments
+        if args[0].as_long() != 0:
+            return None
+        args = args[1:]
+
+    annotations = [type_to_annotation(arg) for arg in args]
+    if None in annotations:
+        return None
+    if name in GENERICS:
+        return "{}[{}]".format(GENERICS[name], ", ".join(annotations))
+    if name.startswith("tuple_"):
+        return "Tuple[{}]".format(", ".join(annotations) or "()")
+    if name.startswith("func_"):
+        return "Callable[[{}], {}]".format(", ".join(annotations[:-1]), annotations[-1])
+    return None
+
+
+def stub_definition(name, candidate):
+    """Create the definition of a stub function with the annotations of a summary candidate"""
+    args_annotations, return_annotation = candidate
+    args = ", ".join("arg_{}: {}".format(i, annotation) for i, annotation in enumerate(args_annotations))
+    return ast.parse("def {}({}) -> {}:\n    pass".format(name, args, return_annotation)).body[0]
+
+
+def solve_candidates(node, context, solver, infer_func):
+    """Enumerate the types of a function definition which satisfy the constraints of its body
+
+    :param node: the function definition
+    :param context: the context of the callers
+    :param solver: the solver of the callers
+    :param infer_func: the statements inferrer
+    :return: the list of candidate `(args_annotations, return_annotation)` pairs,
+        or `None` if there are too many or they cannot be annotated
+    """
+    # The called functions are summarized first, they may be defined after the function
+    summaries = OrderedDict()
+    for callee in node.summary_callees:
+        summaries[callee.name] = infer_summary(callee, context, solver, infer_func)
+        if summaries[callee.name] is None:
+            return None
+
+    # The stubs of the called functions are only pre-analyzed, to declare the types used by their summaries
+    stubs = [stub_definition(callee, candidate)
+             for callee, summary in summaries.items() for candidate in summary.annotations]
+    func_solver = type(solver)(ast.Module(body=stubs + [node], type_ignores=[]), modular=False)
+    func_context = Context()
+    func_solver.infer_stubs(func_context, infer_func)
+    for callee, summary in summaries.items():
+        func_context.set_type(callee, summary)
+    infer_func(node, func_context, func_solver)
+
+    func_type = func_context.get_type(node.name)
+    candidates = []
+    while func_solver.solve() == sat:
+        if len(candidates) == inference_config["function_summary_candidates"]:
+            return None
+        value = func_solver.model().eval(func_type, model_completion=True)
+        annotations = [type_to_annotation(value.arg(i)) for i in range(1, value.num_args())]
+        if None in annotations:
+            return None
+        candidates.append((annotations[:-1], annotations[-1]))
+        func_solver.add(func_type != value, fail_message="Function summary candidate in line {}".format(node.lineno))
+
+    # Errors in the function body are reported by the solver of the callers
+    return candidates or None
+
+
+def infer_summary(node, context, solver, infer_func):
+    """Get the summary of a function definition which can be inferred separately
+
+    :return: the summary of the function, or `None` if its constraints have to be inlined in its callers
+    """
+    found, candidates = summaries_cache.get(node.summary_key)
+    if not found:
+        candidates = solve_candidates(node, context, solver, infer_func)
+        summaries_cache.put(node.summary_key, candidates)
+    if candidates is None:
+        return None
+
+    defaults_count = len(node.args.defaults)
+    return FunctionSummary([AnnotatedFunction([ast.parse(annotation, mode="eval").body
+                                               for annotation in args_annotations],
+                                              ast.parse(return_annotation, mode="eval").body,
+                                              defaults_count)
+                            for args_annotations, return_annotation in candidates], candidates)
@@ -1,5 +1,10 @@
 import ast
-from frontend.context import Context
+import hashlib
+from collections import OrderedDict
+from frontend.config import config as inference_config
+from frontend.context import AnnotatedFunction, Context
+from frontend.module_stubs import module_stubs_cache
+from frontend.stubs.stubs_cache import stubs_cache
 from frontend.stubs.stubs_paths import libraries
 
 
@@ -8,20 +13,16 @@ class ImportHandler:
 
     @staticmethod
     def get_ast(path, module_name):
-        """Get the AST of a python module
-        
+        """Get a fresh copy of the AST of a python module, parsed at most once per process
+
         :param path: the path to the python module
         :param module_name: the name of the python module
         """
         try:
-            r = open(path)
+            return stubs_cache.get_ast(path)
         except FileNotFoundError:
             raise ImportError("No module named {}.".format(module_name))
 
-        tree = ast.parse(r.read())
-        r.close()
-        return tree
-
     @staticmethod
     def get_module_ast(module_name, base_folder):
         """Get the AST of a python module
@@ -38,20 +39,117 @@ class ImportHandler:
 
     @staticmethod
     def infer_import(module_name, base_folder, infer_func, solver):
-        """Infer the types of a python module"""
-        context = Context()
+        """Infer the types of a python module
+
+        A module of the program is loaded from its stub if its types were inferred separately, see `module_stubs`:
+        either its stub is passed in `solver.imported_types`, or it is cached and `reuse_module_stubs` is enabled.
+        A module imported back by a module it imports (an import cycle) is not inferred again: its top-level
+        names get unknown types, see `cyclic_module_context`.
+        """
+        if module_name in solver.imported_types:
+            return ImportHandler.load_module_stub(module_name, solver.imported_types[module_name], infer_func, solver)
+
+        context = Context(name=module_name)
 
         if ImportHandler.is_builtin(module_name):
             solver.stubs_handler.infer_builtin_lib(module_name, context, solver,
                                                    solver.config.used_names, infer_func)
         else:
+            if inference_config["reuse_module_stubs"]:
+                key = ImportHandler.module_key(module_name, base_folder, solver.stubs_handler.digest)
+                stub = module_stubs_cache.get(module_name, key)
+                if stub is not None:
+                    return ImportHandler.load_module_stub(module_name, stub, infer_func, solver)
             t = ImportHandler.get_module_ast(module_name, base_folder)
-            solver.infer_stubs(context, infer_func)
-            for stmt in t.body:
-                infer_func(stmt, context, solver)
+            if module_name in solver.importing:
+                return ImportHandler.cyclic_module_context(module_name, t, solver)
+            solver.importing.append(module_name)
+            source, solver.source = solver.source, "{}/{}.py".format(base_folder, module_name)
+            try:
+                solver.infer_stubs(context, infer_func)
+                for stmt in t.body:
+                    infer_func(stmt, context, solver)
+            finally:
+                solver.source = source
+                solver.importing.pop()
+
+        return context
+
+    @staticmethod
+    def cyclic_module_context(module_name, tree, solver):
+        """Create the context of a module imported back in an import cycle, while it is being inferred
 
+        Its top-level names get fresh types, which are only constrained by their uses in the importer.
+        """
+        context = Context(name=module_name)
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+                names = [node.name]
+            elif isinstance(node, ast.Assign):
+                names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+            elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+                names = [node.target.id]
+            else:
+                continue
+            for name in names:
+                context.set_type(name, solver.new_z3_const("cyclic_import"))
         return context
 
+    @staticmethod
+    def load_module_stub(module_name, stub, infer_func, solver):
+        """Create the context of a module from the stub of its inferred types
+
+        :param module_name: the name of the python module
+        :param stub: the source of the stub, made of import statements, annotated variables and annotated functions
+        """
+        context = Context(name=module_name)
+        source, solver.source = solver.source, "{}.pyi".format(module_name)
+        try:
+            for node in ast.parse(stub).body:
+                if isinstance(node, ast.AnnAssign):
+                    context.set_type(node.target.id, solver.resolve_annotation(node.annotation))
+                elif isinstance(node, ast.FunctionDef):
+                    context.set_type(node.name, AnnotatedFunction([arg.annotation for arg in node.args.args],
+                                                                  node.returns, len(node.args.defaults)))
+                else:
+                    infer_func(node, context, solver)
+        finally:
+            solver.source = source
+        return context
+
+    @staticmethod
+    def imported_modules(tree):
+        """Get the names of the modules of the program (not the built-in ones) imported by an AST"""
+        names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names += [name.name for name in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module != "typing":
+                names.append(node.module)
+        return list(OrderedDict.fromkeys(name for name in names if not ImportHandler.is_builtin(name)))
+
+    @staticmethod
+    def module_key(module_name, base_folder, stubs_digest, visiting=()):
+        """Get the key of the stub of a module of the program
+
+        The key hashes the source of the module, the keys of the modules it imports and the digest of the stubs,
+        such that it changes whenever the module or one of its (transitive) dependencies changes.
+        Modules in an import cycle contribute only their source to the keys of each other.
+        """
+        path = "{}/{}.py".format(base_folder, module_name)
+        try:
+            digest = stubs_cache.get_digest(path)
+        except FileNotFoundError:
+            raise ImportError("No module named {}.".format(module_name))
+        key = hashlib.sha256("{}:{}".format(stubs_digest, digest).encode())
+        visiting += (module_name,)
+        for imported in ImportHandler.imported_modules(ImportHandler.get_module_ast(module_name, base_folder)):
+            if imported in visiting:
+                key.update(stubs_cache.get_digest("{}/{}.py".format(base_folder, imported)).encode())
+            else:
+                key.update(ImportHandler.module_key(imported, base_folder, stubs_digest, visiting).encode())
+        return key.hexdigest()
+
     @staticmethod
     def is_builtin(module_name):
         """Check if the imported python module is builtin"""
@@ -0,0 +1,126 @@
+"""Stubs of the inferred types of modules, reused by their importers.
+
+After the inference of a module, the types of its top-level names can be emitted as a `.pyi`-style stub, in the
+grammar of `AnnotationResolver.resolve`:
+
+    import math
+    from A import f
+    x: int
+    def g(a: int, b: str = ...) -> List[int]: ...
+
+Importers load the stub as typed globals and annotated functions (see `ImportHandler.load_module_stub`) instead of
+inferring the module again. The stubs are cached on disk by a key hashing the source of the module, the keys of the
+modules it imports and the version of the stubs, such that a stub is invalidated whenever the module or one of its
+dependencies changes. The project inference reuses the cached stubs; the importers only load them from the cache
+with the `reuse_module_stubs` configuration.
+"""
+import ast
+import os
+from frontend.config import config as inference_config
+from frontend.context import AnnotatedFunction, Context, FunctionSummary
+from frontend.stubs.stubs_cache import private_directory
+
+
+class ModuleStubsCache:
+    """Cache of the stubs of the inferred modules"""
+
+    def __init__(self, directory=None):
+        """
+        :param directory: the folder holding the stubs, or `None` to cache only in memory
+        """
+        self.directory = directory
+        self._stubs = {}  # (module name, key) -> stub source
+
+    def _cache_file(self, module_name, key):
+        return os.path.join(self.directory, "{}-{}.pyi".format(module_name, key))
+
+    def get(self, module_name, key):
+        """Return the source of the stub of a module with the given key, or `None` if it is not cached"""
+        if (module_name, key) in self._stubs:
+            return self._stubs[module_name, key]
+        if self.directory is None or not private_directory(self.directory):
+            return None
+        try:
+            with open(self._cache_file(module_name, key)) as f:
+                stub = f.read()
+        except OSError:
+            return None
+        self._stubs[module_name, key] = stub
+        return stub
+
+    def put(self, module_name, key, stub):
+        """Store the source of the stub of a module with the given key"""
+        self._stubs[module_name, key] = stub
+        if self.directory is None or not private_directory(self.directory):
+            return
+        try:
+            temp_file = "{}.{}".format(self._cache_file(module_name, key), os.getpid())
+            with open(temp_file, "w") as f:
+                f.write(stub)
+            os.replace(temp_file, self._cache_file(module_name, key))
+        except OSError:
+            pass  # the cache is only an optimization
+
+
+module_stubs_cache = ModuleStubsCache(inference_config["module_stubs_directory"])
+
+
+def import_statement(node):
+    """Get the source of a top-level import statement"""
+    names = ", ".join(name.name if name.asname is None else "{} as {}".format(name.name, name.asname)
+                      for name in node.names)
+    if isinstance(node, ast.Import):
+        return "import {}".format(names)
+    return "from {} import {}".format(node.module, names)
+
+
+def module_stub(tree, context, model):
+    """Emit the stub of the inferred types of the top-level names of a module
+
+    :param tree: the AST of the module
+    :param context: the context of the module, holding only its own names
+    :param model: the model of the inference
+    :return: the source of the stub, or `None` if some type cannot be expressed as an annotation
+    """
+    from frontend.function_summaries import type_to_annotation
+
+    lines = []
+    imported_names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)) and not (
+                isinstance(node, ast.ImportFrom) and node.module == "typing"):
+            if any(name.name == "*" for name in node.names):
+                return None
+            lines.append(import_statement(node))
+            imported_names.update((name.asname or name.name).split(".")[0] for name in node.names)
+    functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+
+    for name, z3_type in context.types_map.items():
+        if name in imported_names:
+            continue
+        if isinstance(z3_type, (Context, AnnotatedFunction, FunctionSummary)) or hasattr(z3_type, "is_class"):
+            return None
+        value = model.eval(z3_type, model_completion=True)
+        if not value.decl().name().startswith("func_"):
+            annotation = type_to_annotation(value)
+            if annotation is None:
+                return None
+            lines.append("{}: {}".format(name, annotation))
+            continue
+
+        # The first argument of a function type is its number of default arguments
+        annotations = [type_to_annotation(value.arg(i)) for i in range(1, value.num_args())]
+        if None in annotations:
+            return None
+        args_annotations, return_annotation = annotations[:-1], annotations[-1]
+        defaults_count = value.arg(0).as_long()
+        if name in functions and len(functions[name].args.args) == len(args_annotations):
+            args_names = [arg.arg for arg in functions[name].args.args]
+        else:
+            args_names = ["arg_{}".format(i) for i in range(len(args_annotations))]
+        args = ["{}: {}".format(arg_name, annotation) for arg_name, annotation in zip(args_names, args_annotations)]
+        for i in range(len(args) - defaults_count, len(args)):
+            args[i] += " = ..."
+        lines.append("def {}({}) -> {}: ...".format(name, ", ".join(args), return_annotation))
+
+    return "".join(line + "\n" for line in lines)
@@ -0,0 +1,127 @@
+"""Portfolio solving of the type constraints.
+
+Some programs are pathological under the global Z3 parameters of `frontend.z3_types`. In the portfolio mode, the
+same encoding is solved under several configurations of the solver (phase selection, case split, restarts,
+quantifier instantiation and random seeds), each one in its own process. The first conclusive answer wins and the
+other processes are cancelled.
+
+The encoding is passed to the workers in the SMT-LIB format. A model of the winner is then replayed in the solver
+of the inference by assuming the values of the constants of the winning model, which is almost immediate, such that
+the solver has a model as usual. If the constraints are unsatisfiable, the unsat core is extracted by the solver of
+the inference on request, see `TypesSolver.unsat_core`.
+"""
+import multiprocessing
+import queue
+import time
+from collections import Counter
+from frontend.z3_types import maximize_soft, solver_limits  # also sets the base parameters in the workers
+from z3 import *
+
+# Global Z3 parameters overriding the ones of `frontend.z3_types`, in order of preference
+CONFIGURATIONS = [
+    {},
+    {"smt.phase_selection": 5, "smt.random_seed": 1},
+    {"smt.case_split": 1, "smt.random_seed": 2},
+    {"smt.restart_strategy": 1, "smt.qi.eager_threshold": 10, "smt.random_seed": 3},
+    {"smt.phase_selection": 3, "smt.case_split": 5, "smt.random_seed": 4},
+    {"smt.restart_strategy": 2, "smt.qi.eager_threshold": 1000, "smt.random_seed": 5},
+    {"smt.phase_selection": 2, "smt.restart_factor": 1.1, "smt.random_seed": 6},
+    {"smt.case_split": 0, "smt.delay_units": False, "smt.random_seed": 7},
+]
+
+# Number of wins of each configuration, over all the portfolio solves of the process
+wins = Counter()
+
+
+def solve_configuration(index, encoding, soft_names, limits, results):
+    """Solve an encoding under one configuration, in a worker process
+
+    :param index: the index of the configuration in `CONFIGURATIONS`
+    :param encoding: the constraints, in the SMT-LIB format
+    :param soft_names: the names of the literals guarding the soft constraints, see `TypesSolver.add_soft`
+    :param limits: the limits of the "solver" and "optimize" phases, see `frontend.z3_types.solver_limits`
+    :param results: the queue receiving the `(index, result, payload)` triple, where the payload of a sat result
+        is the `(name, value)` pairs of the constants of the model
+    """
+    for name, value in CONFIGURATIONS[index].items():
+        set_param(name, value)
+
+    solver = Solver()
+    solver.set(auto_config=False, mbqi=False, **limits["solver"])
+    solver.add(list(parse_smt2_string(encoding)))
+    check = solver.check()
+    if check != sat:
+        results.put((index, str(check), None))
+        return
+
+    model = maximize_soft(solver, [Bool(name) for name in soft_names], limits["optimize"])
+    results.put((index, "sat", [(decl.name(), model[decl].sexpr()) for decl in model.decls() if decl.arity() == 0]))
+
+
+def replay_model(solver, values):
+    """Check the constraints of the solver assuming the values of a model found by a worker"""
+    decls = {name: const.decl() for name, const in solver.consts.items()}
+    sort = solver.z3_types.type_sort
+    for i in range(sort.num_constructors()):
+        decls[sort.constructor(i).name()] = sort.constructor(i)
+    equalities = "".join("(assert (= {} {}))".format(name, value) for name, value in values if name in decls)
+    assumptions = list(parse_smt2_string(equalities, decls=decls, ctx=solver.ctx))
+    return Solver.check(solver, assumptions)
+
+
+def solve_portfolio(solver, size):
+    """Solve the constraints of a `TypesSolver` under `size` configurations in parallel
+
+    :return: the result of the hard constraints, with the model of the winner available in `solver`,
+        or `None` if no configuration gave a conclusive answer
+    """
+    encoder = Solver(ctx=solver.ctx)
+    encoder.add(solver.assertions())
+    soft_names = [str(literal) for literal in solver.soft_literals]
+    limits = {phase: solver_limits(phase) for phase in ("solver", "optimize")}
+
+    mp_context = multiprocessing.get_context("spawn")
+    results = mp_context.Queue()
+    processes = [mp_context.Process(target=solve_configuration,
+                                    args=(index, encoder.sexpr(), soft_names, limits, results))
+                 for index in range(min(size, len(CONFIGURATIONS)))]
+    for process in processes:
+        process.start()
+
+    start_time = time.time()
+    answer = None
+    try:
+        remaining = len(processes)
+        while remaining and answer is None:
+            try:
+                index, result, payload = results.get(timeout=1)
+            except queue.Empty:
+                remaining = sum(process.is_alive() for process in processes)
+                continue
+            remaining -= 1
+            if result != "unknown":
+                answer = index, result, payload
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    if answer is None:
+        return None
+    index, result, payload = answer
+    if result == "sat":
+        check = replay_model(solver, payload)
+        if check != sat:
+            return None
+    else:
+        check = unsat
+    wins[index] += 1
+    solver.portfolio_winner = (index, CONFIGURATIONS[index], time.time() - start_time)
+    return check
+
+
+def report():
+    """Format the win statistics of the configurations"""
+    return "\n".join("{}: {} wins {}".format(index, wins[index], configuration)
+                     for index, configuration in enumerate(CONFIGURATIONS))
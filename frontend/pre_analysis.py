@@ -1,16 +1,19 @@
 from collections import OrderedDict
+from frontend.config import config as inference_config
 from frontend.constants import BUILTINS
 from frontend.import_handler import ImportHandler
 import ast
+import hashlib
 
 
 class PreAnalyzer:
     """Analyzer for the AST, It provides the following configurations before the type inference:
-        - The maximum args length of functions in the whole program
-        - The maximum tuple length in the whole program
+        - The args lengths of functions in the whole program
+        - The tuple lengths in the whole program
         - All the used names (variables, functions, classes, etc.) in the program,
             to be used in inferring relevant stub functions.
         - Class and instance attributes
+        - The call graph of the top-level functions, and which of them can be inferred separately
     """
 
     def __init__(self, prog_ast, base_folder, stubs_handler):
@@ -19,6 +22,8 @@ class PreAnalyzer:
         """
         # List all the nodes existing in the AST
         self.base_folder = base_folder
+        self.prog_ast = prog_ast
+        self.stubs_digest = stubs_handler.digest
         self.all_nodes = self.walk(prog_ast)
 
         # Pre-analyze only used constructs from the stub files.
@@ -28,59 +33,69 @@ class PreAnalyzer:
         for stub_ast in stub_asts:
             self.stub_nodes += list(ast.walk(stub_ast))
 
-    def walk(self, prog_ast):
+    def walk(self, prog_ast, visited=None):
+        """Get the nodes of an AST and of the ASTs of the modules it imports, each module being walked once
+
+        :param visited: the names of the modules already walked
+        """
+        visited = set() if visited is None else visited
         result = list(ast.walk(prog_ast))
         import_nodes = [node for node in result if isinstance(node, ast.Import)]
         import_from_nodes = [node for node in result if isinstance(node, ast.ImportFrom)]
-        for node in import_nodes:
-            for name in node.names:
-                if ImportHandler.is_builtin(name.name):
-                    new_ast = ImportHandler.get_builtin_ast(name.name)
-                else:
-                    new_ast = ImportHandler.get_module_ast(name.name, self.base_folder)
-                result += self.walk(new_ast)
-        for node in import_from_nodes:
-            if node.module == "typing":
-                # FIXME ignore typing for now, not to break type vars
+        module_names = [name.name for node in import_nodes for name in node.names]
+        # FIXME ignore typing for now, not to break type vars
+        module_names += [node.module for node in import_from_nodes if node.module != "typing"]
+        for module_name in module_names:
+            if module_name in visited:
                 continue
-            if ImportHandler.is_builtin(node.module):
-                new_ast = ImportHandler.get_builtin_ast(node.module)
+            visited.add(module_name)
+            if ImportHandler.is_builtin(module_name):
+                new_ast = ImportHandler.get_builtin_ast(module_name)
             else:
-                new_ast = ImportHandler.get_module_ast(node.module, self.base_folder)
-            result += self.walk(new_ast)
+                new_ast = ImportHandler.get_module_ast(module_name, self.base_folder)
+            result += self.walk(new_ast, visited)
 
         return result
 
+    def imported_modules(self):
+        """Get the names of the modules of the program (not the built-in ones) imported by the AST"""
+        return ImportHandler.imported_modules(self.prog_ast)
+
     def add_stub_ast(self, tree):
         """Add an AST of a stub file to the pre-analyzer"""
         self.stub_nodes += list(ast.walk(tree))
 
-    def maximum_function_args(self):
-        """Get the maximum number of function arguments appearing in the AST"""
-        user_func_defs = [node for node in self.all_nodes if isinstance(node, ast.FunctionDef)]
-        stub_func_defs = [node for node in self.stub_nodes if isinstance(node, ast.FunctionDef)]
-
-        # A minimum value of 1 because a default __init__ with one argument function
-        # is added to classes that doesn't contain one
-        user_func_max = max([len(node.args.args) for node in user_func_defs] + [1])
-        stub_func_max = max([len(node.args.args) for node in stub_func_defs] + [1])
-
-        return max(user_func_max, stub_func_max)
+    def function_arities(self):
+        """Get the numbers of function arguments appearing in the AST and in the relevant stubs"""
+        arities = set()
+        for node in self.all_nodes + self.stub_nodes:
+            if isinstance(node, ast.FunctionDef):
+                arities.add(len(node.args.args))
+            elif isinstance(node, ast.ClassDef):
+                # A default __init__ with one argument function is added to classes that doesn't contain one
+                arities.add(1)
+            elif is_annotation(node, "Callable"):
+                args_annotations = annotation_args(node)
+                if isinstance(args_annotations, ast.Tuple) and args_annotations.elts and \
+                        isinstance(args_annotations.elts[0], ast.List):
+                    arities.add(len(args_annotations.elts[0].elts))
+        return sorted(arities)
 
     def max_default_args(self):
         """Get the maximum number of default arguments appearing in all function definitions"""
         func_defs = [node for node in self.all_nodes if isinstance(node, ast.FunctionDef)]
         return max([len(node.args.defaults) for node in func_defs] + [0])
 
-    def maximum_tuple_length(self):
-        """Get the maximum length of tuples appearing in the AST"""
-        user_tuples = [node for node in self.all_nodes if isinstance(node, ast.Tuple)]
-        stub_tuples = [node for node in self.stub_nodes if isinstance(node, ast.Tuple)]
-
-        user_max = max([len(node.elts) for node in user_tuples] + [0])
-        stub_tuples = max([len(node.elts) for node in stub_tuples] + [0])
-
-        return max(user_max, stub_tuples)
+    def tuple_lengths(self):
+        """Get the lengths of tuples appearing in the AST and in the relevant stubs"""
+        lengths = {0}  # the empty tuple is used as the type of empty tuple annotations
+        for node in self.all_nodes + self.stub_nodes:
+            if isinstance(node, ast.Tuple):
+                lengths.add(len(node.elts))
+            elif is_annotation(node, "Tuple") and not isinstance(annotation_args(node), ast.Tuple):
+                # Tuple annotation with a single type, ex: Tuple[int]
+                lengths.add(1)
+        return sorted(lengths)
 
     def get_all_used_names(self):
         """Get all used variable names and used-defined classes names"""
@@ -90,6 +105,52 @@ class PreAnalyzer:
         names += [node.name for node in self.all_nodes if isinstance(node, ast.alias)]
         return names
 
+    def call_graph(self):
+        """Get the call graph of the top-level functions of the program
+
+        Return a mapping from the names of the top-level functions, in program order,
+        to the names of the top-level functions they refer to.
+        """
+        functions = [node for node in self.prog_ast.body if isinstance(node, ast.FunctionDef)]
+        names = {node.name for node in functions}
+        graph = OrderedDict()
+        for node in functions:
+            graph[node.name] = free_names(node) & names
+        return graph
+
+    def add_function_summary_keys(self, call_graph):
+        """Mark the top-level functions of the program which can be inferred separately from their callers
+
+        A function can be inferred separately if it is only used in calls, and if its body only refers to its own
+        variables, to built-ins and to functions which can be inferred separately themselves.
+        Every such function definition gets a `summary_key` attribute, hashing its source together with
+        the keys of the functions it calls and the version of the stubs, and a `summary_callees` attribute, holding
+        the definitions of the functions it calls. The keys are computed in the dependency order of the call graph,
+        such that a function may call functions defined after it, but not recursive functions.
+        """
+        nodes = list(ast.walk(self.prog_ast))
+        called = {id(node.func) for node in nodes if isinstance(node, ast.Call)}
+        # Names used as values, or bound more than once
+        excluded = {node.id for node in nodes if isinstance(node, ast.Name) and id(node) not in called}
+        definitions = [node.name for node in nodes if isinstance(node, (ast.FunctionDef, ast.ClassDef))]
+        excluded |= {name for name in definitions if definitions.count(name) > 1}
+        excluded |= {(node.asname or node.name).split(".")[0] for node in nodes if isinstance(node, ast.alias)}
+        module_names = bound_names(self.prog_ast.body)
+
+        functions = {node.name: node for node in self.prog_ast.body if isinstance(node, ast.FunctionDef)}
+        keys = {}
+        for name in dependency_order(call_graph):
+            node = functions[name]
+            if name in excluded or not is_self_contained(node):
+                continue
+            callees = call_graph[name]
+            if (free_names(node) & module_names) - callees or not callees <= keys.keys():
+                continue
+            source = [ast.dump(node), self.stubs_digest, str(inference_config["function_summary_candidates"])]
+            source += sorted(keys[callee] for callee in callees)
+            keys[name] = node.summary_key = hashlib.sha256("\n".join(source).encode()).hexdigest()
+            node.summary_callees = [functions[callee] for callee in sorted(callees)]
+
     def analyze_classes(self):
         """Pre-analyze and configure classes before the type inference
         
@@ -174,8 +235,8 @@ class PreAnalyzer:
 
     def get_all_configurations(self):
         config = Configuration()
-        config.max_tuple_length = self.maximum_tuple_length()
-        config.max_function_args = self.maximum_function_args()
+        config.tuple_lengths = self.tuple_lengths()
+        config.function_arities = self.function_arities()
         config.base_folder = self.base_folder
 
         class_analysis = self.analyze_classes()
@@ -190,20 +251,23 @@ class PreAnalyzer:
 
         config.complete_class_to_base()
 
+        config.call_graph = self.call_graph()
+
         return config
 
 
 class Configuration:
     """A class holding configurations given by the pre-analyzer"""
     def __init__(self):
-        self.max_tuple_length = 0
-        self.max_function_args = 1
+        self.tuple_lengths = [0]
+        self.function_arities = [0, 1]
         self.classes_to_attrs = OrderedDict()
         self.class_to_base = OrderedDict()
         self.base_folder = ""
         self.used_names = []
         self.max_default_args = 0
         self.all_classes = {}
+        self.call_graph = OrderedDict()
 
     def complete_class_to_base(self):
         """
@@ -214,11 +278,11 @@ class Configuration:
         it contains tuples containing the Z3-level class name and subsequently the names
         of the accessor functions for the arguments.
 
-        To be executed after max_tuple_length and max_function_args have been set.
+        To be executed after tuple_lengths and function_arities have been set.
         """
         builtins = dict(BUILTINS)
 
-        for cur_len in range(self.max_tuple_length + 1):
+        for cur_len in self.tuple_lengths:
             name = 'tuple_' + str(cur_len)
             tuple_args = []
             for cur_arg in range(cur_len):
@@ -228,7 +292,7 @@ class Configuration:
                 builtins[tuple([name] + tuple_args)] = 'tuple'
             else:
                 builtins[name] = 'tuple'
-        for cur_len in range(self.max_function_args + 1):
+        for cur_len in self.function_arities:
             name = 'func_' + str(cur_len)
             func_args = [name + '_defaults_args']
             for cur_arg in range(cur_len):
@@ -244,6 +308,87 @@ class Configuration:
         return
 
 
+def bound_names(stmts):
+    """Get the names bound by the given statements, without entering nested function and class definitions"""
+    names = set()
+    to_visit = list(stmts)
+    while to_visit:
+        node = to_visit.pop()
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            names.add(node.name)
+            continue
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, ast.alias):
+            names.add((node.asname or node.name).split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        to_visit += list(ast.iter_child_nodes(node))
+    return names
+
+
+def dependency_order(graph):
+    """Order the nodes of a graph such that every node comes after the nodes it refers to
+
+    The nodes in a cycle, including a node referring to itself, and the nodes referring to them are left out.
+
+    :param graph: a mapping from the nodes to the sets of nodes they refer to
+    """
+    order = []
+    ordered = {}  # node -> whether it is ordered, False while it is visited
+
+    def visit(node):
+        if node in ordered:
+            return ordered[node]
+        ordered[node] = False
+        # every successor is visited, to order it even if another one is in a cycle
+        acyclic = all([visit(successor) for successor in sorted(graph[node])])
+        ordered[node] = acyclic
+        if acyclic:
+            order.append(node)
+        return acyclic
+
+    for node in graph:
+        visit(node)
+    return order
+
+
+def free_names(func_def):
+    """Get the names which are used in a function definition, but not bound in the function"""
+    used = {node.id for node in ast.walk(func_def) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)}
+    return used - bound_names(func_def.body) - {arg.arg for arg in func_def.args.args}
+
+
+def is_self_contained(func_def):
+    """Check if the variables of a function definition are all local
+
+    Nested definitions, imports, global and nonlocal declarations, and generators are not supported.
+    Attribute accesses are only supported on literals: the function is solved without the classes of the program,
+    thus the type of another receiver could be a class of the program which defines the attribute.
+    """
+    for node in ast.walk(func_def):
+        if node is func_def:
+            continue
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Lambda, ast.Import, ast.ImportFrom,
+                             ast.Global, ast.Nonlocal, ast.Yield, ast.YieldFrom)):
+            return False
+        if isinstance(node, ast.Attribute) and not isinstance(node.value, (ast.Num, ast.Str, ast.Bytes,
+                                                                          ast.JoinedStr)):
+            return False
+    return True
+
+
+def is_annotation(node, name):
+    """Check if the node is a subscript annotation of the given generic type, ex: Tuple[int, str]"""
+    return isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == name
+
+
+def annotation_args(node):
+    """Return the arguments of a subscript annotation"""
+    # The arguments are wrapped in an Index node before Python 3.9
+    return node.slice.value if isinstance(node.slice, ast.Index) else node.slice
+
+
 def propagate_attributes_to_subclasses(class_defs):
     """Start depth-first methods propagation from inheritance roots to subclasses"""
     inheritance_forest = get_inheritance_forest(class_defs)
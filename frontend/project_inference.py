@@ -0,0 +1,191 @@
+"""Project-level type inference, inferring independent modules in parallel.
+
+The import graph of the modules is built from their import statements, see `ImportHandler.imported_modules`. Every module is inferred in its own process, hence
+with its own Z3 context, as soon as the modules it imports are inferred. The inferred types of the top-level names
+of a module are then emitted as a stub and passed to its importers, which use them as annotated facts instead of
+inferring the imported module again (see `module_stubs`). Imported modules whose types cannot be passed, e.g. because
+they define classes, or which could not be inferred, are still inferred inside their importers.
+
+The stubs are cached across runs: a module whose stub is cached under its current key, i.e. whose source and
+dependencies did not change, is not inferred again.
+
+Usage: python -m frontend.project_inference <folder> [--processes N] [--timeout SECONDS]
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import queue
+import time
+from collections import OrderedDict
+from frontend.context import Context
+from frontend.import_handler import ImportHandler
+from frontend.module_stubs import module_stub, module_stubs_cache
+from frontend.stubs.stubs_handler import StubsHandler
+
+
+class ModuleResult:
+    """Result of the type inference of one module"""
+    def __init__(self, status, solve_time=0.0, total_time=0.0, stub=None, message=""):
+        """
+        :param status: one of "sat", "unsat", "timeout", "error" or "cached"
+        :param solve_time: the time taken by the solver, in seconds
+        :param total_time: the time taken by the whole inference of the module, in seconds
+        :param stub: the stub of the types of the top-level names of the module, if they can be passed to importers
+        :param message: the error message, if any
+        """
+        self.status = status
+        self.solve_time = solve_time
+        self.total_time = total_time
+        self.stub = stub
+        self.message = message
+
+
+def infer_module(base_folder, module_name, key, imported_types, results):
+    """Infer the types of a module, in a worker process, and cache its stub
+
+    :param key: the key of the stub of the module, see `ImportHandler.module_key`
+    :param imported_types: the stubs of the modules imported by the module which were inferred separately
+    :param results: the queue receiving the `(module name, result)` pair
+    """
+    from frontend.stmt_inferrer import infer
+    from frontend.z3_types import TypesSolver, sat, unsat
+
+    start_time = time.time()
+    try:
+        tree = ImportHandler.get_module_ast(module_name, base_folder)
+        solver = TypesSolver(tree, base_folder=base_folder)
+        solver.imported_types = imported_types
+        solver.importing.append(module_name)  # the module is imported back by the modules of its import cycle
+        # The stubs are inferred in a parent context, such that the context of the module only has its own names
+        stubs_context = Context()
+        solver.infer_stubs(stubs_context, infer)
+        context = Context(name=module_name, parent_context=stubs_context)
+        for stmt in tree.body:
+            infer(stmt, context, solver)
+
+        solve_start_time = time.time()
+        check = solver.solve()
+        solve_time = time.time() - solve_start_time
+        if check == sat:
+            stub = module_stub(tree, context, solver.model())
+            if stub is not None:
+                module_stubs_cache.put(module_name, key, stub)
+            result = ModuleResult("sat", solve_time, stub=stub)
+        else:
+            result = ModuleResult("unsat" if check == unsat else "timeout", solve_time)
+    except Exception as e:
+        result = ModuleResult("error", message="{}: {}".format(type(e).__name__, e))
+    result.total_time = time.time() - start_time
+    results.put((module_name, result))
+
+
+def import_graph(base_folder, module_names):
+    """Get the modules of the program imported by each module, and the keys of their stubs
+
+    :return: a mapping from the module names to the names of the modules they import, a mapping from the module
+        names to the keys of their stubs, and a mapping from the module names which cannot be parsed to their
+        error
+    """
+    stubs_handler = StubsHandler()
+    graph = OrderedDict()
+    keys = {}
+    errors = OrderedDict()
+    for module_name in module_names:
+        try:
+            tree = ImportHandler.get_module_ast(module_name, base_folder)
+            graph[module_name] = [name for name in ImportHandler.imported_modules(tree) if name in module_names]
+            keys[module_name] = ImportHandler.module_key(module_name, base_folder, stubs_handler.digest)
+        except Exception as e:
+            graph.pop(module_name, None)
+            errors[module_name] = "{}: {}".format(type(e).__name__, e)
+    return graph, keys, errors
+
+
+def infer_project(base_folder, module_names=None, processes=None, timeout=None):
+    """Infer the types of the modules of a project in parallel
+
+    :param base_folder: the folder containing the modules
+    :param module_names: the names of the modules to infer, all the modules of the folder by default
+    :param processes: the maximum number of modules inferred at the same time, the number of CPUs by default
+    :param timeout: the maximum time for inferring a module, in seconds
+    :return: a mapping from the module names to their `ModuleResult`
+    """
+    if module_names is None:
+        module_names = sorted(os.path.basename(path)[:-3] for path in glob.glob(os.path.join(base_folder, "*.py"))
+                              if os.path.basename(path) != "__init__.py")
+    processes = processes or os.cpu_count() or 1
+    graph, keys, errors = import_graph(base_folder, module_names)
+    results = OrderedDict((module_name, ModuleResult("error", message=message))
+                          for module_name, message in errors.items())
+    for module_name in graph:
+        stub = module_stubs_cache.get(module_name, keys[module_name])
+        if stub is not None:
+            results[module_name] = ModuleResult("cached", stub=stub)
+
+    # Spawn fresh worker processes, such that each of them has its own Z3 context
+    mp_context = multiprocessing.get_context("spawn")
+    results_queue = mp_context.Queue()
+    pending = OrderedDict((name, imports) for name, imports in graph.items() if name not in results)
+    running = {}  # module name -> (process, start time)
+
+    while pending or running:
+        # A module is ready once the modules it imports are inferred.
+        # If no module is ready (import cycles), the first pending module is inferred with the available types:
+        # the other modules of its cycle are inferred inside it, and see its names with unknown types.
+        ready = [name for name, imports in pending.items() if all(imported in results for imported in imports)]
+        if not ready and not running:
+            ready = [next(iter(pending))]
+        for module_name in ready[:processes - len(running)]:
+            # The types of the modules imported indirectly are needed for deep module access
+            imported_types = {name: result.stub for name, result in results.items() if result.stub is not None}
+            process = mp_context.Process(target=infer_module, args=(base_folder, module_name, keys[module_name],
+                                                                    imported_types, results_queue))
+            process.start()
+            running[module_name] = (process, time.time())
+            del pending[module_name]
+
+        try:
+            module_name, result = results_queue.get(timeout=1)
+            if module_name in running:  # otherwise the module already timed out
+                running.pop(module_name)[0].join()
+                results[module_name] = result
+        except queue.Empty:
+            pass
+
+        for module_name, (process, start_time) in list(running.items()):
+            elapsed_time = time.time() - start_time
+            if timeout is not None and elapsed_time > timeout:
+                process.terminate()
+                process.join()
+                del running[module_name]
+                results[module_name] = ModuleResult("timeout", total_time=elapsed_time)
+            elif not process.is_alive() and results_queue.empty():
+                # The worker crashed without reporting a result
+                process.join()
+                del running[module_name]
+                results[module_name] = ModuleResult("error", total_time=elapsed_time,
+                                                    message="Exit code {}".format(process.exitcode))
+
+    return results
+
+
+def report(results):
+    """Format the results of a project inference, the slowest modules first"""
+    lines = []
+    for module_name, result in sorted(results.items(), key=lambda item: -item[1].total_time):
+        line = "{}: {} (solved in {:.2f} seconds, inferred in {:.2f} seconds)".format(
+            module_name, result.status, result.solve_time, result.total_time)
+        if result.message:
+            line += " {}".format(result.message)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Infer the types of the modules of a folder in parallel.")
+    parser.add_argument("folder", help="the folder containing the modules")
+    parser.add_argument("--processes", type=int, help="the maximum number of modules inferred at the same time")
+    parser.add_argument("--timeout", type=float, help="the maximum time for inferring a module, in seconds")
+    arguments = parser.parse_args()
+    print(report(infer_project(arguments.folder, processes=arguments.processes, timeout=arguments.timeout)))
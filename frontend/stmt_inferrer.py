@@ -28,6 +28,7 @@ import sys
 
 from frontend.config import config as inference_config
 from frontend.context import Context, AnnotatedFunction
+from frontend.function_summaries import infer_summary
 from frontend.import_handler import ImportHandler
 
 
@@ -85,7 +86,7 @@ def _infer_assignment_target(target, context, value_type, solver):
     target_type = _infer_one_target(target, context, solver)
     solver.add(axioms.assignment(target_type, value_type, solver.z3_types),
                fail_message="Assignment in line {}".format(target.lineno))
-    solver.optimize.add_soft(target_type == value_type)
+    solver.add_soft(target_type == value_type)
 
 
 def _is_type_var_declaration(node):
@@ -227,8 +228,8 @@ def _infer_control_flow(node, context, solver):
             solver.add(branch_axioms,
                        fail_message="subtyping in flow branching in line {}".format(node.lineno))
 
-            solver.optimize.add_soft(t1 == var_type)
-            solver.optimize.add_soft(t2 == var_type)
+            solver.add_soft(t1 == var_type)
+            solver.add_soft(t2 == var_type)
             context.set_type(v, var_type)
 
     if hasattr(node, "test"):
@@ -237,8 +238,8 @@ def _infer_control_flow(node, context, solver):
     result_type = solver.new_z3_const("control_flow")
     solver.add(axioms.control_flow(body_type, else_type, result_type, solver.z3_types),
                fail_message="Control flow in line {}".format(node.lineno))
-    solver.optimize.add_soft(result_type == body_type)
-    solver.optimize.add_soft(result_type == else_type)
+    solver.add_soft(result_type == body_type)
+    solver.add_soft(result_type == else_type)
     return result_type
 
 
@@ -287,9 +288,9 @@ def _infer_try(node, context, solver):
 
     solver.add(axioms.try_except(body_type, else_type, final_type, result_type, solver.z3_types),
                fail_message="Try/Except block in line {}".format(node.lineno))
-    solver.optimize.add_soft(result_type == body_type)
-    solver.optimize.add_soft(result_type == else_type)
-    solver.optimize.add_soft(result_type == final_type)
+    solver.add_soft(result_type == body_type)
+    solver.add_soft(result_type == else_type)
+    solver.add_soft(result_type == final_type)
 
     # TODO: Infer exception handlers as classes
 
@@ -335,7 +336,7 @@ def _infer_args_defaults(args_types, defaults, context, solver):
         default_type = expr.infer(default, context, solver)
         solver.add(solver.z3_types.subtype(default_type, args_types[arg_idx]),
                    fail_message="Function default argument in line {}".format(defaults[i].lineno))
-        solver.optimize.add_soft(default_type == args_types[arg_idx])
+        solver.add_soft(default_type == args_types[arg_idx])
 
 
 def is_annotated(node):
@@ -415,6 +416,13 @@ def _infer_func_def(node, context, solver):
             context.set_type(node.name, AnnotatedFunction(args_annotations, return_annotation, defaults_count))
         return
 
+    if solver.modular and hasattr(node, "summary_key"):
+        # The function is inferred separately, its callers use its summary if it has one
+        summary = infer_summary(node, context, solver, infer)
+        if summary is not None:
+            context.set_type(node.name, summary)
+            return
+
     func_context, args_types = _init_func_context(node.name, node.args.args, context, solver)
     result_type = solver.new_z3_const("func")
     result_type.args_count = len(node.args.args)
@@ -464,7 +472,7 @@ def _infer_class_def(node, context, solver):
         func_type = class_context.get_type(func_name)
         arg_accessor = getattr(solver.z3_types.type_sort, "func_{}_arg_1".format(args_count))
         solver.add(arg_accessor(func_type) == instance_type,
-                   fail_message="First arg in class methods has class instance type")
+                   fail_message="First arg in class methods has class instance type in line {}".format(node.lineno))
 
     class_type = solver.z3_types.type(instance_type)
     solver.add(result_type == class_type, fail_message="Class definition in line {}".format(node.lineno))
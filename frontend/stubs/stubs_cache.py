@@ -0,0 +1,152 @@
+"""Process-wide cache of parsed stub files.
+
+Every stub file is parsed at most once per process and once per version of its source: the parsed AST is serialized
+to disk, in a file keyed by the hash of the source, and reused by later processes. In memory, an entry is revalidated
+against the modification time of the file.
+
+Since the serialized ASTs are loaded with `pickle`, the cache folder must only be writable by the current user: it is
+created with mode 0700, and it is not used if it is owned by another user or writable by others. A cache file which
+cannot be loaded is a cache miss, the stub is parsed again and the file is overwritten.
+
+Each request returns a fresh copy of the AST, such that the inference can annotate and extend its nodes
+(e.g. with `method_type`) without affecting other users of the cache.
+"""
+import ast
+import hashlib
+import os
+import pickle
+import sys
+from frontend.config import config
+
+# Category of each kind of top-level definition, in the order in which the relevant nodes are inferred
+FUNCTION_DEF, CLASS_DEF, TYPE_VAR, ASSIGN = range(4)
+
+
+def private_directory(directory):
+    """Create a cache folder only accessible by the current user, if it does not exist yet
+
+    :return: whether the folder can be used, i.e. it is owned by the current user and not accessible by others
+    """
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        status = os.stat(directory)
+    except OSError:
+        return False
+    if hasattr(os, "getuid") and status.st_uid != os.getuid():
+        return False
+    return status.st_mode & 0o077 == 0
+
+
+def definitions_index(tree):
+    """Build a lookup index from the names defined in a stub to the positions of their definitions
+
+    The index maps every name to a list of `(category, position)` pairs, where `position` is the index of the
+    definition in the body of the module. TypeVar definitions are needed regardless of the used names,
+    and are indexed under the name `None`.
+    """
+    index = {}
+    for position, node in enumerate(tree.body):
+        if isinstance(node, ast.FunctionDef):
+            index.setdefault(node.name, []).append((FUNCTION_DEF, position))
+        elif isinstance(node, ast.ClassDef):
+            index.setdefault(node.name, []).append((CLASS_DEF, position))
+        elif isinstance(node, ast.Assign):
+            if (isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name) and
+                    node.value.func.id == "TypeVar"):
+                index.setdefault(None, []).append((TYPE_VAR, position))
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    index.setdefault(target.id, []).append((ASSIGN, position))
+    return index
+
+
+class StubsCache:
+    """Cache of parsed stub files, shared by all the type inferences of a process"""
+
+    def __init__(self, directory=None):
+        """
+        :param directory: the folder holding the serialized ASTs, or `None` to cache only in memory
+        """
+        self.directory = directory
+        self._private = None  # whether the folder was checked to be private, see `private_directory`
+        self._entries = {}  # path -> (mtime, source hash, serialized AST, definitions index)
+
+    def _cache_file(self, digest):
+        # The serialized AST depends on the version of the `ast` module
+        return os.path.join(self.directory, "{}-py{}{}.ast".format(digest, *sys.version_info[:2]))
+
+    def _usable(self):
+        if self.directory is None:
+            return False
+        if self._private is None:
+            self._private = private_directory(self.directory)
+        return self._private
+
+    def _read(self, digest):
+        if not self._usable():
+            return None
+        try:
+            with open(self._cache_file(digest), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, digest, serialized):
+        if not self._usable():
+            return
+        try:
+            # Write to a temporary file first, such that concurrent processes never read a partial file
+            temp_file = "{}.{}".format(self._cache_file(digest), os.getpid())
+            with open(temp_file, "wb") as f:
+                f.write(serialized)
+            os.replace(temp_file, self._cache_file(digest))
+        except OSError:
+            pass  # the cache is only an optimization
+
+    def _entry(self, path):
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry
+
+        with open(path, "rb") as f:
+            source = f.read()
+        digest = hashlib.sha256(source).hexdigest()
+        serialized = self._read(digest)
+        tree = None
+        if serialized is not None:
+            try:
+                tree = pickle.loads(serialized)
+            except Exception:
+                tree = None  # a truncated or corrupt cache file is a cache miss
+            if not isinstance(tree, ast.Module):
+                tree = None
+        if tree is None:
+            tree = ast.parse(source, path)
+            serialized = pickle.dumps(tree, pickle.HIGHEST_PROTOCOL)
+            self._write(digest, serialized)
+        entry = (mtime, digest, serialized, definitions_index(tree))
+        self._entries[path] = entry
+        return entry
+
+    def get_ast(self, path):
+        """Return a fresh copy of the AST of the file in `path`
+
+        :raises FileNotFoundError: if the file does not exist
+        """
+        return pickle.loads(self._entry(path)[2])
+
+    def get_index(self, path):
+        """Return the definitions index of the file in `path`, see `definitions_index`
+
+        The index is shared and must not be modified.
+        """
+        return self._entry(path)[3]
+
+    def get_digest(self, path):
+        """Return the hash of the source of the file in `path`"""
+        return self._entry(path)[1]
+
+
+stubs_cache = StubsCache(config["stubs_cache_directory"])
@@ -1,5 +1,6 @@
-import ast
 import frontend.stubs.stubs_paths as paths
+import hashlib
+from frontend.stubs.stubs_cache import definitions_index, stubs_cache
 
 
 class StubsHandler:
@@ -8,25 +9,31 @@ class StubsHandler:
         self.methods_asts = []
         self.lib_asts = {}
 
+        # The stub files are parsed once per process, every handler gets its own copy of the ASTs
         classes_and_functions_files = paths.classes_and_functions
         for file in classes_and_functions_files:
-            r = open(file)
-            tree = ast.parse(r.read())
-            r.close()
-            self.asts.append(tree)
+            self.asts.append(self.get_ast(file))
 
         for method in paths.methods:
-            r = open(method["path"])
-            tree = ast.parse(r.read())
-            r.close()
+            tree = self.get_ast(method["path"])
             tree.method_type = method["type"]
             self.methods_asts.append(tree)
 
         for lib in paths.libraries:
-            r = open(paths.libraries[lib])
-            tree = ast.parse(r.read())
-            r.close()
-            self.lib_asts[lib] = tree
+            self.lib_asts[lib] = self.get_ast(paths.libraries[lib])
+
+        # Hash of all the stub files, identifying the version of the stubs
+        all_files = classes_and_functions_files + [method["path"] for method in paths.methods] + \
+            list(paths.libraries.values())
+        self.digest = hashlib.sha256("".join(stubs_cache.get_digest(file) for file in all_files).encode()).hexdigest()
+
+    @staticmethod
+    def get_ast(path):
+        """Get a fresh copy of the AST of a stub file, with its path and the index of its definitions"""
+        tree = stubs_cache.get_ast(path)
+        tree.path = path
+        tree.definitions = stubs_cache.get_index(path)
+        return tree
 
     @staticmethod
     def infer_file(tree, context, solver, used_names, infer_func, method_type=None):
@@ -40,37 +47,29 @@ class StubsHandler:
             for node in relevant_nodes:
                 node.method_type = method_type
 
-        for stmt in relevant_nodes:
-            infer_func(stmt, context, solver)
+        # The constraints of the stub file are grouped apart from the ones of the program, see `TypesSolver.add`
+        source, solver.source = solver.source, tree.path
+        try:
+            for stmt in relevant_nodes:
+                infer_func(stmt, context, solver)
+        finally:
+            solver.source = source
 
     @staticmethod
     def get_relevant_nodes(tree, used_names):
-        """Get relevant nodes (which are used in the program) from the given AST `tree`"""
-        # Function definitions
-        relevant_nodes = [node for node in tree.body
-                          if (isinstance(node, ast.FunctionDef) and
-                              node.name in used_names)]
-
-        # Class definitions
-        relevant_nodes += [node for node in tree.body
-                           if (isinstance(node, ast.ClassDef) and
-                               node.name in used_names)]
-
-        # TypeVar definitions
-        relevant_nodes += [node for node in tree.body
-                           if (isinstance(node, ast.Assign) and
-                               isinstance(node.value, ast.Call) and
-                               isinstance(node.value.func, ast.Name) and
-                               node.value.func.id == "TypeVar")]
-
-        # Variable assignments
-        # For example, math package has `pi` declaration as pi = 3.14...
-        relevant_nodes += [node for node in tree.body
-                           if (isinstance(node, ast.Assign) and
-                               any([isinstance(x, ast.Name) and
-                                    x.id in used_names for x in node.targets]))]
+        """Get relevant nodes (which are used in the program) from the given AST `tree`
 
-        return relevant_nodes
+        The relevant nodes are the function, class and variable definitions of the used names,
+        and all TypeVar definitions.
+        """
+        index = getattr(tree, "definitions", None) or definitions_index(tree)
+        positions = set(index.get(None, []))
+        for name in set(used_names):
+            positions.update(index.get(name, []))
+
+        # Function definitions, then class definitions, TypeVar definitions and variable assignments
+        # For example, math package has `pi` declaration as pi = 3.14...
+        return [tree.body[position] for _, position in sorted(positions)]
 
     def get_relevant_ast_nodes(self, used_names):
         """Get the AST nodes which are used in the whole program stubs.
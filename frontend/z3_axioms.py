@@ -184,7 +184,9 @@ def index(indexed, ind, result, types):
     # Tuple indexing
     # Assert that 'indexed' can be a tuple of an arbitrary length, where the result is the super-type of its elements.
     t = []
-    for cur_len in range(1, len(types.tuples)):
+    for cur_len in types.tuples:
+        if cur_len == 0:
+            continue
         tuple_args = [getattr(types.type_sort, "tuple_{}_arg_{}".format(cur_len, i + 1))(indexed)
                       for i in range(cur_len)]
         t.append(And(
@@ -374,7 +376,8 @@ def instance_axioms(called, args, result, types):
     with the __init__ function of every call
     """
 
-    if len(args) + 1 >= len(types.funcs):  # Instantiating a class with more number of args than the max possible number
+    if len(args) + 1 > max(types.funcs, default=-1):
+        # Instantiating a class with more number of args than the max possible number
         return []
 
     # Assert with __init__ function of all classes in the program
@@ -392,7 +395,9 @@ def function_call_axioms(called, args, result, types):
     defaults count for the function matches the inferred one.
     """
     axioms = []
-    for i in range(len(args), len(types.funcs)):  # Only assert with functions with length >= call arguments length
+    for i in types.funcs:
+        if i < len(args):  # Only assert with functions with length >= call arguments length
+            continue
         rem_args = i - len(args)  # The remaining arguments are expected to have default value in the func definition.
         if rem_args > types.config.max_default_args:
             break
@@ -4,9 +4,11 @@ Limitations:
     - Multiple inheritance is not supported.
     - Functions with generic type variables are not supported.
 """
+import time
 from collections import OrderedDict
 from frontend.annotation_resolver import AnnotationResolver
 from frontend.class_node import ClassNode
+from frontend.config import config as inference_config
 from frontend.pre_analysis import PreAnalyzer
 from frontend.stubs.stubs_handler import StubsHandler
 from z3 import *
@@ -31,33 +33,245 @@ set_param("smt.bv.reflect", True)
 # set_param(verbose=10)
 
 
+NO_TIMEOUT = 4294967295    # default timeout of Z3, in milliseconds
+
+
+def solver_limits(phase):
+    """Get the Z3 parameters limiting a phase of `TypesSolver.solve`, either `"solver"` or `"optimize"`
+
+    The parameters are always set, such that the limits of a phase do not remain in effect in the other one.
+    """
+    timeout = inference_config[phase + "_timeout"]
+    rlimit = inference_config[phase + "_rlimit"]
+    return {"timeout": NO_TIMEOUT if timeout is None else timeout, "rlimit": 0 if rlimit is None else rlimit}
+
+
+def resource_count(solver):
+    """Get the resources used by the checks of a solver so far, in Z3 resource units"""
+    statistics = solver.statistics()
+    return statistics.get_key_value("rlimit count") if "rlimit count" in statistics.keys() else 0
+
+
+def maximize_soft(solver, literals, limits):
+    """Search a model of a solver in which most of the given literals are true
+
+    The solver must have just been checked sat. The search is model-improving: a model with more true literals
+    is asked for, by a cardinality constraint in a pushed scope, until there is none. Thus, the maximization runs
+    on the encoding of the solver itself, which is never copied.
+
+    :param limits: the limits of the whole search, see `solver_limits`. Every check gets the time and the resources
+        left by the previous ones.
+    :return: the best model found
+    """
+    model = Solver.model(solver)
+    best = sum(is_true(model.eval(literal, model_completion=True)) for literal in literals)
+    deadline = time.time() + limits["timeout"] / 1000
+    start_count = resource_count(solver)
+    while best < len(literals):
+        remaining = int((deadline - time.time()) * 1000)
+        remaining_rlimit = limits["rlimit"] - (resource_count(solver) - start_count)
+        if remaining <= 0 or limits["rlimit"] and remaining_rlimit <= 0:
+            break
+        solver.set(timeout=min(remaining, limits["timeout"]), rlimit=remaining_rlimit if limits["rlimit"] else 0)
+        Solver.push(solver)
+        Solver.add(solver, AtLeast(*literals, best + 1))
+        check = solver.check()
+        if check == sat:
+            model = Solver.model(solver)
+            best = sum(is_true(model.eval(literal, model_completion=True)) for literal in literals)
+        Solver.pop(solver)
+        if check != sat:
+            break   # the model is optimal, or the limits are reached
+    return model
+
+
+def is_value(z3_type):
+    """Check if a type of a model is fully resolved, i.e. made only of constructors and numerals"""
+    if is_int_value(z3_type):
+        return True
+    return is_app_of(z3_type, Z3_OP_DT_CONSTRUCTOR) and all(is_value(arg) for arg in z3_type.children())
+
+
 class TypesSolver(Solver):
     """Z3 solver that has all the type system axioms initialized."""
 
-    def __init__(self, tree, solver=None, ctx=None):
+    def __init__(self, tree, solver=None, ctx=None, modular=None, base_folder="tests/inference"):
+        """
+        :param tree: the AST of the program to be inferred
+        :param base_folder: the folder containing the modules imported by the program
+        :param modular: whether to infer the top-level functions separately, see `frontend.function_summaries`.
+            Defaults to the `modular_function_inference` configuration.
+        """
         super().__init__(solver, ctx)
-        self.set(auto_config=False, mbqi=False, unsat_core=True)
+        self.set(auto_config=False, mbqi=False)
         self.element_id = 0     # unique id given to newly created Z3 consts
-        self.assertions_vars = []
-        self.assertions_errors = {}
+        self.assertions_vars = []   # tracking literals of the groups of constraints, see `unsat_core`
+        self.assertions_errors = {}     # tracking literal -> error message of its group
+        self.constraint_groups = OrderedDict()  # (source, error message) -> (tracking literal, constraints)
+        self.source = ""    # file of the constraints being added, empty for the program, see `add`
+        self.scopes = []    # sizes of the groups and of the soft constraints at each `push`
+        self.core = None
+        self.soft_literals = []     # literals guarding the soft constraints, see `add_soft`
+        self.optimized_model = None
+        self.partial_model = None   # model of the hard constraints when their check is inconclusive
+        self.check_result = None
+        self.consts = {}    # name -> Z3 constant created by `new_z3_const`
+        self.portfolio_winner = None    # (index, configuration, time) of the winner of the last portfolio solve
+        self.imported_types = {}    # stubs of the imported modules inferred separately, see ImportHandler
+        self.importing = []     # modules of the program being inferred, innermost last, see ImportHandler
         self.stubs_handler = StubsHandler()
-        analyzer = PreAnalyzer(tree, "tests/inference", self.stubs_handler)     # TODO: avoid hard-coding
+        analyzer = PreAnalyzer(tree, base_folder, self.stubs_handler)
         self.config = analyzer.get_all_configurations()
+        self.modular = inference_config["modular_function_inference"] if modular is None else modular
+        if self.modular:
+            analyzer.add_function_summary_keys(self.config.call_graph)
         self.z3_types = Z3Types(self.config)
         self.annotation_resolver = AnnotationResolver(self.z3_types)
-        self.optimize = Optimize(ctx)
-        # self.optimize.set("timeout", 30000)
         self.init_axioms()
 
     def add(self, *args, fail_message):
-        assertion = self.new_z3_const("assertion_bool", BoolSort())
-        self.assertions_vars.append(assertion)
-        self.assertions_errors[assertion] = fail_message
-        self.optimize.add(*args)
-        super().add(Implies(assertion, And(*args)))
+        """Add hard constraints, in the group of the constraints with the same source and error message.
+
+        The error messages name the construct and the source line of the constraints, and the source is the stub
+        file or the imported module being inferred, such that a group covers all the constraints of one statement.
+        The error message is the label of the group. The constraints are added untracked, see `unsat_core`.
+        """
+        key = (self.source, fail_message)
+        if key not in self.constraint_groups:
+            assertion = self.new_z3_const("assertion_bool", BoolSort())
+            self.assertions_vars.append(assertion)
+            self.assertions_errors[assertion] = fail_message
+            self.constraint_groups[key] = (assertion, [])
+        self.constraint_groups[key][1].append(And(*args))
+        super().add(*args)
+
+    def push(self):
+        """Create a scope, in which the added groups of constraints and soft constraints are removed by `pop`"""
+        super().push()
+        self.scopes.append(({key: len(constraints) for key, (_, constraints) in self.constraint_groups.items()},
+                            len(self.soft_literals)))
+
+    def pop(self, num=1):
+        """Backtrack `num` scopes, removing the groups of constraints and the soft constraints added in them"""
+        super().pop(num)
+        groups_sizes, soft_count = self.scopes[-num]
+        del self.scopes[-num:]
+        for key, (assertion, constraints) in list(self.constraint_groups.items()):
+            if key in groups_sizes:
+                del constraints[groups_sizes[key]:]
+            else:
+                del self.constraint_groups[key]
+                del self.assertions_errors[assertion]
+        self.assertions_vars = [assertion for assertion, _ in self.constraint_groups.values()]
+        del self.soft_literals[soft_count:]
+        self.core = None
+
+    def add_soft(self, constraint):
+        """Add a constraint which is satisfied by the inferred types whenever possible.
+
+        The constraint is asserted behind a fresh literal, which `solve` tries to make true.
+        """
+        literal = self.new_z3_const("soft_bool", BoolSort())
+        self.soft_literals.append(literal)
+        super().add(Implies(literal, constraint))
+
+    def solve(self):
+        """Infer the types in two phases.
+
+        The hard constraints are first checked alone, without tracking: if they are unsatisfiable, the explanation
+        is only extracted on request, by `unsat_core`. Only if they are satisfiable and there are soft constraints,
+        the number of satisfied soft constraints is maximized over the same encoding, see `maximize_soft`.
+
+        With a `portfolio_size` greater than one, the encoding is raced under several solver configurations
+        instead, see `frontend.portfolio`.
+
+        Both phases are limited by the `solver_*` and `optimize_*` limits of the configuration. If the soft
+        constraints cannot be maximized within the limits, the model of the hard constraints is kept. If the hard
+        constraints cannot be checked, the result is `unknown` and the partial model of the solver, if any,
+        is kept, see `inferred_type`.
+
+        :return: the result of the satisfiability check of the hard constraints
+        """
+        self.optimized_model = None
+        self.partial_model = None
+        self.core = None
+        self.portfolio_winner = None
+        if inference_config["portfolio_size"] > 1:
+            from frontend.portfolio import solve_portfolio
+            self.check_result = solve_portfolio(self, inference_config["portfolio_size"])
+            if self.check_result is not None:
+                return self.check_result
+
+        self.set(**solver_limits("solver"))
+        self.check_result = self.check()
+        if self.check_result == unknown:
+            try:
+                self.partial_model = super().model()
+            except Z3Exception:
+                pass    # no model is available
+        if self.check_result != sat or not self.soft_literals:
+            return self.check_result
+
+        self.optimized_model = maximize_soft(self, self.soft_literals, solver_limits("optimize"))
+        self.set(**solver_limits("solver"))
+        return self.check_result
+
+    def model(self):
+        """Return the model of the last check, which satisfies most soft constraints after `solve`.
+
+        After an inconclusive `solve`, return the partial model, if any.
+        """
+        if self.optimized_model is not None:
+            return self.optimized_model
+        if self.check_result == unknown and self.partial_model is not None:
+            return self.partial_model
+        return super().model()
+
+    def unsat_core(self):
+        """Return the tracking literals of a minimal set of groups of constraints which are unsatisfiable together
+
+        The core is extracted on the first request after an unsat `solve`, in a separate solver in which every group
+        of constraints is guarded by its tracking literal. With `minimize_unsat_cores`, groups are then removed from
+        the core as long as the remaining ones are still unsatisfiable. The error messages of the groups are in
+        `assertions_errors`.
+        """
+        if self.core is not None:
+            return self.core
+        core_solver = Solver(ctx=self.ctx)
+        core_solver.set(auto_config=False, mbqi=False, unsat_core=True, **solver_limits("solver"))
+        for assertion, constraints in self.constraint_groups.values():
+            core_solver.add(Implies(assertion, And(*constraints)))
+        if core_solver.check(self.assertions_vars) != unsat:
+            return []
+
+        core = list(core_solver.unsat_core())
+        if inference_config["minimize_unsat_cores"]:
+            for assertion in list(core):
+                remaining = [literal for literal in core if not literal.eq(assertion)]
+                if len(remaining) < len(core) and core_solver.check(remaining) == unsat:
+                    core_names = {str(literal) for literal in core_solver.unsat_core()}
+                    core = [literal for literal in remaining if str(literal) in core_names]
+        core_names = {str(literal) for literal in core}
+        self.core = [literal for literal in self.assertions_vars if str(literal) in core_names]
+        return self.core
+
+    def inferred_type(self, z3_type):
+        """Get the type of a variable after `solve`, and whether it is "inferred", "partial" or "unknown"
+
+        After an inconclusive `solve`, the types resolved by the partial model are reported as "partial",
+        and the other variables have the type `object` and are reported as "unknown".
+        """
+        if self.check_result == sat:
+            return self.model().eval(z3_type, model_completion=True), "inferred"
+        if self.partial_model is not None:
+            value = self.partial_model.eval(z3_type)
+            if is_value(value):
+                return value, "partial"
+        return self.z3_types.object, "unknown"
 
     def init_axioms(self):
-        self.add(self.z3_types.subtyping, fail_message="Subtyping error")
+        if self.z3_types.subtyping:
+            self.add(self.z3_types.subtyping, fail_message="Subtyping error")
 
     def infer_stubs(self, context, infer_func):
         self.stubs_handler.infer_all_files(context, self, self.config.used_names, infer_func)
@@ -70,7 +284,9 @@ class TypesSolver(Solver):
         """Create a new Z3 constant with a unique name."""
         if sort is None:
             sort = self.z3_types.type_sort
-        return Const("{}_{}".format(name, self.new_element_id()), sort)
+        const = Const("{}_{}".format(name, self.new_element_id()), sort)
+        self.consts[str(const)] = const
+        return const
 
     def resolve_annotation(self, annotation):
         return self.annotation_resolver.resolve(annotation, self)
@@ -84,13 +300,13 @@ class Z3Types:
         self.class_attributes = OrderedDict()
         self.class_to_init_count = config.class_to_init_count
 
-        max_tuple_length = config.max_tuple_length
-        max_function_args = config.max_function_args
+        tuple_lengths = config.tuple_lengths
+        function_arities = config.function_arities
         classes_to_instance_attrs = config.classes_to_instance_attrs
         classes_to_class_attrs = config.classes_to_class_attrs
         class_to_base = config.class_to_base
 
-        type_sort = declare_type_sort(max_tuple_length, max_function_args, classes_to_instance_attrs)
+        type_sort = declare_type_sort(tuple_lengths, function_arities, classes_to_instance_attrs)
         self.type_sort = type_sort
 
         # type constructors and accessors
@@ -108,9 +324,9 @@ class Z3Types:
         self.string = type_sort.str
         self.bytes = type_sort.bytes
         self.tuple = type_sort.tuple
-        self.tuples = list()
-        for cur_len in range(max_tuple_length + 1):
-            self.tuples.append(getattr(type_sort, "tuple_{}".format(cur_len)))
+        self.tuples = OrderedDict()  # tuple length -> type constructor, only for the lengths used in the program
+        for cur_len in tuple_lengths:
+            self.tuples[cur_len] = getattr(type_sort, "tuple_{}".format(cur_len))
         self.list = type_sort.list
         self.list_type = type_sort.list_type
         # sets
@@ -121,9 +337,9 @@ class Z3Types:
         self.dict_key_type = type_sort.dict_key_type
         self.dict_value_type = type_sort.dict_value_type
         # functions
-        self.funcs = list()
-        for cur_len in range(max_function_args + 1):
-            self.funcs.append(getattr(type_sort, "func_{}".format(cur_len)))
+        self.funcs = OrderedDict()  # arguments count -> type constructor, only for the arities used in the program
+        for cur_len in function_arities:
+            self.funcs[cur_len] = getattr(type_sort, "func_{}".format(cur_len))
         # classes
         self.classes = OrderedDict()
         for cls in classes_to_instance_attrs:
@@ -132,8 +348,12 @@ class Z3Types:
         create_classes_attributes(type_sort, classes_to_class_attrs, self.class_attributes)
 
         # function representing subtyping between types: subtype(x, y) if and only if x is a subtype of y
-        self.subtype = Function("subtype", type_sort, type_sort, BoolSort())
-        self.subtyping = self.create_subtype_axioms(config.all_classes, type_sort)
+        if inference_config["ground_subtyping"]:
+            self.subtype = self.create_subtype_relation(config.all_classes, type_sort)
+            self.subtyping = []
+        else:
+            self.subtype = Function("subtype", type_sort, type_sort, BoolSort())
+            self.subtyping = self.create_subtype_axioms(config.all_classes, type_sort)
 
     @staticmethod
     def create_class_tree(all_classes, type_sort):
@@ -191,8 +411,43 @@ class Z3Types:
             axioms.append(axiom)
         return axioms
 
+    def create_subtype_relation(self, all_classes, type_sort):
+        """
+        Creates a quantifier-free definition of the subtype relation for all possible classes.
+
+        The class hierarchy is finite, so the strict subclasses and superclasses of every class are precomputed,
+        and subtype(x, y) is expanded into a ground formula over the recognizers of the type constructors:
+        either x and y are the same type, or y is built by a strict superclass of the constructor of x.
+        Generic types are only subtypes of themselves and of their (non-generic) superclasses.
+        """
+        tree = self.create_class_tree(all_classes, type_sort)
+        subclasses = OrderedDict()
+        superclasses = OrderedDict()
+        for c in tree.all_children():
+            subclasses[c.get_constructor_name()] = [sub.get_recognizer() for sub in c.all_children()[1:]]
+            superclasses[c.get_constructor_name()] = [base.get_recognizer() for base in c.all_parents()[1:]]
+        # Lookup table of the classes with subclasses, used when neither type is known
+        table = [(c.get_recognizer(), subclasses[c.get_constructor_name()])
+                 for c in tree.all_children() if subclasses[c.get_constructor_name()]]
+
+        def constructor_name(t):
+            if is_app_of(t, Z3_OP_DT_CONSTRUCTOR):
+                return t.decl().name()
+            return None
+
+        def subtype(x, y):
+            y_name = constructor_name(y)
+            if y_name is not None:
+                return Or(x == y, *[is_sub(x) for is_sub in subclasses[y_name]])
+            x_name = constructor_name(x)
+            if x_name is not None:
+                return Or(x == y, *[is_base(y) for is_base in superclasses[x_name]])
+            return Or(x == y, *[And(is_base(y), Or(*[is_sub(x) for is_sub in subs])) for is_base, subs in table])
+
+        return subtype
+
 
-def declare_type_sort(max_tuple_length, max_function_args, classes_to_instance_attrs):
+def declare_type_sort(tuple_lengths, function_arities, classes_to_instance_attrs):
     """Declare the type data type and all its constructors and accessors."""
     type_sort = Datatype("Type")
 
@@ -211,7 +466,7 @@ def declare_type_sort(max_tuple_length, max_function_args, classes_to_instance_a
     type_sort.declare("str")
     type_sort.declare("bytes")
     type_sort.declare("tuple")
-    for cur_len in range(max_tuple_length + 1):     # declare type constructors for tuples up to max length
+    for cur_len in tuple_lengths:     # declare type constructors for tuples of the used lengths
         accessors = []
         # create accessors for the tuple
         for arg in range(cur_len):
@@ -225,7 +480,7 @@ def declare_type_sort(max_tuple_length, max_function_args, classes_to_instance_a
     # dictionaries
     type_sort.declare("dict", ("dict_key_type", type_sort), ("dict_value_type", type_sort))
     # functions
-    for cur_len in range(max_function_args + 1):    # declare type constructors for functions
+    for cur_len in function_arities:    # declare type constructors for functions of the used arities
         # the first accessor of the function is the number of default arguments that the function has
         accessors = [("func_{}_defaults_args".format(cur_len), IntSort())]
         # create accessors for the argument types of the function
@@ -0,0 +1,151 @@
+"""
+Lowering
+========
+
+Translation of statements into flat lists of domain-agnostic instructions.
+
+The expressions constructed by the semantics of a statement only depend on the statement itself. Thus, they can be
+built once per program, rather than once per fixpoint iteration, by running the semantics against a
+:class:`RecordingState` that records the state primitives (assignments, substitutions, assumptions, and outputs)
+applied to it, together with their expression sets.
+
+.. note::
+    Lowering assumes that accessing a variable and evaluating a literal have no side-effects on the state and do not
+    depend on it, which is the case for all abstract domains.
+"""
+
+from enum import Enum
+from typing import List, Set
+
+from abstract_domains.state import State
+from core.expressions import Expression, VariableIdentifier
+from core.statements import Statement
+from semantics.semantics import Semantics
+
+
+class Instruction:
+    class Kind(Enum):
+        """Kind of an instruction, i.e., the state primitive it executes."""
+        ASSIGN = 'assign_variable'
+        SUBSTITUTE = 'substitute_variable'
+        ASSUME = 'assume'
+        OUTPUT = 'output'
+
+    def __init__(self, kind: Kind, *operands: Set[Expression]):
+        """Instruction applying a state primitive to pre-built sets of expressions.
+
+        :param kind: kind of the instruction
+        :param operands: sets of expressions the state primitive is applied to
+        """
+        self._kind = kind
+        self._operands = operands
+
+    @property
+    def kind(self):
+        return self._kind
+
+    @property
+    def operands(self):
+        return self._operands
+
+    def execute(self, state: State) -> State:
+        """Execute the instruction.
+
+        :param state: state before executing the instruction
+        :return: state modified by the instruction execution
+        """
+        return getattr(state, self.kind.value)(*self.operands)
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        operands = ", ".join("{{{}}}".format(", ".join(map(str, operand))) for operand in self.operands)
+        return "{}({})".format(self.kind.value, operands)
+
+
+class LoweredStatement:
+    def __init__(self, stmt: Statement, instructions: List[Instruction], result: Set[Expression]):
+        """Statement lowered into a list of instructions.
+
+        :param stmt: lowered statement
+        :param instructions: instructions to be executed in order
+        :param result: result of the statement after executing the instructions
+        """
+        self._stmt = stmt
+        self._instructions = instructions
+        self._result = result
+
+    @property
+    def stmt(self):
+        return self._stmt
+
+    @property
+    def instructions(self):
+        return self._instructions
+
+    @property
+    def result(self):
+        return self._result
+
+    def execute(self, state: State) -> State:
+        """Execute the lowered statement.
+
+        :param state: state before executing the statement
+        :return: state modified by the statement execution
+        """
+        for instruction in self.instructions:
+            state = instruction.execute(state)
+        state.result = set(self.result)
+        return state
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return "; ".join(str(instruction) for instruction in self.instructions) or str(self.stmt)
+
+
+class RecordingState:
+    """Stand-in for a state recording the state primitives applied to it instead of executing them."""
+
+    def __init__(self):
+        self.result = set()
+        self.instructions = []
+
+    def _record(self, kind: Instruction.Kind, *operands: Set[Expression]) -> 'RecordingState':
+        self.instructions.append(Instruction(kind, *operands))
+        if kind != Instruction.Kind.ASSUME:
+            self.result = set()  # assignments, substitutions, and outputs have no result, only side-effects
+        return self
+
+    def access_variable(self, variable: VariableIdentifier) -> 'RecordingState':
+        self.result = {variable}
+        return self
+
+    def evaluate_literal(self, literal: Expression) -> 'RecordingState':
+        self.result = {literal}
+        return self
+
+    def assign_variable(self, left: Set[Expression], right: Set[Expression]) -> 'RecordingState':
+        return self._record(Instruction.Kind.ASSIGN, left, right)
+
+    def substitute_variable(self, left: Set[Expression], right: Set[Expression]) -> 'RecordingState':
+        return self._record(Instruction.Kind.SUBSTITUTE, left, right)
+
+    def assume(self, condition: Set[Expression]) -> 'RecordingState':
+        return self._record(Instruction.Kind.ASSUME, condition)
+
+    def output(self, output: Set[Expression]) -> 'RecordingState':
+        return self._record(Instruction.Kind.OUTPUT, output)
+
+
+def lower(semantics: Semantics, stmt: Statement) -> LoweredStatement:
+    """Lower a statement into a list of instructions.
+
+    :param semantics: semantics of statements
+    :param stmt: statement to be lowered
+    :return: lowered statement
+    """
+    recorder = semantics.semantics(stmt, RecordingState())
+    return LoweredStatement(stmt, recorder.instructions, recorder.result)
@@ -3,6 +3,7 @@ from core.expressions import BinaryArithmeticOperation, BinaryOperation, BinaryC
     UnaryArithmeticOperation, UnaryBooleanOperation, BinaryBooleanOperation, Input, ListDisplay, Slice, Index, Literal
 from core.statements import Statement, VariableAccess, LiteralEvaluation, Call, ListDisplayStmt, SliceStmt, IndexStmt
 from functools import reduce
+from typing import Callable, Type
 import re
 import itertools
 
@@ -21,7 +22,35 @@ def camel_to_snake(name: str) -> str:
 
 
 class Semantics:
-    """Semantics of statements. Independently of the direction (forward/backward) of the analysis."""
+    """Semantics of statements. Independently of the direction (forward/backward) of the analysis.
+
+    The semantics of a statement of type ``StmtType`` is given by a method named ``stmt_type_semantics``. The handler
+    of each type of statement is looked up only once per class and then kept in a class-level dispatch table.
+    Additional handlers can be registered with :meth:`register_semantics`.
+    """
+
+    _handlers = dict()  # dispatch table from statement type to handler, one per class
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._handlers = dict()
+
+    @classmethod
+    def _invalidate(cls):
+        """Clear the dispatch tables of this class and of all its subclasses."""
+        cls._handlers.clear()
+        for subclass in cls.__subclasses__():
+            subclass._invalidate()
+
+    @classmethod
+    def register_semantics(cls, typ: Type[Statement], handler: Callable[['Semantics', Statement, State], State]):
+        """Register the semantics of a type of statements for this class and its subclasses.
+
+        :param typ: type of statements
+        :param handler: function taking the semantics, the statement to be executed, and the state before executing it
+        """
+        setattr(cls, '{}_semantics'.format(camel_to_snake(typ.__name__)), handler)
+        cls._invalidate()
 
     def semantics(self, stmt: Statement, state: State) -> State:
         """Semantics of a statement.
@@ -30,12 +59,16 @@ class Semantics:
         :param state: state before executing the statement
         :return: state modified by the statement execution
         """
-        name = '{}_semantics'.format(camel_to_snake(stmt.__class__.__name__))
-        if hasattr(self, name):
-            return getattr(self, name)(stmt, state)
-        else:
-            raise NotImplementedError(f"Semantics for statement {stmt} of type {type(stmt)} not yet implemented! "
-                                      f"You must provide method {name}(...)")
+        try:
+            handler = self._handlers[stmt.__class__]
+        except KeyError:
+            name = '{}_semantics'.format(camel_to_snake(stmt.__class__.__name__))
+            handler = getattr(self.__class__, name, None)
+            if handler is None:
+                raise NotImplementedError(f"Semantics for statement {stmt} of type {type(stmt)} not yet implemented! "
+                                          f"You must provide method {name}(...)")
+            self._handlers[stmt.__class__] = handler
+        return handler(self, stmt, state)
 
 
 class LiteralEvaluationSemantics(Semantics):
@@ -135,6 +168,27 @@ class ListSemantics(Semantics):
 class CallSemantics(Semantics):
     """Semantics of function/method calls."""
 
+    _call_handlers = dict()  # dispatch table from function/method name to handler, one per class
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._call_handlers = dict()
+
+    @classmethod
+    def _invalidate(cls):
+        cls._call_handlers.clear()
+        super()._invalidate()
+
+    @classmethod
+    def register_call_semantics(cls, name: str, handler: Callable[['Semantics', Call, State], State]):
+        """Register the semantics of calls to a function/method for this class and its subclasses.
+
+        :param name: name of the called function/method
+        :param handler: function taking the semantics, the call statement to be executed, and the state before the call
+        """
+        setattr(cls, '{}_call_semantics'.format(name), handler)
+        cls._invalidate()
+
     def call_semantics(self, stmt: Call, state: State) -> State:
         """Semantics of a function/method call.
         
@@ -142,11 +196,14 @@ class CallSemantics(Semantics):
         :param state: state before executing the call statement
         :return: state modified by the call statement
         """
-        name = '{}_call_semantics'.format(stmt.name)
-        if hasattr(self, name):
-            return getattr(self, name)(stmt, state)
-        else:
-            return getattr(self, 'user_defined_call_semantics')(stmt, state)
+        try:
+            handler = self._call_handlers[stmt.name]
+        except KeyError:
+            handler = getattr(self.__class__, '{}_call_semantics'.format(stmt.name), None)
+            if handler is None:
+                handler = getattr(self.__class__, 'user_defined_call_semantics')
+            self._call_handlers[stmt.name] = handler
+        return handler(self, stmt, state)
 
 
 class BuiltInCallSemantics(CallSemantics):
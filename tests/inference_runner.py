@@ -32,7 +32,8 @@ def print_context(ctx, ind=""):
         z3_t = ctx.types_map[v]
         if isinstance(z3_t, (Context, AnnotatedFunction)):
             continue
-        print(ind + "{}: {}".format(v, model[z3_t]))
+        z3_type, status = solver.inferred_type(z3_t)
+        print(ind + "{}: {}{}".format(v, z3_type, "" if status == "inferred" else " ({})".format(status)))
         if ctx.has_context_in_children(v):
             print_context(ctx.get_context_from_children(v), "\t" + ind)
         if not ind:
@@ -47,16 +48,20 @@ def print_context(ctx, ind=""):
 
 
 start_time = time.time()
-check = solver.optimize.check()
+check = solver.solve()
 end_time = time.time()
 
 if check == z3_types.unsat:
     print("Check: unsat")
-    solver.check(solver.assertions_vars)
     print(solver.unsat_core())
     print([solver.assertions_errors[x] for x in solver.unsat_core()])
 else:
-    model = solver.optimize.model()
+    if check == z3_types.unknown:
+        print("Check: unknown, the types are partial")
     print_context(context)
 
+if solver.portfolio_winner is not None:
+    from frontend import portfolio
+    print("Solved by the portfolio configuration {} {}".format(*solver.portfolio_winner[:2]))
+    print(portfolio.report())
 print("Ran in {} seconds".format(end_time - start_time))
@@ -83,7 +83,7 @@ class TestInference(unittest.TestCase):
 
         solver, context = self.infer_file(self.file_path)
 
-        check = solver.optimize.check()
+        check = solver.solve()
         if self.sat:
             self.assertNotEqual(check, z3_types.unsat)
         else:
@@ -92,7 +92,7 @@ class TestInference(unittest.TestCase):
             print(self.test_end_message(end_time - start_time))
             return
 
-        model = solver.optimize.model()
+        model = solver.model()
         for v in expected_result:
             self.assertTrue(context.has_var_in_children(v),
                             "Test file {}. Expected to have variable '{}' in the program".format(self.file_name, v))
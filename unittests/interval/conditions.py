@@ -0,0 +1,16 @@
+x = int(input())
+y = 0
+
+if x >= 0 and x + 1 < 5:
+    # RESULT: x -> [0,3], y -> [0,0]
+    y = x - 1
+else:
+    # RESULT: x -> [-inf,inf], y -> [0,0]
+    y = 1
+
+# RESULT: x -> [-inf,inf], y -> [-1,2]
+print(y)
+
+if y > 2:
+    # RESULT: x -> ⊥, y -> ⊥
+    x = 3
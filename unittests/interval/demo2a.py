@@ -2,7 +2,7 @@ x = int(input())
 a = 0
 
 if 3 > x:
-    # RESULT: a -> [0,0], x -> [-inf,inf]
+    # RESULT: a -> [0,0], x -> [-inf,2]
     a = x
 
 print(a)
@@ -0,0 +1,8 @@
+i = 0
+
+while i < 10:
+    # RESULT: i -> [0,9]
+    i = i + 1
+
+# RESULT: i -> [10,inf]
+print(i)
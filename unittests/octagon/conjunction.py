@@ -0,0 +1,6 @@
+x = int(input())
+y = int(input())
+
+if 0 <= x and x < y and y <= 5:
+    # RESULT: 0≤x≤4, y≤5, y+x≤9, y-x≤5, -y+x≤-1, -y-x≤-1
+    print(x)
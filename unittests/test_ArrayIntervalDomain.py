@@ -0,0 +1,70 @@
+import unittest
+from copy import deepcopy
+from unittest import TestCase
+
+from abstract_domains.numerical.array_interval_domain import ArrayIntervalDomain
+from abstract_domains.numerical.interval_domain import IntervalDomain
+from abstract_domains.numerical.octagon_domain import OctagonDomain
+from core.expressions import BinaryArithmeticOperation, BinaryComparisonOperation, Literal, VariableIdentifier
+
+x = VariableIdentifier(int, "x")
+y = VariableIdentifier(int, "y")
+
+
+def store(domain, x_bounds, y_bounds):
+    result = domain([x, y])
+    result.set_bounds(x, *x_bounds)
+    result.set_bounds(y, *y_bounds)
+    return result
+
+
+class TestArrayIntervalDomain(TestCase):
+    def test_lattice(self):
+        for operation in ["join", "meet"]:
+            array, interval = store(ArrayIntervalDomain, (0, 1), (2, 5)), store(IntervalDomain, (0, 1), (2, 5))
+            getattr(array, operation)(store(ArrayIntervalDomain, (-1, 1), (3, 7)))
+            getattr(interval, operation)(store(IntervalDomain, (-1, 1), (3, 7)))
+            self.assertEqual(repr(array), repr(interval), operation)
+
+        a, b = store(ArrayIntervalDomain, (0, 1), (2, 5)), store(ArrayIntervalDomain, (-1, 1), (3, 7))
+        self.assertTrue(deepcopy(a).meet(b).less_equal(a))
+        self.assertTrue(a.less_equal(deepcopy(a).join(b)))
+        self.assertEqual(repr(deepcopy(a).widening(b)), "x -> [-inf,1], y -> [2,inf]")
+
+        self.assertTrue(store(ArrayIntervalDomain, (0, 1), (3, 2)).is_bottom())
+        self.assertTrue(ArrayIntervalDomain([x, y]).is_top())
+        self.assertTrue(ArrayIntervalDomain([x, y]).bottom().less_equal(a))
+
+    def test_assign(self):
+        array = store(ArrayIntervalDomain, (0, 1), (2, 5))
+        right = BinaryArithmeticOperation(int, y, BinaryArithmeticOperation.Operator.Mult, Literal(int, "2"))
+        array.assign_variable({x}, {right})
+        self.assertEqual(array.get_bounds(x), (4, 10))
+
+    def test_assume(self):
+        Operator = BinaryComparisonOperation.Operator
+        conditions = [
+            BinaryComparisonOperation(bool, x, Operator.GtE, Literal(int, "1")),
+            BinaryComparisonOperation(bool, y, Operator.Lt, x),
+            BinaryComparisonOperation(bool, y, Operator.Gt, Literal(int, "7")),
+            BinaryComparisonOperation(bool, x, Operator.NotEq, y),  # not refined, the state is kept
+        ]
+        for condition in conditions:
+            array, interval = store(ArrayIntervalDomain, (0, 3), (2, 5)), store(IntervalDomain, (0, 3), (2, 5))
+            array.assume({condition})
+            interval.assume({condition})
+            self.assertEqual(repr(array), repr(interval), str(condition))
+
+    def test_conversions(self):
+        array = store(ArrayIntervalDomain, (0, 1), (-2, 5))
+        self.assertEqual(repr(array.to_interval_domain()), repr(array))
+        self.assertEqual(repr(ArrayIntervalDomain([x, y]).from_interval_domain(array.to_interval_domain())),
+                         repr(array))
+
+        octagon = array.to_octagon(OctagonDomain([x, y]))
+        self.assertEqual(octagon.get_bounds(y), (-2, 5))
+        self.assertEqual(repr(ArrayIntervalDomain([x, y]).from_octagon(octagon)), repr(array))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import pickle
+import unittest
+from copy import deepcopy
+from unittest import TestCase
+
+from core.expressions import BinaryArithmeticOperation, Literal, VariableIdentifier, ListDisplay
+from core.expressions_tools import ExpressionTransformer, PostOrderExpressionVisitor, walk
+from core.utils import memoize
+
+Add = BinaryArithmeticOperation.Operator.Add
+
+
+class TestExpressions(TestCase):
+    def test_interning(self):
+        x = VariableIdentifier(int, "x")
+        self.assertIs(x, VariableIdentifier(int, "x"))
+        self.assertIsNot(x, VariableIdentifier(list, "x"))
+
+        e = BinaryArithmeticOperation(int, x, Add, Literal(int, "1"))
+        self.assertIs(e, BinaryArithmeticOperation(int, VariableIdentifier(int, "x"), Add, Literal(int, "1")))
+        self.assertEqual(len({e, BinaryArithmeticOperation(int, x, Add, Literal(int, "1"))}), 1)
+
+        self.assertIs(ListDisplay(list, [x, e]), ListDisplay(list, (x, e)))
+
+    def test_copy(self):
+        x = VariableIdentifier(int, "x")
+        e = BinaryArithmeticOperation(int, x, Add, x)
+        self.assertIs(deepcopy(e), e)
+        self.assertIs(pickle.loads(pickle.dumps(e)), e)
+
+    def test_cached(self):
+        x = VariableIdentifier(int, "x")
+        y = VariableIdentifier(int, "y")
+        e = BinaryArithmeticOperation(int, x, Add, BinaryArithmeticOperation(int, y, Add, x))
+        self.assertEqual(str(e), "x + (y + x)")
+        self.assertIs(str(e), str(e))
+        self.assertEqual(e.ids(), {x, y})
+        self.assertIs(e.ids(), e.ids())
+
+    def test_transformer(self):
+        class Rename(ExpressionTransformer):
+            def visit_VariableIdentifier(self, expr):
+                return VariableIdentifier(expr.typ, expr.name.upper())
+
+        x = VariableIdentifier(int, "x")
+        e = BinaryArithmeticOperation(int, x, Add, Literal(int, "1"))
+        renamed = Rename().visit(e)
+        self.assertEqual(str(renamed), "X + 1")
+        self.assertEqual(str(e), "x + 1")  # the original expression is unchanged
+        self.assertIs(ExpressionTransformer().visit(e), e)
+
+    def test_children(self):
+        x = VariableIdentifier(int, "x")
+        one = Literal(int, "1")
+        e = BinaryArithmeticOperation(int, x, Add, one)
+        self.assertEqual(e.children(), (x, one))
+        self.assertEqual(x.children(), ())
+        self.assertEqual(ListDisplay(list, [x, e]).children(), (x, e))
+
+    def test_post_order(self):
+        class Evaluator(PostOrderExpressionVisitor):
+            def visit_Literal(self, expr, _):
+                return int(expr.val)
+
+            def visit_BinaryArithmeticOperation(self, _, results):
+                return results[0] + results[1]
+
+        one = Literal(int, "1")
+        e = one
+        for _ in range(10000):  # deeper than the default recursion limit
+            e = BinaryArithmeticOperation(int, e, Add, one)
+        self.assertEqual(Evaluator().visit(e), 10001)
+        self.assertEqual(sum(1 for _ in walk(e)), 20001)
+
+    def test_memoize(self):
+        calls = []
+
+        @memoize(maxsize=2, exceptions=(ValueError,))
+        def name(expr):
+            calls.append(expr)
+            if isinstance(expr, Literal):
+                raise ValueError()
+            return expr.name
+
+        x = VariableIdentifier(int, "x")
+        self.assertEqual(name(x), "x")
+        self.assertEqual(name(VariableIdentifier(int, "x")), "x")
+        for _ in range(2):
+            self.assertRaises(ValueError, name, Literal(int, "1"))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(name.cache_info().hits, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 
-from abstract_domains.numerical.interval_domain import Interval
+from abstract_domains.numerical.interval_domain import Interval, IntervalDomain, IntervalLattice
+from core.expressions import VariableIdentifier
 
 
 class TestInterval(unittest.TestCase):
@@ -20,9 +21,34 @@ class TestInterval(unittest.TestCase):
         self.assertFalse(Interval(0, 2) <= Interval(1, 4))
 
 
+class TestIntervalLattice(unittest.TestCase):
+    def runTest(self):
+        inf = float('inf')
+        # a bottom element with infinite bounds is not top
+        self.assertFalse(IntervalLattice(-inf, inf).bottom().is_top())
+        self.assertTrue(IntervalLattice(-inf, inf).is_top())
+
+        widened = IntervalLattice(0, 1).widening(IntervalLattice(-1, 1))
+        self.assertEqual((widened.lower, widened.upper), (-inf, 1))
+        widened = IntervalLattice(0, 1).widening(IntervalLattice(0, 2))
+        self.assertEqual((widened.lower, widened.upper), (0, inf))
+
+        # the widening of a store is point-wise, not a join
+        x, y = VariableIdentifier(int, "x"), VariableIdentifier(int, "y")
+        store, other = IntervalDomain([x, y]), IntervalDomain([x, y])
+        store.set_interval(x, IntervalLattice(0, 0))
+        store.set_interval(y, IntervalLattice(0, 0))
+        other.set_interval(x, IntervalLattice(0, 1))
+        other.set_interval(y, IntervalLattice(0, 0))
+        store.widening(other)
+        self.assertEqual((store.store[x].lower, store.store[x].upper), (0, inf))
+        self.assertEqual((store.store[y].lower, store.store[y].upper), (0, 0))
+
+
 def suite():
     s = unittest.TestSuite()
     s.addTest(TestInterval())
+    s.addTest(TestIntervalLattice())
     runner = unittest.TextTestRunner()
     runner.run(s)
 
@@ -28,6 +28,7 @@ def suite():
     s.addTest(TestIntervalDomain("simple", """a = 3 * (2+5)""", "[21,21]"))
     s.addTest(TestIntervalDomain("simple", """a = (3+3) * (2+5)""", "[42,42]"))
     s.addTest(TestIntervalDomain("simple", """a = 3 - (2+5)""", "[-4,-4]"))
+    s.addTest(TestIntervalDomain("unary", """a = -(3 * (2+5))""", "[-21,-21]"))
     runner = unittest.TextTestRunner()
     runner.run(s)
 
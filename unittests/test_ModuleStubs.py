@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import TestCase
+
+from frontend.import_handler import ImportHandler
+from frontend.module_stubs import ModuleStubsCache
+
+MODULES = {
+    "a": "x = 1\n",
+    "b": "import a\ny = a.x\n",
+    "c": "from b import y\nimport math\nz = y\n",
+    "d": "import e\n",
+    "e": "import d\n",
+}
+
+
+class TestModuleStubs(TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        for name, source in MODULES.items():
+            self.write(name, source)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write(self, name, source):
+        path = os.path.join(self.folder.name, "{}.py".format(name))
+        with open(path, "w") as f:
+            f.write(source)
+        # Make sure the modification time changes, such that the source is hashed again
+        mtime = time.time() + len(source)
+        os.utime(path, (mtime, mtime))
+
+    def keys(self):
+        return {name: ImportHandler.module_key(name, self.folder.name, "stubs") for name in MODULES}
+
+    def test_imported_modules(self):
+        tree = ImportHandler.get_module_ast("c", self.folder.name)
+        self.assertEqual(ImportHandler.imported_modules(tree), ["b"])
+
+    def test_transitive_invalidation(self):
+        keys = self.keys()
+        self.write("a", "x = 2\n")
+        new_keys = self.keys()
+        self.assertNotEqual(keys["a"], new_keys["a"])
+        self.assertNotEqual(keys["b"], new_keys["b"])
+        self.assertNotEqual(keys["c"], new_keys["c"])
+        self.assertEqual(keys["d"], new_keys["d"])
+        self.assertNotEqual(keys["c"], ImportHandler.module_key("c", self.folder.name, "other stubs"))
+
+    def test_cycle(self):
+        keys = self.keys()
+        self.write("e", "import d\nw = 1\n")
+        new_keys = self.keys()
+        self.assertNotEqual(keys["d"], new_keys["d"])
+        self.assertNotEqual(keys["e"], new_keys["e"])
+
+    def test_cache(self):
+        directory = os.path.join(self.folder.name, "cache")
+        ModuleStubsCache(directory).put("a", "key", "x: int\n")
+        cache = ModuleStubsCache(directory)
+        self.assertEqual(cache.get("a", "key"), "x: int\n")
+        self.assertIsNone(cache.get("a", "other key"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import ast
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+
+from frontend.pre_analysis import PreAnalyzer, dependency_order
+from frontend.stubs.stubs_handler import StubsHandler
+
+PROGRAM = """g = 3
+
+def f(x, y=1):
+    z = x + y
+    return z * 2
+
+def h(a):
+    return f(a) + len([a])
+
+def k(a):
+    return a + g
+
+def r(n):
+    return r(n - 1)
+
+def v(a):
+    return h
+
+p = h(2) + k(1) + f(1)
+"""
+
+
+def analyze(source):
+    tree = ast.parse(source)
+    analyzer = PreAnalyzer(tree, "", StubsHandler())
+    config = analyzer.get_all_configurations()
+    analyzer.add_function_summary_keys(config.call_graph)
+    return config, {node.name: getattr(node, "summary_key", None) for node in tree.body
+                    if isinstance(node, ast.FunctionDef)}
+
+
+class TestPreAnalyzer(TestCase):
+    def test_call_graph(self):
+        config, _ = analyze(PROGRAM)
+        self.assertEqual(dict(config.call_graph), {"f": set(), "h": {"f"}, "k": set(), "r": {"r"}, "v": {"h"}})
+
+    def test_summary_keys(self):
+        _, keys = analyze(PROGRAM)
+        self.assertIsNotNone(keys["f"])
+        self.assertIsNone(keys["h"])  # used as a value in v
+        self.assertIsNone(keys["k"])  # refers to a global variable
+        self.assertIsNone(keys["r"])  # recursive
+
+        _, other_keys = analyze(PROGRAM.replace("z * 2", "z * 3"))
+        self.assertNotEqual(keys["f"], other_keys["f"])
+
+        _, keys = analyze(PROGRAM.replace("return h\n", "return 1\n"))
+        self.assertIsNotNone(keys["h"])
+        _, other_keys = analyze(PROGRAM.replace("return h\n", "return 1\n").replace("z * 2", "z * 3"))
+        self.assertNotEqual(keys["h"], other_keys["h"])  # the key depends on the called functions
+
+    def test_dependency_order(self):
+        # f calls g, which is defined after it; a and b call each other
+        _, keys = analyze("def f(x):\n    return g(x) + 1\n\n"
+                          "def g(x):\n    return x * 2\n\n"
+                          "def a(x):\n    return b(x)\n\n"
+                          "def b(x):\n    return a(x)\n\n"
+                          "def c(x):\n    return a(x)\n\n"
+                          "y = f(1) + c(2)\n")
+        self.assertIsNotNone(keys["f"])
+        self.assertIsNotNone(keys["g"])
+        self.assertIsNone(keys["a"])
+        self.assertIsNone(keys["b"])
+        self.assertIsNone(keys["c"])  # calls a function in a cycle
+
+        graph = {"f": {"g"}, "g": set(), "a": {"b"}, "b": {"a"}, "c": {"a", "g"}, "r": {"r"}, "h": {"f", "g"}}
+        order = dependency_order(graph)
+        self.assertEqual(set(order), {"f", "g", "h"})
+        self.assertLess(order.index("g"), order.index("f"))
+        self.assertLess(order.index("f"), order.index("h"))
+
+    def test_attributes(self):
+        # the receiver of an attribute could be an instance of a class of the program
+        _, keys = analyze("class A:\n    def upper(self):\n        return 1\n\n"
+                          "def f(x):\n    return x.upper()\n\n"
+                          "def g(x):\n    return ' '.join(x)\n\n"
+                          "y = f(A()) + g(['a'])\n")
+        self.assertIsNone(keys["f"])
+        self.assertIsNotNone(keys["g"])
+
+    def test_import_cycle(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for name, source in [("d", "import e\nx = (1, 2, 3)\n"), ("e", "from d import x\n")]:
+                with open(os.path.join(folder, "{}.py".format(name)), "w") as f:
+                    f.write(source)
+            tree = ast.parse("import d\n")
+            analyzer = PreAnalyzer(tree, folder, StubsHandler())
+        self.assertEqual(sum(isinstance(node, ast.Module) for node in analyzer.all_nodes), 3)
+        self.assertIn(3, analyzer.get_all_configurations().tuple_lengths)
+
+    def test_sparse_sizes(self):
+        # sizes which only appear in annotations are declared, and no other large size is
+        source = "def f(g: Callable[[{}], int]) -> Tuple[{}]:\n    pass\n".format(
+            ", ".join(["int"] * 11), ", ".join(["str"] * 13))
+        config, _ = analyze(source)
+        self.assertIn(0, config.tuple_lengths)
+        self.assertIn(13, config.tuple_lengths)
+        self.assertNotIn(12, config.tuple_lengths)
+        self.assertIn(1, config.function_arities)  # f
+        self.assertIn(11, config.function_arities)  # g
+        self.assertNotIn(12, config.function_arities)
+
+        config, _ = analyze("x = (1, 2)\ny: Tuple[int] = (1,)\n")
+        self.assertIn(2, config.tuple_lengths)
+        self.assertIn(1, config.tuple_lengths)
+
+
+if __name__ == '__main__':
+    unittest.main()
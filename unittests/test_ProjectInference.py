@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+
+from frontend.project_inference import import_graph, infer_project
+
+MODULES = {
+    "a": "x = 1\n",
+    "b": "import a\ny = a.x + 1\n",
+    "d": "import e\nv = 1\n",
+    "e": "import d\nw = d.v\n",
+}
+
+
+class TestProjectInference(TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        for name, source in MODULES.items():
+            with open(os.path.join(self.folder.name, "{}.py".format(name)), "w") as f:
+                f.write(source)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_import_graph(self):
+        graph, keys, errors = import_graph(self.folder.name, sorted(MODULES))
+        self.assertEqual(graph, {"a": [], "b": ["a"], "d": ["e"], "e": ["d"]})
+        self.assertEqual(set(keys), set(MODULES))
+        self.assertFalse(errors)
+
+    def test_cycle(self):
+        results = infer_project(self.folder.name, processes=2, timeout=60)
+        self.assertEqual(set(results), set(MODULES))
+        self.assertIn(results["a"].status, ("sat", "cached"))
+        self.assertIn(results["b"].status, ("sat", "cached"))
+        # The cycle is broken by inferring d first, e then uses the stub of d
+        for module_name in ("d", "e"):
+            self.assertIn(results[module_name].status, ("sat", "cached"), results[module_name].message)
+        self.assertIn("v: int", results["d"].stub)
+        self.assertIn("w: int", results["e"].stub)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from copy import deepcopy
+from unittest import TestCase
+
+from abstract_domains.numerical.interval_domain import IntervalDomain
+from abstract_domains.numerical.zone_domain import ZoneDomain
+from abstract_domains.reduced_product import ReducedProduct
+from core.expressions import BinaryArithmeticOperation, BinaryComparisonOperation, Literal, VariableIdentifier
+
+x = VariableIdentifier(int, "x")
+y = VariableIdentifier(int, "y")
+
+
+class TestReducedProduct(TestCase):
+    def test_reduce(self):
+        product = ReducedProduct([IntervalDomain, ZoneDomain], {'variables': [x, y]})
+        interval, zone = product.components
+        interval.set_bounds(x, 0, 10)
+        zone.set_bounds(x, 5, 20)
+        self.assertEqual(product.bounds(x), (5, 10))
+        self.assertEqual(interval.get_bounds(x), (5, 10))
+        self.assertEqual(zone.get_bounds(x), (5, 10))
+        self.assertFalse(product.dirty)
+
+        zone.set_bounds(y, 11, 12)
+        interval.set_bounds(y, 0, 3)
+        product.bounds(y)  # components modified directly are not marked as dirty, nothing is reduced
+        self.assertEqual(zone.get_bounds(y), (11, 12))
+
+    def test_lazy(self):
+        product = ReducedProduct([IntervalDomain, ZoneDomain], {'variables': [x, y]})
+        product.assume({BinaryComparisonOperation(int, x, BinaryComparisonOperation.Operator.LtE, y)})
+        product.assume({BinaryComparisonOperation(int, y, BinaryComparisonOperation.Operator.LtE, Literal(int, "3"))})
+        self.assertTrue(product.dirty)
+        interval, zone = product.components
+        self.assertEqual(interval.get_bounds(x), (-float('inf'), float('inf')))
+
+        # the comparison does not reduce the compared states
+        self.assertTrue(deepcopy(product).less_equal(product))
+        self.assertTrue(product.dirty)
+        self.assertEqual(interval.get_bounds(x), (-float('inf'), float('inf')))
+
+        product.bounds(y)
+        self.assertFalse(product.dirty)
+        self.assertEqual(interval.get_bounds(x), (-float('inf'), 3))
+
+        product.assume({BinaryComparisonOperation(int, x, BinaryComparisonOperation.Operator.GtE, Literal(int, "0"))})
+        self.assertEqual(product.bounds(x), (0, 3))
+
+        product.assume({BinaryComparisonOperation(int, x, BinaryComparisonOperation.Operator.Gt, Literal(int, "3"))})
+        self.assertTrue(product.is_bottom())
+
+    def test_widening(self):
+        # the widened iterate is not tightened by the comparison with the previous one
+        previous = ReducedProduct([IntervalDomain, ZoneDomain], {'variables': [x, y]})
+        previous.components[0].set_bounds(x, 0, 1)
+        previous.components[1].set_bounds(x, 0, 1)
+        previous.components[1].set_difference_constraint(y, x, 0)
+        current = deepcopy(previous)
+        current.components[0].set_bounds(x, 0, 2)
+        current.components[1].set_bounds(x, 0, 2)
+        widened = deepcopy(previous).widening(current)
+        self.assertFalse(widened.less_equal(previous))
+        self.assertTrue(widened.dirty)
+        self.assertEqual(widened.components[0].get_bounds(x), (0, float('inf')))
+        self.assertEqual(widened.components[0].get_bounds(y), (-float('inf'), float('inf')))
+        self.assertTrue(previous.less_equal(widened))
+
+    def test_loop(self):
+        # x = 0; y = x; while x < 10: x = x + 1; y = y + 1
+        # the relation y = x is explicit in the zone, the widened iterates are not closed to ensure termination
+        def increment(var):
+            return BinaryArithmeticOperation(int, var, BinaryArithmeticOperation.Operator.Add, Literal(int, "1"))
+
+        entry = ReducedProduct([IntervalDomain, ZoneDomain], {'variables': [x, y]})
+        entry.assign_variable({x}, {Literal(int, "0")})
+        entry.assign_variable({y}, {x})
+        head = deepcopy(entry)
+        for iteration in range(10):
+            body = deepcopy(head)
+            body.assume({BinaryComparisonOperation(bool, x, BinaryComparisonOperation.Operator.Lt, Literal(int, "10"))})
+            body.assign_variable({x}, {increment(x)})
+            body.assign_variable({y}, {increment(y)})
+            new = deepcopy(entry).join(body)
+            if new.less_equal(head):
+                break
+            head.widening(new)
+        else:
+            self.fail("the widening did not reach a fixpoint")
+
+        self.assertEqual(head.bounds(x), (0, float('inf')))
+        exit_state = deepcopy(head)
+        exit_state.assume({BinaryComparisonOperation(bool, x, BinaryComparisonOperation.Operator.GtE,
+                                                     Literal(int, "10"))})
+        # the bound of y is only known through the relation x = y kept by the zone
+        self.assertEqual(exit_state.bounds(y), (10, float('inf')))
+        self.assertEqual(exit_state.components[0].get_bounds(y), (10, float('inf')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+
+from frontend.stubs.stubs_cache import ASSIGN, CLASS_DEF, FUNCTION_DEF, TYPE_VAR, StubsCache
+
+STUB = """T = TypeVar("T")
+pi = 3.14
+
+def f(x: T) -> T:
+    ...
+
+class A:
+    pass
+"""
+
+
+class TestStubsCache(TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "stub.py")
+        with open(self.path, "w") as f:
+            f.write(STUB)
+        self.directory = os.path.join(self.folder.name, "cache")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_copies(self):
+        cache = StubsCache(self.directory)
+        tree = cache.get_ast(self.path)
+        tree.body[2].method_type = "list"
+        tree.body.clear()
+        self.assertEqual(len(cache.get_ast(self.path).body), 4)
+        self.assertFalse(hasattr(cache.get_ast(self.path).body[2], "method_type"))
+
+    def test_disk(self):
+        StubsCache(self.directory).get_ast(self.path)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        self.assertEqual(len(StubsCache(self.directory).get_ast(self.path).body), 4)
+
+        cache = StubsCache(self.directory)
+        cache.get_ast(self.path)
+        with open(self.path, "a") as f:
+            f.write("e = 2.71\n")
+        os.utime(self.path, (0, 0))
+        self.assertEqual(len(cache.get_ast(self.path).body), 5)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_corrupt_file(self):
+        StubsCache(self.directory).get_ast(self.path)
+        cache_file = os.path.join(self.directory, os.listdir(self.directory)[0])
+        with open(cache_file, "wb") as f:
+            f.write(b"\x80\x04truncated")
+        self.assertEqual(len(StubsCache(self.directory).get_ast(self.path).body), 4)
+        self.assertEqual(len(StubsCache(self.directory).get_ast(self.path).body), 4)  # the file was overwritten
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "POSIX permissions")
+    def test_private_directory(self):
+        StubsCache(self.directory).get_ast(self.path)
+        self.assertEqual(os.stat(self.directory).st_mode & 0o777, 0o700)
+
+        # a folder accessible by other users is never read nor written
+        shared = os.path.join(self.folder.name, "shared")
+        os.makedirs(shared)
+        os.chmod(shared, 0o777)
+        with open(os.path.join(shared, os.listdir(self.directory)[0]), "wb") as f:
+            f.write(b"planted")
+        StubsCache(shared).get_ast(self.path)
+        self.assertEqual(len(os.listdir(shared)), 1)
+
+    def test_index(self):
+        index = StubsCache().get_index(self.path)
+        self.assertEqual(index[None], [(TYPE_VAR, 0)])
+        self.assertEqual(index["T"], [(ASSIGN, 0)])
+        self.assertEqual(index["pi"], [(ASSIGN, 1)])
+        self.assertEqual(index["f"], [(FUNCTION_DEF, 2)])
+        self.assertEqual(index["A"], [(CLASS_DEF, 3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
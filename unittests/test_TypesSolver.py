@@ -0,0 +1,383 @@
+import ast
+import os
+import tempfile
+import unittest
+from contextlib import contextmanager
+from unittest import TestCase
+
+import frontend.function_summaries as function_summaries
+import frontend.import_handler as import_handler
+import frontend.portfolio as portfolio
+from frontend.config import config as inference_config
+from frontend.context import Context, FunctionSummary
+from frontend.import_handler import ImportHandler
+from frontend.module_stubs import ModuleStubsCache, module_stub
+from frontend.stmt_inferrer import infer
+from frontend.z3_types import (NO_TIMEOUT, And, Bool, Not, Or, Solver, TypesSolver, is_true, maximize_soft,
+                               resource_count, sat, solver_limits, unknown, unsat)
+
+CLASSES = """class A:
+    def f(self):
+        return 1
+
+class B(A):
+    pass
+
+class C:
+    pass
+
+def g(a):
+    return a.f()
+
+x = g(B())
+z = 1 + 2.0
+"""
+
+
+@contextmanager
+def configured(**options):
+    """Temporarily change the configuration of the inference"""
+    previous = {option: inference_config[option] for option in options}
+    inference_config.update(options)
+    try:
+        yield
+    finally:
+        inference_config.update(previous)
+
+
+def infer_program(source, base_folder="unittests/inference"):
+    """Generate the constraints of a program, without solving them"""
+    return infer_tree(ast.parse(source), base_folder)
+
+
+def infer_tree(tree, base_folder="unittests/inference"):
+    """Generate the constraints of the AST of a program, without solving them"""
+    solver = TypesSolver(tree, base_folder=base_folder)
+    context = Context()
+    solver.infer_stubs(context, infer)
+    for stmt in tree.body:
+        infer(stmt, context, solver)
+    return solver, context
+
+
+def resolve(solver, annotation):
+    return solver.resolve_annotation(ast.parse(annotation, mode="eval").body)
+
+
+class TestGroundSubtyping(TestCase):
+    TYPES = ["object", "int", "float", "bool", "str", "A", "B", "C", "List[int]", "List[A]", "Tuple[int, str]"]
+
+    def subtype_table(self, ground):
+        with configured(ground_subtyping=ground):
+            solver, _ = infer_program(CLASSES)
+            table = {}
+            for sub in self.TYPES:
+                for sup in self.TYPES:
+                    solver.push()
+                    # the query is not a constraint of the program, thus it is added untracked
+                    Solver.add(solver, solver.z3_types.subtype(resolve(solver, sub), resolve(solver, sup)))
+                    table[sub, sup] = solver.check() == sat
+                    solver.pop()
+        return table
+
+    def test_relation(self):
+        ground = self.subtype_table(True)
+        self.assertEqual(ground, self.subtype_table(False))
+        self.assertTrue(ground["B", "A"])
+        self.assertFalse(ground["A", "B"])
+        self.assertFalse(ground["C", "A"])
+        self.assertTrue(ground["bool", "int"])
+        self.assertTrue(ground["List[int]", "object"])
+
+    def test_inference(self):
+        with configured(ground_subtyping=True):
+            solver, context = infer_program(CLASSES)
+            self.assertEqual(solver.solve(), sat)
+            model = solver.model()
+            self.assertEqual(model[context.get_type("x")], resolve(solver, "int"))
+            self.assertEqual(model[context.get_type("z")], resolve(solver, "float"))
+
+
+class TestSoftConstraints(TestCase):
+    def test_maximize(self):
+        a, b, c = Bool("a"), Bool("b"), Bool("c")
+        solver = Solver()
+        solver.add(Not(And(a, b)), Or(Not(c), Not(a)))
+        self.assertEqual(solver.check(), sat)
+        model = maximize_soft(solver, [a, b, c], solver_limits("optimize"))
+        self.assertEqual(sum(is_true(model.eval(literal, model_completion=True)) for literal in [a, b, c]), 2)
+        self.assertTrue(is_true(model.eval(b, model_completion=True)))
+        self.assertEqual(len(solver.assertions()), 2)  # the search leaves the encoding unchanged
+
+    def test_resources(self):
+        # the resource limit is shared by all the checks of the search
+        def maximize(rlimit):
+            literals = [Bool("l{}".format(i)) for i in range(8)]
+            solver = Solver()
+            solver.add(*[Or(Not(a), Not(b)) for a, b in zip(literals, literals[1:])])
+            self.assertEqual(solver.check(), sat)
+            start_count = resource_count(solver)
+            model = maximize_soft(solver, literals, {"timeout": NO_TIMEOUT, "rlimit": rlimit})
+            best = sum(is_true(model.eval(literal, model_completion=True)) for literal in literals)
+            return best, resource_count(solver) - start_count
+
+        best, used = maximize(0)
+        self.assertEqual(best, 4)
+        self.assertGreater(used, 0)
+        limited_best, limited_used = maximize(used // 2 or 1)
+        self.assertLessEqual(limited_best, best)
+        self.assertLess(limited_used, used)
+
+    def test_solve(self):
+        solver, _ = infer_program("")
+        t = solver.new_z3_const("t")
+        solver.add(Or(t == resolve(solver, "int"), t == resolve(solver, "str")), fail_message="Test in line 1")
+        solver.add_soft(t == resolve(solver, "str"))
+        solver.add_soft(t == resolve(solver, "str"))
+        solver.add_soft(t == resolve(solver, "int"))
+        self.assertEqual(solver.solve(), sat)
+        self.assertEqual(solver.model()[t], resolve(solver, "str"))
+
+
+class TestSparseSizes(TestCase):
+    CALLABLE = "Callable[[{}], int]".format(", ".join(["int"] * 11))
+    TUPLE = "Tuple[{}]".format(", ".join(["str"] * 13))
+    PROGRAM = "def f(g: {}) -> {}:\n    pass\n".format(CALLABLE, TUPLE)
+
+    def test_declared(self):
+        solver, _ = infer_program(self.PROGRAM)
+        self.assertIn(11, solver.z3_types.funcs)
+        self.assertIn(13, solver.z3_types.tuples)
+        self.assertNotIn(12, solver.z3_types.funcs)
+        self.assertNotIn(12, solver.z3_types.tuples)
+
+    def test_inference(self):
+        with configured(ignore_fully_annotated_function=True):
+            solver, context = infer_program(self.PROGRAM)
+            self.assertEqual(solver.solve(), sat)
+            self.assertEqual(solver.model()[context.get_type("f")],
+                             resolve(solver, "Callable[[{}], {}]".format(self.CALLABLE, self.TUPLE)))
+
+
+class TestFunctionSummaries(TestCase):
+    PROGRAM = """class A:
+    def upper(self):
+        return 1
+
+def f(x):
+    return x.upper()
+
+def g(x):
+    return x + 1
+
+def h(x):
+    return g(x)
+
+y = f(A())
+z = h(2)
+"""
+
+    def setUp(self):
+        # Cache the summaries only in memory, such that every test solves them
+        self.summaries_cache = function_summaries.summaries_cache
+        function_summaries.summaries_cache = function_summaries.SummariesCache()
+
+    def tearDown(self):
+        function_summaries.summaries_cache = self.summaries_cache
+
+    def test_infer_summary(self):
+        with configured(modular_function_inference=True):
+            tree = ast.parse(self.PROGRAM)
+            solver, context = infer_tree(tree)
+            functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+            self.assertFalse(hasattr(functions["f"], "summary_key"))
+            summary = function_summaries.infer_summary(functions["g"], context, solver, infer)
+            self.assertIsInstance(summary, FunctionSummary)
+            self.assertIn((["int"], "int"), summary.annotations)
+            self.assertEqual(len(summary.candidates), len(summary.annotations))
+
+    def test_calls(self):
+        with configured(modular_function_inference=True):
+            solver, context = infer_program(self.PROGRAM)
+            self.assertIsInstance(context.get_type("g"), FunctionSummary)
+            self.assertIsInstance(context.get_type("h"), FunctionSummary)
+            self.assertEqual(solver.solve(), sat)
+            model = solver.model()
+            # f is inlined, such that its parameter can have the type of a class of the program
+            self.assertEqual(model[context.get_type("y")], resolve(solver, "int"))
+            self.assertEqual(model[context.get_type("z")], resolve(solver, "int"))
+
+    def test_forward_calls(self):
+        # f is summarized with the summary of g, which is defined after it
+        with configured(modular_function_inference=True):
+            solver, context = infer_program("def f(x):\n    return g(x) + 'b'\n\n"
+                                            "def g(x):\n    return x + 'a'\n\n"
+                                            "y = f('c')\n")
+            self.assertIsInstance(context.get_type("f"), FunctionSummary)
+            self.assertIsInstance(context.get_type("g"), FunctionSummary)
+            self.assertEqual(context.get_type("f").annotations, [(["str"], "str")])
+            self.assertEqual(solver.solve(), sat)
+            self.assertEqual(solver.model()[context.get_type("y")], resolve(solver, "str"))
+
+
+class TestCachedModuleStubs(TestCase):
+    MODULE = "def f(x):\n    return x + 'a'\n\ny = f('b')\n"
+    PROGRAM = "from a import f, y\nz = f(y)\nw = [y]\n"
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.folder.name, "a.py"), "w") as f:
+            f.write(self.MODULE)
+        # Cache the stubs only in memory
+        self.module_stubs_cache = import_handler.module_stubs_cache
+        import_handler.module_stubs_cache = ModuleStubsCache()
+
+    def tearDown(self):
+        import_handler.module_stubs_cache = self.module_stubs_cache
+        self.folder.cleanup()
+
+    def cache_stub(self, stub=None):
+        """Cache the stub of the module `a`, inferred like in the project inference unless it is given"""
+        tree = ast.parse(self.MODULE)
+        solver = TypesSolver(tree, base_folder=self.folder.name)
+        if stub is None:
+            stubs_context = Context()
+            solver.infer_stubs(stubs_context, infer)
+            context = Context(name="a", parent_context=stubs_context)
+            for stmt in tree.body:
+                infer(stmt, context, solver)
+            self.assertEqual(solver.solve(), sat)
+            stub = module_stub(tree, context, solver.model())
+        key = ImportHandler.module_key("a", self.folder.name, solver.stubs_handler.digest)
+        import_handler.module_stubs_cache.put("a", key, stub)
+        return stub
+
+    def inferred_types(self):
+        solver, context = infer_program(self.PROGRAM, self.folder.name)
+        self.assertEqual(solver.solve(), sat)
+        model = solver.model()
+        return {name: str(model[context.get_type(name)]) for name in ("y", "z", "w")}
+
+    def test_same_types(self):
+        inferred = self.inferred_types()
+        self.assertEqual(inferred["z"], "str")
+        self.assertEqual(self.cache_stub(), "def f(x: str) -> str: ...\ny: str\n")
+        with configured(reuse_module_stubs=True):
+            self.assertEqual(self.inferred_types(), inferred)
+
+    def test_disabled(self):
+        inferred = self.inferred_types()
+        self.cache_stub("def f(x: int) -> int: ...\ny: int\n")
+        self.assertEqual(self.inferred_types(), inferred)
+        with configured(reuse_module_stubs=True):
+            self.assertEqual(self.inferred_types()["z"], "int")
+
+
+class TestPortfolio(TestCase):
+    def solve(self, portfolio_size):
+        with configured(portfolio_size=portfolio_size):
+            solver, context = infer_program(CLASSES)
+            check = solver.solve()
+            return check, solver, {name: str(solver.model()[context.get_type(name)]) for name in ("x", "z")}
+
+    def test_replay(self):
+        check, solver, types = self.solve(1)
+        self.assertEqual(check, sat)
+        self.assertIsNone(solver.portfolio_winner)
+
+        wins = sum(portfolio.wins.values())
+        portfolio_check, portfolio_solver, portfolio_types = self.solve(2)
+        self.assertEqual(portfolio_check, sat)
+        # The model of the winner is replayed in the solver of the inference
+        self.assertEqual(portfolio_types, types)
+        index, configuration, _ = portfolio_solver.portfolio_winner
+        self.assertIn(index, (0, 1))
+        self.assertEqual(configuration, portfolio.CONFIGURATIONS[index])
+        self.assertEqual(sum(portfolio.wins.values()), wins + 1)
+        self.assertIn("{}: {} wins".format(index, portfolio.wins[index]), portfolio.report())
+
+    def test_unsat(self):
+        with configured(portfolio_size=2):
+            solver, _ = infer_program("x = 1 + 'a'\n")
+            self.assertEqual(solver.solve(), unsat)
+            self.assertIsNotNone(solver.portfolio_winner)
+            self.assertIn("Addition in line 1", [solver.assertions_errors[literal] for literal in solver.unsat_core()])
+
+
+class TestLimits(TestCase):
+    def test_solver_limit(self):
+        with configured(solver_rlimit=1):
+            solver, context = infer_program(CLASSES)
+            self.assertEqual(solver.solve(), unknown)
+            self.assertEqual(solver.check_result, unknown)
+            for name in ("x", "z", "g"):
+                z3_type, status = solver.inferred_type(context.get_type(name))
+                self.assertIn(status, ("partial", "unknown"))
+                if status == "unknown":
+                    self.assertEqual(z3_type, solver.z3_types.object)
+        # The limit of a solve does not remain in effect
+        solver, context = infer_program(CLASSES)
+        self.assertEqual(solver.solve(), sat)
+        self.assertEqual(solver.inferred_type(context.get_type("x")), (resolve(solver, "int"), "inferred"))
+
+    def test_optimize_limit(self):
+        with configured(optimize_rlimit=1):
+            solver, _ = infer_program("")
+            t = solver.new_z3_const("t")
+            solver.add(Or(t == resolve(solver, "int"), t == resolve(solver, "str")), fail_message="Test in line 1")
+            solver.add_soft(t == resolve(solver, "str"))
+            # The model of the hard constraints is kept
+            self.assertEqual(solver.solve(), sat)
+            z3_type, status = solver.inferred_type(t)
+            self.assertEqual(status, "inferred")
+            self.assertIn(z3_type, (resolve(solver, "int"), resolve(solver, "str")))
+
+
+class TestConstraintGroups(TestCase):
+    def test_sources(self):
+        solver, _ = infer_program("")
+        t = solver.new_z3_const("t")
+        solver.add(t == resolve(solver, "int"), fail_message="Assignment in line 1")
+        solver.source = "a.py"
+        solver.add(t == resolve(solver, "str"), fail_message="Assignment in line 1")
+        solver.source = ""
+        self.assertIn(("", "Assignment in line 1"), solver.constraint_groups)
+        self.assertIn(("a.py", "Assignment in line 1"), solver.constraint_groups)
+        self.assertEqual(solver.solve(), unsat)
+        core = solver.unsat_core()
+        self.assertEqual(len(core), 2)
+        self.assertEqual([solver.assertions_errors[literal] for literal in core], ["Assignment in line 1"] * 2)
+
+    def test_stubs(self):
+        solver, _ = infer_program("x = len([1])\n")
+        self.assertIn(("", "Call in line 1"), solver.constraint_groups)
+        # The constraints of the stub files are grouped apart from the ones of the program
+        self.assertTrue(any(source.endswith(".py") for source, _ in solver.constraint_groups))
+
+    def test_class_methods(self):
+        solver, _ = infer_program(CLASSES)
+        messages = [message for source, message in solver.constraint_groups if source == ""]
+        self.assertIn("First arg in class methods has class instance type in line 1", messages)
+        self.assertNotIn("First arg in class methods has class instance type", messages)
+
+    def test_scopes(self):
+        solver, _ = infer_program("")
+        t = solver.new_z3_const("t")
+        solver.add(t == resolve(solver, "int"), fail_message="Assignment in line 1")
+        groups = len(solver.constraint_groups)
+        solver.push()
+        solver.add(t == resolve(solver, "str"), fail_message="Assignment in line 2")
+        solver.add(t == resolve(solver, "str"), fail_message="Assignment in line 1")
+        solver.add_soft(t == resolve(solver, "str"))
+        self.assertEqual(solver.solve(), unsat)
+        self.assertEqual(len(solver.unsat_core()), 2)
+        solver.pop()
+        self.assertEqual(len(solver.constraint_groups), groups)
+        self.assertEqual(len(solver.assertions_vars), groups)
+        self.assertEqual(len(solver.constraint_groups["", "Assignment in line 1"][1]), 1)
+        self.assertFalse(solver.soft_literals)
+        self.assertEqual(solver.solve(), sat)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from copy import deepcopy
+from unittest import mock, TestCase
+
+import numpy as np
+
+import abstract_domains.numerical.zone_domain as zone_domain
+from abstract_domains.numerical.interval_domain import IntervalLattice
+from abstract_domains.numerical.zone_domain import ZoneDomain
+from core.expressions import BinaryArithmeticOperation, VariableIdentifier
+
+x = VariableIdentifier(int, "x")
+y = VariableIdentifier(int, "y")
+
+
+def zone(x_bounds, difference=None):
+    """Zone with bounds for x and, optionally, the constraint y - x <= difference"""
+    result = ZoneDomain([x, y])
+    result.set_bounds(x, *x_bounds)
+    if difference is not None:
+        result.set_difference_constraint(y, x, difference)
+    return result
+
+
+class TestZoneDomain(TestCase):
+    def test_less_equal(self):
+        # the implicit bound y <= 3 is taken into account, without closing the zone
+        a, b = zone((0, 1), 2), zone((0, 1))
+        b.set_ub(y, 3)
+        matrix = a.matrix.copy()
+        self.assertTrue(a.less_equal(b))
+        self.assertTrue(np.array_equal(a.matrix, matrix))
+        self.assertFalse(b.less_equal(a))
+
+        a.set_difference_constraint(x, y, -3)  # x - y <= -3 contradicts y - x <= 2
+        self.assertTrue(a.less_equal(b))
+        self.assertTrue(a.is_bottom())
+
+    def test_bounds(self):
+        a = zone((0, 1), 2)
+        with mock.patch.object(zone_domain, "_closure", wraps=zone_domain._closure) as closure:
+            self.assertEqual(a.bounds(y), (-float('inf'), 3))
+            self.assertEqual(a.bounds(x), (0, 1))
+            addition = BinaryArithmeticOperation(int, x, BinaryArithmeticOperation.Operator.Add, y)
+            self.assertEqual(a.evaluate(addition), IntervalLattice(-float('inf'), 4))
+            self.assertEqual(closure.call_count, 1)  # the zone is closed at most once until it is modified
+            a.set_ub(x, 0)
+            self.assertEqual(a.bounds(y), (-float('inf'), 2))
+            self.assertEqual(closure.call_count, 2)
+
+    def test_bottom(self):
+        a = ZoneDomain([x, y]).bottom()
+        self.assertIsNone(a.bounds(x))
+        self.assertTrue(a.evaluate(x).is_bottom())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -121,6 +121,22 @@ class TestCDBM(TestCase):
         # print(dbm)
         self.assertTrue(not consistent or dbm.tightly_closed)
 
+    def test_closure(self):
+        dbm = IntegerCDBM(4)
+        dbm[1, 0] = 10
+        dbm[3, 1] = 4
+        self.assertEqual(dbm.finite, 2)
+        closure = dbm.closure()
+        self.assertIs(dbm.closure(), closure)  # closed at most once
+        self.assertFalse(dbm.closed)
+        self.assertEqual(dbm[3, 0], float('inf'))  # not modified
+        self.assertTrue(closure.closed)
+        self.assertEqual(closure[3, 0], 14)
+
+        dbm[3, 1] = float('inf')
+        self.assertEqual(dbm.finite, 1)
+        self.assertIsNot(dbm.closure(), closure)
+
 
 def suite():
     s = unittest.TestSuite()
@@ -1,5 +1,5 @@
 import glob
-from abstract_domains.traces.traces_domain import BoolTracesState
+from abstract_domains.traces.traces_domain import BoolTracesState, TvlTracesState
 from core.expressions import VariableIdentifier
 from engine.backward import BackwardInterpreter
 from semantics.backward import DefaultBackwardSemantics
@@ -33,12 +33,41 @@ class TracesTestCase(ResultCommentsFileTestCase):
         self.render_result_cfg(result)
 
 
+class ParallelTracesTestCase(TracesTestCase):
+    def __init__(self, source_path, state=BoolTracesState):
+        super().__init__(source_path)
+        self._state = state
+
+    def runTest(self):
+        logging.info(self)
+
+        # find all variables
+        variable_names = sorted(
+            {node.id for node in ast.walk(self.ast_root) if
+             isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)})
+        variables = [VariableIdentifier(int, name) for name in variable_names]
+        if self._state is TvlTracesState and len(variables) > 2:
+            # the initial hyper state holds all the 2^(3^n) sets of traces over n three-valued variables
+            self.skipTest("too many variables for the three-valued hyper state")
+
+        # run traces analysis serially and with sets of traces sharded across worker processes
+        serial = BackwardInterpreter(self.cfg, DefaultBackwardSemantics(), 3).analyze(
+            self._state(variables, True))
+        parallel = BackwardInterpreter(self.cfg, DefaultBackwardSemantics(), 3).analyze(
+            self._state(variables, True, processes=2))
+        for node in self.cfg.nodes.values():
+            self.assertEqual([state.sets for state in serial.get_node_result(node)],
+                             [state.sets for state in parallel.get_node_result(node)])
+
+
 def suite():
     s = unittest.TestSuite()
     g = os.getcwd() + '/traces/**.py'
     for path in glob.iglob(g):
         if os.path.basename(path) != "__init__.py":
             s.addTest(TracesTestCase(path))
+            s.addTest(ParallelTracesTestCase(path))
+            s.addTest(ParallelTracesTestCase(path, TvlTracesState))
     runner = unittest.TextTestRunner()
     runner.run(s)
 
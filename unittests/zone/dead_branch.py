@@ -0,0 +1,14 @@
+x = int(input())
+a = 0
+
+a = a - 1
+
+if a > 0:
+    a = x
+    # RESULT: ⊥
+else:
+    x = a
+
+a = 2
+
+print(a - x)
@@ -0,0 +1,4 @@
+x = 3
+a = x * 2
+# RESULT: 6≤a≤6, 3≤x≤3, a-x≤3, x-a≤-3
+print(a)
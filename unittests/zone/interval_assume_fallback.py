@@ -0,0 +1,11 @@
+x = int(input())
+a = 0
+b = 3
+
+if a + b + x > 0:
+    a = x
+
+if a * x > 0:
+    a = x
+
+print(a)
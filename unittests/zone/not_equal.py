@@ -0,0 +1,9 @@
+x = int(input())
+
+# make positive
+if x < 0 and x != 0:
+    x = -x
+
+# RESULT: 1≤x
+
+print(x)
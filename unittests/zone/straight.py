@@ -0,0 +1,10 @@
+x = int(input())
+y = int(input())
+a = x - 1
+b = a
+
+b += 10
+
+# RESULT: a-b≤-10, a-x≤-1, b-a≤10, b-x≤9, x-a≤1, x-b≤-9
+
+print(a - x)